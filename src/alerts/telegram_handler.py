@@ -1,21 +1,25 @@
-from typing import List, Tuple
-from .telegram import TelegramAlert
+from typing import List, Optional, Tuple
 from config import TELEGRAM_BOT_TOKEN, TELEGRAM_CHAT_ID, TELEGRAM_ALERT_ENABLED
+from metrics import metrics
 
-async def send_alerts(processed_files: List[Tuple[str, str]]) -> None:
-    """Send processed files via Telegram if enabled."""
+async def send_alerts(processed_files: List[Tuple[str, Optional[str], str]]) -> None:
+    """Send processed (file_name, search_param, store) exports via Telegram if enabled."""
     if processed_files and TELEGRAM_ALERT_ENABLED and TELEGRAM_BOT_TOKEN and TELEGRAM_CHAT_ID:
+        # python-telegram-bot is only imported when alerts are actually sent
+        from .telegram import TelegramAlert
+
         telegram = TelegramAlert(TELEGRAM_BOT_TOKEN, TELEGRAM_CHAT_ID)
         
-        for file_name, search_param in processed_files:
-            caption = (f"Product data for search: {search_param} from "
-                      f"{file_name.replace('.csv', '').title()}" if search_param
-                      else f"Product data from {file_name.replace('.csv', '').title()}")
+        for file_name, search_param, store in processed_files:
+            caption = (f"Product data for search: {search_param} from {store.title()}" if search_param
+                      else f"Product data from {store.title()}")
             
-            success = await telegram.send_file(
-                f"src/data/{file_name}",
-                caption=caption
-            )
+            with metrics.timer("alert", channel="telegram"):
+                success = await telegram.send_file(
+                    f"src/data/{file_name}",
+                    caption=caption
+                )
+            metrics.counter("alerts_sent" if success else "alerts_failed", channel="telegram").inc()
             
             if success:
                 print(f"File {file_name} sent successfully via Telegram")
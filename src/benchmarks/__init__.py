@@ -0,0 +1,2 @@
+# Reproducible benchmarks for the storage, export and parser paths.
+# Run with: python -m benchmarks --size 1k (from the src directory)
@@ -0,0 +1,44 @@
+import argparse
+import json
+import sys
+import tempfile
+from datetime import datetime
+from pathlib import Path
+
+from .generators import SIZES
+from .suite import compare, run_suite
+
+RESULTS_DIR = Path(__file__).parent / "results"
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Run the tech-product-tracker benchmark suite")
+    parser.add_argument("--size", choices=list(SIZES), default="1k", help="Synthetic catalogue size")
+    parser.add_argument("--repeat", type=int, default=5, help="Timed calls per benchmark")
+    parser.add_argument("--filter", dest="name_filter", help="Only run benchmarks whose name contains this")
+    parser.add_argument("--seed", type=int, default=0, help="Catalogue generator seed")
+    parser.add_argument("--output", type=Path, help="Where to save the JSON results")
+    parser.add_argument("--baseline", type=Path, help="Previous results JSON to compare against")
+    parser.add_argument("--threshold", type=float, default=0.25,
+                        help="Allowed slowdown versus the baseline before flagging a regression")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory(prefix="tpt-bench-") as work_dir:
+        results = run_suite(args.size, Path(work_dir), args.repeat, args.name_filter, args.seed)
+
+    output = args.output or RESULTS_DIR / f"{args.size}-{datetime.now():%Y%m%d-%H%M%S}.json"
+    output.parent.mkdir(parents=True, exist_ok=True)
+    output.write_text(json.dumps(results, indent=2))
+    print(f"\nResults saved to {output}")
+
+    if args.baseline:
+        print(f"\nComparing against {args.baseline}:")
+        regressions = compare(results, json.loads(args.baseline.read_text()), args.threshold)
+        if regressions:
+            print("\nRegressions:")
+            for regression in regressions:
+                print(f"  {regression}")
+            return 1
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,106 @@
+import random
+import sqlite3
+from datetime import datetime, timedelta
+from typing import Dict, Iterator, List, Tuple
+
+from storage.db import Database
+
+# Catalogue sizes accepted on the command line
+SIZES: Dict[str, int] = {
+    "1k": 1_000,
+    "100k": 100_000,
+    "1m": 1_000_000,
+}
+
+STORES = ["microcenter", "bh"]
+
+_BRANDS = ["ASUS", "MSI", "Gigabyte", "PNY", "Zotac", "AMD", "Intel", "Samsung", "Crucial", "Corsair"]
+_FAMILIES = ["GeForce RTX", "Radeon RX", "Ryzen", "Core i", "990 PRO", "Vengeance", "T700", "Arc"]
+_MODELS = ["4060", "4070 Ti SUPER", "4090", "7800 XT", "7900X3D", "14600K", "A770", "9700X"]
+_CAPACITIES = ["8GB", "12GB", "16GB", "24GB", "32GB", "1TB", "2TB", "4TB"]
+_SUFFIXES = ["Graphics Card", "Boxed Processor", "Internal SSD", "Desktop Memory Kit", "OC Edition"]
+
+_CHUNK_SIZE = 50_000
+
+def product_name(rng: random.Random, index: int) -> str:
+    """A plausible, unique listing title"""
+    return (f"{rng.choice(_BRANDS)} {rng.choice(_FAMILIES)} {rng.choice(_MODELS)} "
+            f"{rng.choice(_CAPACITIES)} {rng.choice(_SUFFIXES)} #{index}")
+
+def raw_products(count: int, seed: int = 0, prefix: str = "") -> List[Dict]:
+    """Parser-shaped product dictionaries, as handed to store_products"""
+    rng = random.Random(seed)
+    return [
+        {
+            "name": f"{prefix}{product_name(rng, i)}",
+            "price": f"${rng.uniform(20, 2500):,.2f}",
+            "link": f"https://example.com/product/{prefix}{i}",
+            "image": f"https://example.com/images/{prefix}{i}.jpg",
+        }
+        for i in range(count)
+    ]
+
+def _product_rows(count: int, rng: random.Random, now: datetime) -> Iterator[Tuple]:
+    for i in range(count):
+        created = (now - timedelta(days=rng.randint(30, 1500))).isoformat()
+        yield (
+            i + 1,
+            product_name(rng, i),
+            round(rng.uniform(20, 2500), 2),
+            f"https://example.com/product/{i}",
+            f"https://example.com/images/{i}.jpg",
+            STORES[i % len(STORES)],
+            0.0,
+            created,
+            now.isoformat(),
+        )
+
+def _history_rows(product_id: int, price: float, rng: random.Random, now: datetime,
+                  points: int, years: float) -> Iterator[Tuple]:
+    span_days = int(365 * years)
+    for day in sorted(rng.sample(range(span_days), min(points, span_days))):
+        recorded_at = (now - timedelta(days=span_days - day)).strftime("%Y-%m-%d %H:%M:%S")
+        yield (product_id, round(price * rng.uniform(0.7, 1.3), 2), recorded_at)
+
+def generate_catalogue(db_path: str, product_count: int, history_points: int = 8,
+                       history_years: float = 3.0, seed: int = 0) -> None:
+    """
+    Build a synthetic products database with multi-year price history
+    Args:
+        db_path: Path of the SQLite database to create (must not exist)
+        product_count: Number of products, split evenly across STORES
+        history_points: Price history rows per product
+        history_years: Time span the history rows are spread over
+        seed: Random seed, so the same arguments always build the same catalogue
+    """
+    Database(db_path)  # create the schema through the real migrations
+    rng = random.Random(seed)
+    now = datetime(2025, 6, 1)
+
+    conn = sqlite3.connect(db_path)
+    try:
+        # The catalogue is disposable, so trade durability for generation speed
+        conn.execute("PRAGMA journal_mode = OFF")
+        conn.execute("PRAGMA synchronous = OFF")
+
+        products = _product_rows(product_count, rng, now)
+        while True:
+            chunk = [row for _, row in zip(range(_CHUNK_SIZE), products)]
+            if not chunk:
+                break
+            conn.executemany("""
+                INSERT INTO products (id, name, price, link, image_url, store, price_change_percentage, created_at, updated_at)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+            """, chunk)
+            history = [
+                row
+                for product in chunk
+                for row in _history_rows(product[0], product[2], rng, now, history_points, history_years)
+            ]
+            conn.executemany("""
+                INSERT INTO price_history (product_id, price, recorded_at)
+                VALUES (?, ?, ?)
+            """, history)
+            conn.commit()
+    finally:
+        conn.close()
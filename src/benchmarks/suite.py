@@ -0,0 +1,300 @@
+import copy
+import platform
+import shutil
+import sqlite3
+import statistics
+import time
+from dataclasses import dataclass
+from datetime import datetime
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Union
+
+from .generators import SIZES, generate_catalogue, raw_products
+
+FIXTURES_DIR = Path(__file__).parent.parent / "tests" / "fixtures"
+CACHE_DIR = Path(__file__).parent / ".cache"
+
+# Products handled per benchmark call, independent of catalogue size
+UPSERT_BATCH = 1_000
+LEGACY_UPSERT_BATCH = 200
+FUZZY_UPSERT_BATCH = 100
+MATCH_BATCH = 1_000
+LATEST_PRICE_IDS = 1_000
+STATS_STORE_LIMIT = 2_000
+DELTA_CHANGES = 100
+LOAD_LIMIT = 100_000
+PARSER_CARDS = 500
+SEARCH_TERMS = ["rtx 4070", "ryzen", "samsung 990 pro 2tb", "vengeance 32gb", "arc a7"]
+
+@dataclass
+class BenchmarkContext:
+    """State shared by the benchmarks of one suite run"""
+    db_path: str
+    work_dir: Path
+    product_count: int
+    calls: int = 0
+
+    def database(self):
+        from storage.db import Database
+        return Database(self.db_path)
+
+@dataclass
+class Benchmark:
+    name: str
+    func: Callable[[BenchmarkContext], None]
+    # Items processed per call (or a function of the context), used to report a rate
+    items: Union[int, Callable[[BenchmarkContext], int]]
+
+    def item_count(self, ctx: BenchmarkContext) -> int:
+        return self.items(ctx) if callable(self.items) else self.items
+
+BENCHMARKS: List[Benchmark] = []
+
+def benchmark(name: str, items: Union[int, Callable[[BenchmarkContext], int]] = 1):
+    """Register a benchmark function taking a BenchmarkContext"""
+    def register(func: Callable[[BenchmarkContext], None]):
+        BENCHMARKS.append(Benchmark(name, func, items))
+        return func
+    return register
+
+# --------------------
+# Storage
+# --------------------
+
+@benchmark("upsert.new", items=UPSERT_BATCH)
+def bench_upsert_new(ctx: BenchmarkContext) -> None:
+    """Group-committed insert path used by the async writer"""
+    from storage.db_store import _to_product_objects
+    products = _to_product_objects(raw_products(UPSERT_BATCH, seed=ctx.calls, prefix=f"new{ctx.calls}-"), "microcenter")
+    db = ctx.database()
+    with db.connection.transaction() as conn:
+        db.products.upsert_products_in_transaction(products, conn)
+
+@benchmark("upsert.existing", items=UPSERT_BATCH)
+def bench_upsert_existing(ctx: BenchmarkContext) -> None:
+    """Group-committed update path: every product already exists"""
+    db = ctx.database()
+    products = db.products.get_products("microcenter", UPSERT_BATCH)
+    with db.connection.transaction() as conn:
+        db.products.upsert_products_in_transaction(products, conn)
+
+@benchmark("upsert.fuzzy", items=FUZZY_UPSERT_BATCH)
+def bench_upsert_fuzzy(ctx: BenchmarkContext) -> None:
+    """Insert path with fuzzy matching of unseen names against the catalogue"""
+    from config import FUZZY_MATCH_THRESHOLD
+    from storage.db_store import _to_product_objects
+    products = _to_product_objects(raw_products(FUZZY_UPSERT_BATCH, seed=ctx.calls, prefix=f"fz{ctx.calls}-"),
+                                   "microcenter")
+    db = ctx.database()
+    with db.connection.transaction() as conn:
+        db.products.upsert_products_in_transaction(products, conn, fuzzy_threshold=FUZZY_MATCH_THRESHOLD)
+
+@benchmark("match.new", items=MATCH_BATCH)
+def bench_match_new(ctx: BenchmarkContext) -> None:
+    """Cross-store matching of a batch of new listings (the warm-up signs the whole catalogue)"""
+    from processing.matching import ProductMatcher
+    from storage.db_store import _to_product_objects
+    db = ctx.database()
+    products = _to_product_objects(raw_products(MATCH_BATCH, seed=ctx.calls, prefix=f"mt{ctx.calls}-"), "newegg")
+    with db.connection.transaction() as conn:
+        db.products.upsert_products_in_transaction(products, conn)
+    ProductMatcher(db).match_new_products()
+
+@benchmark("upsert.legacy", items=LEGACY_UPSERT_BATCH)
+def bench_upsert_legacy(ctx: BenchmarkContext) -> None:
+    """ProductQueries.insert_products, which opens connections per lookup"""
+    db = ctx.database()
+    products = db.products.get_products("microcenter", LEGACY_UPSERT_BATCH)
+    db.products.insert_products(products)
+
+@benchmark("stats.default")
+def bench_stats_default(ctx: BenchmarkContext) -> None:
+    """get_products_with_stats as called before every CSV export"""
+    ctx.database().products.get_products_with_stats("microcenter")
+
+def _microcenter_products(limit: int) -> Callable[[BenchmarkContext], int]:
+    # Generated catalogues split products evenly between two stores
+    return lambda ctx: min(ctx.product_count // 2, limit)
+
+@benchmark("stats.store", items=_microcenter_products(STATS_STORE_LIMIT))
+def bench_stats_store(ctx: BenchmarkContext) -> None:
+    ctx.database().products.get_products_with_stats("microcenter", STATS_STORE_LIMIT)
+
+@benchmark("latest_prices", items=LATEST_PRICE_IDS)
+def bench_latest_prices(ctx: BenchmarkContext) -> None:
+    step = max(ctx.product_count // LATEST_PRICE_IDS, 1)
+    product_ids = list(range(1, ctx.product_count + 1, step))[:LATEST_PRICE_IDS]
+    ctx.database().products.get_latest_prices(product_ids)
+
+@benchmark("load.products", items=lambda ctx: min(ctx.product_count, LOAD_LIMIT))
+def bench_load_products(ctx: BenchmarkContext) -> None:
+    """Row-factory Product records"""
+    ctx.database().products.get_products(None, LOAD_LIMIT)
+
+@benchmark("load.batch", items=lambda ctx: min(ctx.product_count, LOAD_LIMIT))
+def bench_load_batch(ctx: BenchmarkContext) -> None:
+    """Column-oriented ProductBatch"""
+    ctx.database().products.get_products_batch(None, LOAD_LIMIT)
+
+@benchmark("csv_export", items=_microcenter_products(STATS_STORE_LIMIT))
+def bench_csv_export(ctx: BenchmarkContext) -> None:
+    from storage.csv_writer import write_to_csv
+    products_with_stats = ctx.database().products.get_products_with_stats("microcenter", STATS_STORE_LIMIT)
+    write_to_csv(products_with_stats, "benchmark.csv", str(ctx.work_dir))
+
+@benchmark("export.delta", items=DELTA_CHANGES)
+def bench_export_delta(ctx: BenchmarkContext) -> None:
+    """Delta export after a few price changes (the warm-up writes the full baseline)"""
+    from storage.delta_export import export_changes
+    db = ctx.database()
+    with db.connection.transaction() as conn:
+        conn.execute("""
+            UPDATE products SET price = price + 1
+            WHERE id IN (SELECT id FROM products WHERE store = 'microcenter' LIMIT ?)
+        """, (DELTA_CHANGES,))
+    export_changes(db, "microcenter", folder=ctx.work_dir / "deltas")
+
+@benchmark("search.fts", items=len(SEARCH_TERMS))
+def bench_search_fts(ctx: BenchmarkContext) -> None:
+    """Ranked full-text lookups, as run by the bot's /price command"""
+    products = ctx.database().products
+    for term in SEARCH_TERMS:
+        products.search_products(term, limit=5)
+
+@benchmark("search.lowest", items=len(SEARCH_TERMS))
+def bench_search_lowest(ctx: BenchmarkContext) -> None:
+    products = ctx.database().products
+    for term in SEARCH_TERMS:
+        products.get_lowest_priced(term, limit=5)
+
+@benchmark("search.fuzzy", items=len(SEARCH_TERMS))
+def bench_search_fuzzy(ctx: BenchmarkContext) -> None:
+    """Trigram candidate lookup plus rescoring, as used for cross-run matching"""
+    products = ctx.database().products
+    for term in SEARCH_TERMS:
+        products.find_similar_products(term, limit=5)
+
+# --------------------
+# Parsers
+# --------------------
+
+def _fixture_page(fixture: str, card_selector: Dict, cards: int) -> str:
+    """Stored search page with its product cards repeated up to `cards`"""
+    from bs4 import BeautifulSoup
+    soup = BeautifulSoup((FIXTURES_DIR / fixture).read_text(encoding="utf-8"), "html.parser")
+    originals = soup.find_all(**card_selector)
+    parent = originals[0].parent
+    for i in range(cards - len(originals)):
+        parent.append(copy.copy(originals[i % len(originals)]))
+    return str(soup)
+
+_parser_pages: Dict[str, str] = {}
+
+def _parse_page(name: str, fixture: str, card_selector: Dict, parser_path: str) -> None:
+    import importlib
+    from bs4 import BeautifulSoup
+    if name not in _parser_pages:
+        _parser_pages[name] = _fixture_page(fixture, card_selector, PARSER_CARDS)
+    module_name, func_name = parser_path.rsplit(".", 1)
+    parser = getattr(importlib.import_module(module_name), func_name)
+    # The fetchers build the soup, so it is part of the per-page parse cost
+    for _ in parser(BeautifulSoup(_parser_pages[name], "html.parser")):
+        pass
+
+@benchmark("parser.microcenter", items=PARSER_CARDS)
+def bench_parser_microcenter(ctx: BenchmarkContext) -> None:
+    _parse_page("microcenter", "microcenter_search.html",
+                {"name": "li", "class_": "product_wrapper"}, "parsers.microcenter.iter_microcenter_html")
+
+@benchmark("parser.bh", items=PARSER_CARDS)
+def bench_parser_bh(ctx: BenchmarkContext) -> None:
+    _parse_page("bh", "bh_search.html",
+                {"name": "div", "attrs": {"data-selenium": "miniProductPage"}}, "parsers.bh.iter_bh_html")
+
+# --------------------
+# Runner
+# --------------------
+
+def prepare_catalogue(size: str, work_dir: Path, seed: int = 0) -> str:
+    """Copy a cached synthetic catalogue for `size` into work_dir, generating it on first use"""
+    CACHE_DIR.mkdir(parents=True, exist_ok=True)
+    cached = CACHE_DIR / f"catalogue-{size}-{seed}.db"
+    if not cached.exists():
+        print(f"Generating {size} catalogue (cached in {cached})...")
+        partial = cached.with_suffix(".partial")
+        partial.unlink(missing_ok=True)
+        generate_catalogue(str(partial), SIZES[size], seed=seed)
+        partial.rename(cached)
+    db_path = work_dir / "products.db"
+    shutil.copyfile(cached, db_path)
+    return str(db_path)
+
+def run_suite(size: str, work_dir: Path, repeat: int = 5, name_filter: Optional[str] = None,
+              seed: int = 0) -> Dict:
+    """
+    Run every registered benchmark against a fresh copy of the catalogue
+    Returns:
+        JSON-serialisable results with per-benchmark timings in seconds
+    """
+    ctx = BenchmarkContext(prepare_catalogue(size, work_dir, seed), work_dir, SIZES[size])
+    results = {}
+
+    for bench in BENCHMARKS:
+        if name_filter and name_filter not in bench.name:
+            continue
+        bench.func(ctx)  # warm-up: imports, page cache, fixture pages
+        ctx.calls += 1
+        timings = []
+        for _ in range(repeat):
+            started = time.perf_counter()
+            bench.func(ctx)
+            timings.append(time.perf_counter() - started)
+            ctx.calls += 1
+        median = statistics.median(timings)
+        items = bench.item_count(ctx)
+        results[bench.name] = {
+            "min": min(timings),
+            "median": median,
+            "mean": statistics.mean(timings),
+            "repeat": repeat,
+            "items": items,
+            "items_per_second": items / median if median else None,
+        }
+        print(f"{bench.name:<20} median={median * 1000:9.2f}ms  min={min(timings) * 1000:9.2f}ms  "
+              f"{results[bench.name]['items_per_second'] or 0:12.0f} items/s")
+
+    return {
+        "meta": {
+            "size": size,
+            "product_count": SIZES[size],
+            "seed": seed,
+            "repeat": repeat,
+            "timestamp": datetime.now().isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "sqlite": sqlite3.sqlite_version,
+            "machine": platform.machine(),
+        },
+        "benchmarks": results,
+    }
+
+def compare(results: Dict, baseline: Dict, threshold: float = 0.25) -> List[str]:
+    """
+    Compare medians against a baseline run
+    Returns:
+        Descriptions of benchmarks slower than the baseline by more than `threshold`
+    """
+    regressions = []
+    if results["meta"]["size"] != baseline["meta"]["size"]:
+        print(f"Warning: comparing size {results['meta']['size']} against baseline size {baseline['meta']['size']}")
+
+    for name, current in results["benchmarks"].items():
+        previous = baseline["benchmarks"].get(name)
+        if previous is None:
+            continue
+        ratio = current["median"] / previous["median"] if previous["median"] else 1.0
+        marker = ""
+        if ratio > 1 + threshold:
+            marker = "  <-- REGRESSION"
+            regressions.append(f"{name}: {previous['median'] * 1000:.2f}ms -> {current['median'] * 1000:.2f}ms ({ratio:.2f}x)")
+        print(f"{name:<20} {ratio:6.2f}x baseline{marker}")
+    return regressions
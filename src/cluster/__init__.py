@@ -0,0 +1,4 @@
+# Cluster runs: a coordinator leases (store, search) jobs to fetch/parse
+# workers on any number of machines and stores the pages they push back.
+# Start with: python src/main.py run --cluster [--local-workers N], then
+# python src/main.py worker --coordinator http://HOST:PORT on each node
@@ -0,0 +1,285 @@
+import asyncio
+import hashlib
+import hmac
+import ipaddress
+import json
+import multiprocessing
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List, Optional, Tuple
+from config import (
+    CLUSTER_HOST, CLUSTER_LEASE_SECONDS, CLUSTER_MAX_ATTEMPTS, CLUSTER_PORT, CLUSTER_TOKEN, EXPORT_MODE
+)
+from metrics import metrics
+from storage.db import Database, JobLedger
+from storage.db.ledger import DONE as PAGE_DONE, EXHAUSTED as PAGE_EXHAUSTED
+from storage.db_store import AsyncProductStore, get_async_store
+from .leases import DONE, ClusterJob, JobQueue, LeaseLost
+from .worker import TOKEN_HEADER
+
+def _is_loopback(host: str) -> bool:
+    if host == "localhost":
+        return True
+    try:
+        return ipaddress.ip_address(host).is_loopback
+    except ValueError:
+        return False
+
+ROUTES = ("/lease", "/heartbeat", "/ingest", "/exhaust", "/complete", "/fail")
+
+class Coordinator:
+    """
+    Hands out (store, search) jobs to cluster workers and stores what they send back.
+
+    JSON-over-HTTP API, all POST with a JSON body naming the worker:
+        /lease      {worker}                        -> {job: {lease, store, search_param, done_pages,
+                                                              exhausted_page} | null, finished}
+        /heartbeat  {worker, leases}                -> {lost: [lease ids no longer held]}
+        /ingest     {worker, lease, page, products} -> {stored}
+        /exhaust    {worker, lease, page}           -> {}  (page is past the last results page)
+        /complete   {worker, lease, product_count}  -> {}
+        /fail       {worker, lease, error}          -> {}
+    and GET /status for job counts per state. Calls for a lease the worker no
+    longer holds get 409, and calls without the shared token (when one is set)
+    get 401. Ingested pages go through the shared AsyncProductStore, so pages
+    pushed by several workers are group-committed, and each page is recorded in
+    the run's job ledger: a page stored once is skipped when a requeued job
+    sends it again, and is not fetched again by the next worker. Failed jobs
+    are recorded there too, so the run stays incomplete and --resume retries them.
+    """
+
+    def __init__(self, jobs: List[Tuple[str, Optional[str]]], ledger: JobLedger,
+                 store: Optional[AsyncProductStore] = None, host: str = CLUSTER_HOST, port: int = CLUSTER_PORT,
+                 lease_seconds: float = CLUSTER_LEASE_SECONDS, max_attempts: int = CLUSTER_MAX_ATTEMPTS,
+                 token: Optional[str] = CLUSTER_TOKEN):
+        """
+        Args:
+            jobs: (store, search_param) pairs to run
+            ledger: Job ledger of this run, recording every stored page
+            store: Storage for ingested products (default: the process-wide async store)
+            host: Interface to listen on
+            port: Port to listen on (0 picks a free one)
+            lease_seconds: How long a job stays with a worker that stopped sending heartbeats
+            max_attempts: Leases per job before it is failed
+            token: Shared secret workers send in the X-Cluster-Token header; only
+                optional on a loopback host, where no other machine can connect
+        Raises:
+            ValueError: host is not a loopback address and no token is set
+        """
+        if not token and not _is_loopback(host):
+            raise ValueError(f"Set CLUSTER_TOKEN before listening on {host!r}: without it any machine "
+                             f"that can reach the coordinator could lease jobs and store products")
+        self.queue = JobQueue(jobs, lease_seconds, max_attempts, on_failed=self._record_failure)
+        self.ledger = ledger
+        self.token = token
+        self.store = store or get_async_store()
+        self._server = ThreadingHTTPServer((host, port), self._handler_class())
+        self._server.daemon_threads = True
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    async def run(self, workers: Optional[List[multiprocessing.Process]] = None,
+                  check_interval: Optional[float] = None) -> List[ClusterJob]:
+        """
+        Serve workers until every job is done or failed
+        Args:
+            workers: Local worker processes; when all have exited, unfinished jobs fail
+            check_interval: Seconds between lease expiry checks (default: a quarter lease)
+        Returns:
+            Every job with its final state
+        """
+        self._loop = asyncio.get_running_loop()
+        self._thread = threading.Thread(target=self._server.serve_forever, name="cluster-coordinator", daemon=True)
+        self._thread.start()
+        interval = check_interval or self.queue.lease_seconds / 4
+        try:
+            while not self.queue.finished:
+                await asyncio.sleep(interval)
+                # Failing jobs writes to the ledger, so keep it off the event loop the ingests need
+                await asyncio.to_thread(self.queue.expire)
+                if workers and not any(process.is_alive() for process in workers):
+                    await asyncio.to_thread(self.queue.fail_pending, "every local worker exited")
+        finally:
+            self._server.shutdown()
+            self._server.server_close()
+            self._thread.join()
+        return self.queue.jobs
+
+    # Requests, served on the HTTP server's threads
+
+    def lease(self, worker: str) -> Dict:
+        job = self.queue.lease(worker)
+        if job is None:
+            return {"job": None, "finished": self.queue.finished}
+        pages = self._ledger_pages(job)
+        done_pages = [page for page, state in pages.items() if state == PAGE_DONE]
+        exhausted_page = min((page for page, state in pages.items() if state == PAGE_EXHAUSTED), default=None)
+        print(f"[coordinator] {job.store}/{job.search_param} leased to {worker} (attempt {job.attempts})")
+        return {"job": {"lease": job.lease_id, "store": job.store, "search_param": job.search_param,
+                        "done_pages": done_pages, "exhausted_page": exhausted_page}, "finished": False}
+
+    def heartbeat(self, worker: str, leases: List[str]) -> Dict:
+        return {"lost": self.queue.heartbeat(worker, leases)}
+
+    def ingest(self, lease_id: str, page: int, products: List[Dict]) -> Dict:
+        job = self.queue.renew(lease_id)
+        ledger_job = self.ledger.start_job(job.store, job.search_param, page)
+        if ledger_job.finished:
+            return {"stored": 0}
+        with metrics.timer("ingest", store=job.store):
+            # Stored under the ledger job, so a page sent twice is only recorded once
+            future = asyncio.run_coroutine_threadsafe(
+                self.store.store_products(products, job.store, ledger_job.id), self._loop
+            )
+            product_ids = future.result()
+        digest = hashlib.sha1()
+        for product in products:
+            digest.update(f"{product.get('name')}\x1f{product.get('price')}\n".encode())
+        self.ledger.complete_job(ledger_job.id, len(products), digest.hexdigest())
+        metrics.counter("cluster_products", store=job.store).inc(len(product_ids))
+        return {"stored": len(product_ids)}
+
+    def exhaust(self, lease_id: str, page: int) -> Dict:
+        job = self.queue.renew(lease_id)
+        ledger_job = self.ledger.start_job(job.store, job.search_param, page)
+        if not ledger_job.finished:
+            self.ledger.exhaust_job(ledger_job.id)
+        return {}
+
+    def complete(self, lease_id: str, product_count: int) -> Dict:
+        job = self.queue.complete(lease_id, product_count)
+        print(f"[coordinator] {job.store}/{job.search_param}: {product_count} products from {job.worker}")
+        return {}
+
+    def fail(self, lease_id: str, error: str) -> Dict:
+        job = self.queue.fail(lease_id, error)
+        print(f"[coordinator] {job.store}/{job.search_param} failed on {job.worker}: {error}")
+        return {}
+
+    def _ledger_pages(self, job: ClusterJob) -> Dict[int, str]:
+        """Ledger state of each page of a job recorded so far"""
+        return {ledger_job.page: ledger_job.state for ledger_job in self.ledger.jobs()
+                if ledger_job.store == job.store and ledger_job.search_param == (job.search_param or None)}
+
+    def _record_failure(self, job: ClusterJob) -> None:
+        """Record a failed job in the ledger, for --resume to retry"""
+        self.ledger.fail_search(job.store, job.search_param, job.error or "failed")
+
+    def _dispatch(self, path: str, body: Dict) -> Dict:
+        worker = str(body.get("worker", "unknown"))
+        if path == "/lease":
+            return self.lease(worker)
+        if path == "/heartbeat":
+            return self.heartbeat(worker, list(body.get("leases", [])))
+        if path == "/ingest":
+            return self.ingest(body["lease"], int(body["page"]), list(body["products"]))
+        if path == "/exhaust":
+            return self.exhaust(body["lease"], int(body["page"]))
+        if path == "/complete":
+            return self.complete(body["lease"], int(body.get("product_count", 0)))
+        return self.fail(body["lease"], str(body.get("error", "")))
+
+    def _handler_class(self):
+        coordinator = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self) -> None:
+                if not self._authorized():
+                    return
+                if self.path == "/status":
+                    self._reply(200, {"jobs": coordinator.queue.summary(), "workers": len(coordinator.queue.workers)})
+                else:
+                    self._reply(404, {"error": "not found"})
+
+            def do_POST(self) -> None:
+                if self.path not in ROUTES:
+                    self._reply(404, {"error": "not found"})
+                    return
+                if not self._authorized():
+                    return
+                try:
+                    length = int(self.headers.get("Content-Length", 0))
+                    body = json.loads(self.rfile.read(length) or b"{}")
+                    self._reply(200, coordinator._dispatch(self.path, body))
+                except LeaseLost as e:
+                    self._reply(409, {"error": f"lease {e} is no longer held"})
+                except KeyError as e:
+                    self._reply(400, {"error": f"missing {e}"})
+                except (ValueError, TypeError) as e:
+                    self._reply(400, {"error": str(e)})
+                except Exception as e:
+                    # Storage errors: the worker fails the job and it is leased again
+                    self._reply(500, {"error": f"{type(e).__name__}: {e}"})
+
+            def _authorized(self) -> bool:
+                if not coordinator.token:
+                    return True
+                token = self.headers.get(TOKEN_HEADER, "")
+                if hmac.compare_digest(token.encode("utf-8"), coordinator.token.encode("utf-8")):
+                    return True
+                self._reply(401, {"error": f"missing or wrong {TOKEN_HEADER} header"})
+                return False
+
+            def _reply(self, status: int, payload: Dict) -> None:
+                data = json.dumps(payload).encode("utf-8")
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def log_message(self, format, *args) -> None:
+                pass
+
+        return Handler
+
+def _local_worker_main(url: str, worker_id: str) -> None:
+    """Entry point of a worker process started by the coordinator"""
+    from .worker import ClusterWorker
+    asyncio.run(ClusterWorker(url, worker_id).run())
+
+async def run(ledger: JobLedger, local_workers: int = 0, host: str = CLUSTER_HOST,
+              port: int = CLUSTER_PORT) -> List[Tuple[str, Optional[str], str]]:
+    """
+    Run the automated default jobs on cluster workers and export what they stored
+    Args:
+        ledger: Job ledger of this run
+        local_workers: Worker processes to start on this machine (0: only remote workers)
+        host: Interface for the coordinator API
+        port: Port for the coordinator API
+    Returns:
+        List of (file_name, search_param, store) for every written export
+    """
+    from modes.parallel import default_jobs
+    from storage.delta_export import export_completed
+
+    coordinator = Coordinator(default_jobs(), ledger, host=host, port=port)
+    print(f"Coordinator listening on {coordinator.url} for {len(coordinator.queue.jobs)} job(s); "
+          f"start workers with `main.py worker --coordinator {coordinator.url}`")
+    ctx = multiprocessing.get_context("spawn")
+    processes = [ctx.Process(target=_local_worker_main, name=f"cluster-worker-{index}",
+                             args=(coordinator.url, f"local-{index}"))
+                 for index in range(local_workers)]
+    for process in processes:
+        process.start()
+    try:
+        jobs = await coordinator.run(processes or None)
+    finally:
+        for process in processes:
+            process.join(timeout=5)
+            if process.is_alive():
+                process.terminate()
+    await coordinator.store.aclose()
+
+    failed = [job for job in jobs if job.state != DONE]
+    for job in failed:
+        print(f"{job.store.title()} / {job.search_param} failed: {job.error}")
+    print(f"{len(jobs) - len(failed)} job(s) done, {len(failed)} failed")
+
+    completed = [(job.store, job.search_param) for job in jobs if job.state == DONE]
+    return await asyncio.to_thread(export_completed, Database(ledger.connection.db_path), completed, EXPORT_MODE)
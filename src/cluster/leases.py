@@ -0,0 +1,179 @@
+import itertools
+import threading
+import time
+from collections import deque
+from dataclasses import dataclass
+from typing import Callable, Dict, List, Optional, Tuple
+from config import CLUSTER_LEASE_SECONDS, CLUSTER_MAX_ATTEMPTS
+from metrics import metrics
+
+# Job states
+PENDING = "pending"
+LEASED = "leased"
+DONE = "done"
+FAILED = "failed"
+
+class LeaseLost(Exception):
+    """The lease expired or was given up, and its job may be running elsewhere"""
+
+@dataclass
+class ClusterJob:
+    """One (store, search term) job and its current lease"""
+    store: str
+    search_param: Optional[str]
+    state: str = PENDING
+    attempts: int = 0
+    lease_id: Optional[str] = None
+    worker: Optional[str] = None
+    expires_at: float = 0.0
+    product_count: int = 0
+    error: Optional[str] = None
+
+class JobQueue:
+    """
+    Thread-safe queue of cluster jobs handed out under time-limited leases.
+
+    A worker leases a job and keeps it by renewing the lease (heartbeats, or
+    any other call for it) before lease_seconds run out. expire() puts jobs
+    whose lease lapsed back in the queue, so a dead worker's jobs go to the
+    next worker that asks; after max_attempts leases a job fails instead.
+    A job a worker reports failed is not leased again: the worker's
+    FetchController already retried its requests.
+    """
+
+    def __init__(self, jobs: List[Tuple[str, Optional[str]]], lease_seconds: float = CLUSTER_LEASE_SECONDS,
+                 max_attempts: int = CLUSTER_MAX_ATTEMPTS, clock: Callable[[], float] = time.monotonic,
+                 on_failed: Optional[Callable[[ClusterJob], None]] = None):
+        """
+        Args:
+            jobs: (store, search_param) pairs
+            lease_seconds: How long a lease lasts without being renewed
+            max_attempts: Leases per job before it is failed
+            clock: Monotonic time source
+            on_failed: Called (outside the queue's lock) with every job that fails
+        """
+        self.lease_seconds = lease_seconds
+        self.max_attempts = max_attempts
+        self.clock = clock
+        self.on_failed = on_failed
+        self.jobs = [ClusterJob(store, search_param) for store, search_param in dict.fromkeys(jobs)]
+        self.workers: Dict[str, float] = {}  # worker -> last contact
+        self._pending = deque(self.jobs)
+        self._leases: Dict[str, ClusterJob] = {}
+        self._ids = itertools.count(1)
+        self._lock = threading.Lock()
+
+    @property
+    def finished(self) -> bool:
+        with self._lock:
+            return all(job.state in (DONE, FAILED) for job in self.jobs)
+
+    def lease(self, worker: str) -> Optional[ClusterJob]:
+        """Lease the next pending job to a worker, or None when none is pending"""
+        with self._lock:
+            now = self.clock()
+            self.workers[worker] = now
+            expired = self._expire(now)
+            job = self._pending.popleft() if self._pending else None
+            if job is not None:
+                job.state = LEASED
+                job.attempts += 1
+                job.lease_id = f"{next(self._ids)}-{worker}"
+                job.worker = worker
+                job.expires_at = now + self.lease_seconds
+                self._leases[job.lease_id] = job
+        self._notify_failed(expired)
+        if job is not None:
+            metrics.counter("cluster_leases", store=job.store).inc()
+        return job
+
+    def renew(self, lease_id: str) -> ClusterJob:
+        """Extend a lease and return its job; raises LeaseLost if it is no longer held"""
+        with self._lock:
+            now = self.clock()
+            job = self._leases.get(lease_id)
+            if job is None or job.expires_at < now:
+                raise LeaseLost(lease_id)
+            job.expires_at = now + self.lease_seconds
+            self.workers[job.worker] = now
+            return job
+
+    def heartbeat(self, worker: str, lease_ids: List[str]) -> List[str]:
+        """Renew a worker's leases and return the ones it has lost"""
+        with self._lock:
+            self.workers[worker] = self.clock()
+        lost = []
+        for lease_id in lease_ids:
+            try:
+                self.renew(lease_id)
+            except LeaseLost:
+                lost.append(lease_id)
+        return lost
+
+    def complete(self, lease_id: str, product_count: int) -> ClusterJob:
+        job = self._release(lease_id)
+        job.state = DONE
+        job.product_count = product_count
+        return job
+
+    def fail(self, lease_id: str, error: str) -> ClusterJob:
+        """Fail a job its worker could not fetch"""
+        job = self._release(lease_id)
+        job.state, job.error = FAILED, error
+        self._notify_failed([job])
+        return job
+
+    def expire(self) -> int:
+        """Requeue (or fail) jobs whose lease ran out and return how many there were"""
+        with self._lock:
+            expired = self._expire(self.clock())
+        self._notify_failed(expired)
+        return len(expired)
+
+    def fail_pending(self, error: str) -> None:
+        """Fail every job not finished yet, e.g. when no worker is left to run them"""
+        with self._lock:
+            failed = [job for job in self.jobs if job.state in (PENDING, LEASED)]
+            for job in failed:
+                job.state, job.error, job.lease_id = FAILED, error, None
+            self._pending.clear()
+            self._leases.clear()
+        self._notify_failed(failed)
+
+    def _release(self, lease_id: str) -> ClusterJob:
+        with self._lock:
+            job = self._leases.get(lease_id)
+            if job is None or job.expires_at < self.clock():
+                raise LeaseLost(lease_id)
+            del self._leases[lease_id]
+            job.lease_id = None
+            return job
+
+    def _expire(self, now: float) -> List[ClusterJob]:
+        """Requeue jobs whose lease ran out, or fail them once out of attempts, and return them"""
+        expired = [job for job in self._leases.values() if job.expires_at < now]
+        for job in expired:
+            del self._leases[job.lease_id]
+            job.lease_id = None
+            job.error = f"lease expired on {job.worker}"
+            if job.attempts >= self.max_attempts:
+                job.state = FAILED
+            else:
+                job.state = PENDING
+                self._pending.append(job)
+                metrics.counter("cluster_requeued", store=job.store).inc()
+        return expired
+
+    def _notify_failed(self, jobs: List[ClusterJob]) -> None:
+        if self.on_failed is not None:
+            for job in jobs:
+                if job.state == FAILED:
+                    self.on_failed(job)
+
+    def summary(self) -> Dict[str, int]:
+        """Job count per state"""
+        with self._lock:
+            counts = {PENDING: 0, LEASED: 0, DONE: 0, FAILED: 0}
+            for job in self.jobs:
+                counts[job.state] += 1
+            return counts
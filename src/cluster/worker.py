@@ -0,0 +1,189 @@
+import asyncio
+import json
+import os
+import socket
+from dataclasses import dataclass
+from typing import AsyncIterator, Callable, Dict, List, Optional, Tuple
+from urllib.error import HTTPError, URLError
+from urllib.request import Request, urlopen
+from config import (
+    CLUSTER_COORDINATOR_URL, CLUSTER_HEARTBEAT_INTERVAL, CLUSTER_POLL_INTERVAL, CLUSTER_TOKEN, CLUSTER_WORKER_JOBS
+)
+from .leases import LeaseLost
+
+# Fetches one job's pages: (store, search_param, controllers, skip_pages, exhausted_page=)
+# -> (page, products), and (page, None) for the page past the last results page
+PageSource = Callable[..., AsyncIterator[Tuple[int, Optional[List[Dict]]]]]
+
+TOKEN_HEADER = "X-Cluster-Token"
+
+# Seconds to wait for the coordinator; an ingest waits for the products' commit
+API_TIMEOUT = 120
+
+class CoordinatorUnavailable(Exception):
+    """The coordinator could not be reached (finished and shut down, or never started)"""
+
+@dataclass
+class WorkerReport:
+    jobs: int = 0
+    failed: int = 0
+    lost: int = 0
+    pages: int = 0
+    products: int = 0
+
+    def __str__(self) -> str:
+        return (f"{self.jobs} job(s) done, {self.failed} failed, {self.lost} lost, "
+                f"{self.pages} pages / {self.products} products sent")
+
+def _fetch_job_pages(*args, **kwargs) -> AsyncIterator[Tuple[int, Optional[List[Dict]]]]:
+    # Imported on use, so the worker module loads without Playwright
+    from modes.parallel import fetch_job_pages
+    return fetch_job_pages(*args, **kwargs)
+
+class ClusterWorker:
+    """
+    Fetch/parse node of a cluster run: leases (store, search) jobs from the
+    coordinator, pushes every parsed page back to it and reports the job done.
+    While it works, a heartbeat renews its leases; a job whose lease was lost
+    (the coordinator gave it to another worker) is abandoned. The worker stops
+    once the coordinator reports every job finished, or when it goes away.
+    """
+
+    def __init__(self, coordinator_url: str = CLUSTER_COORDINATOR_URL, worker_id: Optional[str] = None,
+                 jobs: int = CLUSTER_WORKER_JOBS, heartbeat_interval: float = CLUSTER_HEARTBEAT_INTERVAL,
+                 poll_interval: float = CLUSTER_POLL_INTERVAL, page_source: PageSource = _fetch_job_pages,
+                 token: Optional[str] = CLUSTER_TOKEN):
+        """
+        Args:
+            coordinator_url: Base URL of the coordinator API
+            worker_id: Name reported to the coordinator (default: host-pid)
+            jobs: Jobs run at once
+            heartbeat_interval: Seconds between lease renewals
+            poll_interval: Seconds to wait when no job is pending but the run is not finished
+            page_source: Fetches a job's pages (see modes.parallel.fetch_job_pages)
+            token: Shared secret the coordinator expects (CLUSTER_TOKEN)
+        """
+        self.url = coordinator_url.rstrip("/")
+        self.worker_id = worker_id or f"{socket.gethostname()}-{os.getpid()}"
+        self.jobs = max(jobs, 1)
+        self.heartbeat_interval = heartbeat_interval
+        self.poll_interval = poll_interval
+        self.page_source = page_source
+        self.token = token
+        self.report = WorkerReport()
+        self._running: Dict[str, asyncio.Task] = {}
+        self._controllers: Dict = {}
+
+    async def run(self) -> WorkerReport:
+        """Work until the coordinator has no jobs left, then return what this worker did"""
+        heartbeat = asyncio.create_task(self._heartbeat_forever())
+        try:
+            await asyncio.gather(*(self._slot() for _ in range(self.jobs)))
+        finally:
+            heartbeat.cancel()
+            try:
+                await heartbeat
+            except asyncio.CancelledError:
+                pass
+        print(f"[{self.worker_id}] {self.report}")
+        return self.report
+
+    async def _slot(self) -> None:
+        while True:
+            try:
+                reply = await self._call("/lease", {})
+            except CoordinatorUnavailable as e:
+                print(f"[{self.worker_id}] {e}, stopping")
+                return
+            job = reply.get("job")
+            if job is None:
+                if reply.get("finished"):
+                    return
+                await asyncio.sleep(self.poll_interval)
+                continue
+            task = asyncio.create_task(self._run_job(job))
+            self._running[job["lease"]] = task
+            try:
+                await task
+            except asyncio.CancelledError:
+                if not task.cancelled():
+                    raise
+                # The heartbeat found the lease lost
+                self.report.lost += 1
+            except CoordinatorUnavailable as e:
+                print(f"[{self.worker_id}] {e}, stopping")
+                return
+            finally:
+                self._running.pop(job["lease"], None)
+
+    async def _run_job(self, job: Dict) -> None:
+        lease = job["lease"]
+        store, search_param = job["store"], job["search_param"]
+        product_count = 0
+        try:
+            pages = self.page_source(store, search_param, self._controllers, job.get("done_pages", ()),
+                                     exhausted_page=job.get("exhausted_page"))
+            async for page, products in pages:
+                if products is None:
+                    await self._call("/exhaust", {"lease": lease, "page": page})
+                    continue
+                await self._call("/ingest", {"lease": lease, "page": page, "products": products})
+                self.report.pages += 1
+                product_count += len(products)
+        except LeaseLost:
+            self.report.lost += 1
+            return
+        except CoordinatorUnavailable:
+            raise
+        except Exception as e:
+            self.report.failed += 1
+            print(f"[{self.worker_id}] {store}/{search_param} failed: {e}")
+            try:
+                await self._call("/fail", {"lease": lease, "error": f"{type(e).__name__}: {e}"})
+            except LeaseLost:
+                pass
+            return
+        try:
+            await self._call("/complete", {"lease": lease, "product_count": product_count})
+        except LeaseLost:
+            self.report.lost += 1
+            return
+        self.report.jobs += 1
+        self.report.products += product_count
+
+    async def _heartbeat_forever(self) -> None:
+        while True:
+            await asyncio.sleep(self.heartbeat_interval)
+            if not self._running:
+                continue
+            try:
+                reply = await self._call("/heartbeat", {"leases": list(self._running)})
+            except CoordinatorUnavailable as e:
+                print(f"[{self.worker_id}] heartbeat failed: {e}")
+                continue
+            for lease in reply.get("lost", []):
+                task = self._running.get(lease)
+                if task is not None:
+                    print(f"[{self.worker_id}] lease {lease} lost, abandoning its job")
+                    task.cancel()
+
+    async def _call(self, path: str, payload: Dict) -> Dict:
+        return await asyncio.to_thread(self._post, path, {"worker": self.worker_id, **payload})
+
+    def _post(self, path: str, payload: Dict) -> Dict:
+        headers = {"Content-Type": "application/json"}
+        if self.token:
+            headers[TOKEN_HEADER] = self.token
+        request = Request(f"{self.url}{path}", data=json.dumps(payload).encode("utf-8"),
+                          headers=headers, method="POST")
+        try:
+            with urlopen(request, timeout=API_TIMEOUT) as response:
+                return json.loads(response.read() or b"{}")
+        except HTTPError as e:
+            if e.code == 409:
+                raise LeaseLost(payload.get("lease")) from e
+            if e.code == 401:
+                raise CoordinatorUnavailable(f"coordinator {self.url} rejected this worker's CLUSTER_TOKEN") from e
+            raise RuntimeError(f"coordinator answered {e.code} to {path}: {e.read().decode(errors='replace')}") from e
+        except (URLError, OSError) as e:
+            raise CoordinatorUnavailable(f"coordinator {self.url} unavailable ({e})") from e
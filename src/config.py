@@ -12,13 +12,17 @@ load_dotenv()
 # --------------------
 DEBUG = os.getenv("DEBUG", "false").lower() == "true"
 ENVIRONMENT = os.getenv("ENV", "development")
+# Set by build.sh for the scheduled (cron) run
+AUTOMATED_MODE = os.getenv("AUTOMATED_MODE", "false").lower() == "true"
 
 # --------------------
 # Target Site URLs
 # --------------------
+# Each can be pointed elsewhere, e.g. at the local mock store server
+# (python -m loadtest --serve) with SCRAPE_TARGET_MICROCENTER=http://127.0.0.1:8400
 SCRAPE_TARGETS = {
-    "microcenter": "https://www.microcenter.com",
-    "bh": "https://www.bhphotovideo.com/c/search"
+    "microcenter": os.getenv("SCRAPE_TARGET_MICROCENTER", "https://www.microcenter.com"),
+    "bh": os.getenv("SCRAPE_TARGET_BH", "https://www.bhphotovideo.com/c/search")
 }
 
 # --------------------
@@ -29,10 +33,22 @@ DEFAULT_HEADERS = {
     "Accept-Language": "en-US,en;q=0.9"
 }
 
-REQUEST_TIMEOUT = 10  # seconds
+BROWSER_HEADLESS = os.getenv("BROWSER_HEADLESS", "false").lower() == "true"
+# Cookies and site state (consent, store location) kept between browser
+# sessions, one file per store; files older than BROWSER_STATE_MAX_AGE_HOURS are ignored
+BROWSER_STATE_DIR = os.getenv("BROWSER_STATE_DIR", "src/data/browser_state")
+BROWSER_STATE_MAX_AGE_HOURS = float(os.getenv("BROWSER_STATE_MAX_AGE_HOURS", "24"))
+
+REQUEST_TIMEOUT = 10  # seconds (per page navigation / selector wait)
 MAX_RETRIES = 3
 RETRY_BACKOFF = 2  # seconds (between retries)
 
+# Adaptive fetch control (see fetchers.controller.FetchController)
+MAX_RETRY_BACKOFF = float(os.getenv("MAX_RETRY_BACKOFF", "60"))  # seconds
+SLOW_RESPONSE_SECONDS = float(os.getenv("SLOW_RESPONSE_SECONDS", "20"))  # slower fetches shrink concurrency
+CIRCUIT_FAILURE_THRESHOLD = int(os.getenv("CIRCUIT_FAILURE_THRESHOLD", "5"))  # consecutive failures
+CIRCUIT_COOLDOWN = float(os.getenv("CIRCUIT_COOLDOWN", "120"))  # seconds before probing a failing store
+
 # --------------------
 # Storage Config
 # --------------------
@@ -40,11 +56,74 @@ CSV_OUTPUT_DIR = "output"
 SQLITE_DB_PATH = "storage/data.db"
 GOOGLE_SHEET_ID = os.getenv("GOOGLE_SHEET_ID")
 
+# Background DB writer: product sets queued within DB_WRITE_LINGER seconds of
+# each other are committed together, up to DB_WRITE_BATCH_SIZE products
+DB_WRITE_BATCH_SIZE = int(os.getenv("DB_WRITE_BATCH_SIZE", "5000"))
+DB_WRITE_LINGER = float(os.getenv("DB_WRITE_LINGER", "0.05"))  # seconds
+
+# In-process cache for read queries (storage.cache.QueryCache); a TTL of 0 disables it
+QUERY_CACHE_SIZE = int(os.getenv("QUERY_CACHE_SIZE", "1024"))  # entries
+QUERY_CACHE_TTL = float(os.getenv("QUERY_CACHE_TTL", "300"))  # seconds
+
+# Job ledger: resume the latest unfinished run instead of starting over,
+# provided it started less than RESUME_WINDOW_HOURS ago
+RESUME_RUNS = os.getenv("RESUME_RUNS", "false").lower() == "true"
+RESUME_WINDOW_HOURS = float(os.getenv("RESUME_WINDOW_HOURS", "12"))
+
+# Cross-run product matching: a scraped listing whose name is not stored yet
+# always matches a stored name differing only in case, spacing or punctuation
+# (the product keeps its stored name). With fuzzy matching it also matches a
+# near-identical name from the same store (same model numbers, similarity at
+# least FUZZY_MATCH_THRESHOLD) and the product takes the new name; that costs a
+# trigram lookup per new listing, so it is opt-in
+FUZZY_MATCH_ENABLED = os.getenv("FUZZY_MATCH_ENABLED", "false").lower() == "true"
+FUZZY_MATCH_THRESHOLD = float(os.getenv("FUZZY_MATCH_THRESHOLD", "0.9"))
+
+# Cross-store matching: listings from different stores with the same model
+# numbers, no conflicting brand or capacity, and a title word overlap of at
+# least MATCH_MIN_SCORE are grouped as one product for price comparison
+MATCH_MIN_SCORE = float(os.getenv("MATCH_MIN_SCORE", "0.4"))
+
+# --------------------
+# Processing Pipeline
+# --------------------
+PIPELINE_BATCH_SIZE = int(os.getenv("PIPELINE_BATCH_SIZE", "100"))  # products per DB write
+PIPELINE_PAGE_QUEUE_SIZE = int(os.getenv("PIPELINE_PAGE_QUEUE_SIZE", "2"))  # fetched pages
+PIPELINE_PRODUCT_QUEUE_SIZE = int(os.getenv("PIPELINE_PRODUCT_QUEUE_SIZE", "500"))  # parsed products
+
+# Memory budget: RSS ceiling in MB for the scraper and its browsers (0 = no
+# ceiling, memory is still sampled and reported). Fetch concurrency and DB
+# batches back off from MEMORY_SOFT_LIMIT of the ceiling
+MEMORY_BUDGET_MB = float(os.getenv("MEMORY_BUDGET_MB", "0"))
+MEMORY_SOFT_LIMIT = float(os.getenv("MEMORY_SOFT_LIMIT", "0.8"))  # fraction of the budget
+MEMORY_SAMPLE_INTERVAL = float(os.getenv("MEMORY_SAMPLE_INTERVAL", "1.0"))  # seconds
+MEMORY_TRACEMALLOC = os.getenv("MEMORY_TRACEMALLOC", "false").lower() == "true"
+
 # --------------------
 # Snapshot Saving
 # --------------------
-SAVE_SNAPSHOTS = True
-SNAPSHOT_DIR = "snapshots"
+# After each run, copy the product database into SNAPSHOT_DIR with SQLite's
+# online backup API; reports and the bot can read the latest snapshot instead
+# of the live file. SNAPSHOT_BACKUPS also keeps gzip-compressed copies
+SAVE_SNAPSHOTS = os.getenv("SAVE_SNAPSHOTS", "true").lower() == "true"
+SNAPSHOT_DIR = os.getenv("SNAPSHOT_DIR", "src/data/snapshots")
+SNAPSHOT_KEEP = int(os.getenv("SNAPSHOT_KEEP", "2"))  # plain snapshots kept for readers
+SNAPSHOT_BACKUPS = os.getenv("SNAPSHOT_BACKUPS", "false").lower() == "true"
+SNAPSHOT_KEEP_BACKUPS = int(os.getenv("SNAPSHOT_KEEP_BACKUPS", "7"))
+SNAPSHOT_PAGES_PER_STEP = int(os.getenv("SNAPSHOT_PAGES_PER_STEP", "1024"))  # DB pages copied per step
+SNAPSHOT_STEP_PAUSE = float(os.getenv("SNAPSHOT_STEP_PAUSE", "0.005"))  # seconds between steps, for writers
+
+# --------------------
+# Exports
+# --------------------
+# "delta" writes only the products inserted, changed or removed since the
+# previous export, with a manifest, to EXPORT_DELTA_DIR; "full" rewrites
+# {store}.csv on every export. `main.py export --full` is always available
+EXPORT_MODE = os.getenv("EXPORT_MODE", "delta")
+EXPORT_FORMAT = os.getenv("EXPORT_FORMAT", "csv")  # csv or jsonl
+EXPORT_DELTA_DIR = os.getenv("EXPORT_DELTA_DIR", "src/data/deltas")
+# Exports (data file + manifest) kept per store and format; older ones are deleted
+EXPORT_DELTA_KEEP = int(os.getenv("EXPORT_DELTA_KEEP", "50"))
 
 # --------------------
 # Price Drop Threshold
@@ -64,6 +143,54 @@ TELEGRAM_ALERT_ENABLED = os.getenv("TELEGRAM_ALERT_ENABLED", "false").lower() ==
 TELEGRAM_BOT_TOKEN = os.getenv('TELEGRAM_BOT_TOKEN')
 TELEGRAM_CHAT_ID = os.getenv('TELEGRAM_CHAT_ID')
 
+# Query bot (python src/main.py bot)
+BOT_RESULT_LIMIT = int(os.getenv("BOT_RESULT_LIMIT", "5"))  # products per answer
+BOT_CACHE_SIZE = int(os.getenv("BOT_CACHE_SIZE", "256"))  # cached answers
+BOT_CACHE_TTL = float(os.getenv("BOT_CACHE_TTL", "60"))  # seconds
+
+# --------------------
+# Parallel (multi-process) Runs
+# --------------------
+PARALLEL_WORKERS = int(os.getenv("PARALLEL_WORKERS", str(os.cpu_count() or 2)))
+# round_robin | by_store | hash (see modes.parallel.shard_jobs)
+PARALLEL_SHARDING = os.getenv("PARALLEL_SHARDING", "round_robin")
+# Rounds re-running jobs lost to crashed worker processes; failed fetches are
+# retried per page by FetchController instead
+PARALLEL_JOB_RETRIES = int(os.getenv("PARALLEL_JOB_RETRIES", str(MAX_RETRIES)))
+
+# --------------------
+# Cluster Runs
+# --------------------
+# `run --cluster` leases (store, search) jobs over HTTP to fetch/parse workers
+# (`main.py worker`, on this or other machines) and stores the pages they push
+# back. A job whose lease is not renewed by heartbeats goes back in the queue
+CLUSTER_HOST = os.getenv("CLUSTER_HOST", "127.0.0.1")  # 0.0.0.0 to accept other machines
+CLUSTER_PORT = int(os.getenv("CLUSTER_PORT", "8500"))
+CLUSTER_COORDINATOR_URL = os.getenv("CLUSTER_COORDINATOR_URL", f"http://127.0.0.1:{CLUSTER_PORT}")
+CLUSTER_LEASE_SECONDS = float(os.getenv("CLUSTER_LEASE_SECONDS", "60"))
+CLUSTER_HEARTBEAT_INTERVAL = float(os.getenv("CLUSTER_HEARTBEAT_INTERVAL", "10"))  # seconds
+# Leases per job: a job is leased again only when its worker stops sending
+# heartbeats; fetch errors are retried by the worker's FetchController and fail the job
+CLUSTER_MAX_ATTEMPTS = int(os.getenv("CLUSTER_MAX_ATTEMPTS", "3"))
+CLUSTER_POLL_INTERVAL = float(os.getenv("CLUSTER_POLL_INTERVAL", "2"))  # idle worker's wait between lease requests
+CLUSTER_WORKER_JOBS = int(os.getenv("CLUSTER_WORKER_JOBS", "1"))  # jobs a worker runs at once
+# Shared secret sent by workers in the X-Cluster-Token header. Required when
+# CLUSTER_HOST is not a loopback address; unset on loopback accepts any local worker
+CLUSTER_TOKEN = os.getenv("CLUSTER_TOKEN")
+
+# --------------------
+# Run Metrics
+# --------------------
+# Where to write per-run metrics; .prom/.txt selects Prometheus text, anything else JSON
+METRICS_EXPORT_PATH = os.getenv("METRICS_EXPORT_PATH")
+# Spans kept in memory (oldest dropped first); timers' histograms are unaffected
+METRICS_MAX_SPANS = int(os.getenv("METRICS_MAX_SPANS", "10000"))
+
+# Opt-in SQL profiling: per-method statement counts, time and connection opens
+SQL_PROFILE = os.getenv("SQL_PROFILE", "false").lower() == "true"
+SQL_PROFILE_SLOW_MS = float(os.getenv("SQL_PROFILE_SLOW_MS", "50"))  # capture query plans above this
+SQL_PROFILE_PATH = os.getenv("SQL_PROFILE_PATH")  # optional JSON dump of the profile
+
 # --------------------
 # Scraping Schedule
 # --------------------
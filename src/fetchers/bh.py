@@ -0,0 +1,37 @@
+from bs4 import BeautifulSoup
+from playwright.async_api import TimeoutError as PlaywrightTimeoutError
+from typing import Optional
+from urllib.parse import quote_plus
+from config import SCRAPE_TARGETS
+from metrics import metrics
+from .browser import ResourceBlockRules, open_page
+import asyncio
+
+RESULTS_SELECTOR = '[data-selenium="miniProductPage"]'
+
+def bh_search_url(search_param: str, page: int = 1) -> str:
+    """Build the search results URL for a term and results page"""
+    url = f"{SCRAPE_TARGETS['bh']}?q={quote_plus(search_param)}"
+    return url if page == 1 else f"{url}&pn={page}"
+
+async def fetch_bh_html(search_param: str, page: int = 1,
+                        block_rules: Optional[ResourceBlockRules] = None) -> Optional[BeautifulSoup]:
+    """Fetch a B&H search results page, or None when the page is past the last one"""
+    async with open_page(block_rules, "bh") as browser_page:
+        with metrics.timer("page_step", store="bh", step="goto"):
+            await browser_page.goto(bh_search_url(search_param, page))
+
+        try:
+            with metrics.timer("page_step", store="bh", step="wait_for_results"):
+                await browser_page.wait_for_selector(RESULTS_SELECTOR)
+        except PlaywrightTimeoutError:
+            if page > 1:
+                return None
+            raise
+
+        html = await browser_page.content()
+
+    return BeautifulSoup(html, 'html.parser')
+
+if __name__ == "__main__":
+    asyncio.run(fetch_bh_html("gpu"))
@@ -0,0 +1,85 @@
+import json
+import os
+import time
+from contextlib import asynccontextmanager
+from dataclasses import dataclass
+from typing import AsyncGenerator, Dict, Optional, Tuple
+from config import BROWSER_HEADLESS, BROWSER_STATE_DIR, BROWSER_STATE_MAX_AGE_HOURS, REQUEST_TIMEOUT
+from metrics import metrics
+
+@dataclass(frozen=True)
+class ResourceBlockRules:
+    """Requests a store's pages can skip without affecting the scraped HTML"""
+    resource_types: Tuple[str, ...] = ("image", "media", "font")
+    url_patterns: Tuple[str, ...] = ()
+
+    def should_block(self, resource_type: str, url: str) -> bool:
+        return resource_type in self.resource_types or any(
+            pattern in url for pattern in self.url_patterns
+        )
+
+def storage_state_path(store: str) -> str:
+    return os.path.join(BROWSER_STATE_DIR, f"{store}.json")
+
+def load_storage_state(store: str, max_age_hours: float = BROWSER_STATE_MAX_AGE_HOURS) -> Optional[Dict]:
+    """Saved cookies and local storage for a store, or None if missing, unreadable or too old"""
+    path = storage_state_path(store)
+    try:
+        if time.time() - os.path.getmtime(path) > max_age_hours * 3600:
+            return None
+        with open(path, encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+def save_storage_state(store: str, state: Dict) -> None:
+    """Write a store's storage state atomically, so concurrent fetches never read half a file"""
+    path = storage_state_path(store)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    temp_path = f"{path}.{os.getpid()}.{id(state)}.tmp"
+    with open(temp_path, "w", encoding="utf-8") as f:
+        json.dump(state, f)
+    os.replace(temp_path, path)
+
+@asynccontextmanager
+async def open_page(block_rules: Optional[ResourceBlockRules] = None,
+                    store: Optional[str] = None) -> AsyncGenerator:
+    """
+    Launch a browser and yield a fresh page, closing the browser afterwards.
+    With a store, the page starts from that store's saved storage state and
+    the state is saved again when the block finishes without an error.
+    Usage:
+        async with open_page(rules, "microcenter") as page:
+            await page.goto(url)
+    """
+    # Imported here so only runs that actually fetch pay for Playwright
+    from playwright.async_api import async_playwright
+
+    async with async_playwright() as p:
+        with metrics.timer("browser_launch"):
+            browser = await p.chromium.launch(headless=BROWSER_HEADLESS)
+        try:
+            state = load_storage_state(store) if store else None
+            if store:
+                metrics.counter("browser_state", store=store, result="reused" if state else "missing").inc()
+            context = await browser.new_context(storage_state=state)
+            page = await context.new_page()
+            # Fail a stuck navigation or selector wait quickly; FetchController retries it
+            page.set_default_timeout(REQUEST_TIMEOUT * 1000)
+
+            if block_rules is not None:
+                async def _route(route):
+                    request = route.request
+                    if block_rules.should_block(request.resource_type, request.url):
+                        await route.abort()
+                    else:
+                        await route.continue_()
+
+                await page.route("**/*", _route)
+
+            yield page
+
+            if store:
+                save_storage_state(store, await context.storage_state())
+        finally:
+            await browser.close()
@@ -0,0 +1,168 @@
+import asyncio
+import random
+import time
+from typing import Any, Awaitable, Callable, Optional
+from config import (
+    MAX_RETRIES, RETRY_BACKOFF, MAX_RETRY_BACKOFF, SLOW_RESPONSE_SECONDS,
+    CIRCUIT_FAILURE_THRESHOLD, CIRCUIT_COOLDOWN
+)
+from metrics import metrics
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+class CircuitOpenError(Exception):
+    """Raised instead of fetching while a store's circuit breaker is open"""
+
+    def __init__(self, store: str, retry_in: float):
+        super().__init__(f"{store} looks unavailable; not fetching for another {retry_in:.0f}s")
+        self.store = store
+        self.retry_in = retry_in
+
+class FetchController:
+    """
+    Per-store politeness and retry control for page fetches.
+
+    - Concurrency follows AIMD: the limit grows by about one request per
+      window of successful fetches and halves on an error or a slow response,
+      staying between min_concurrency and max_concurrency.
+    - Failed fetches are retried up to max_retries times with exponential
+      backoff and full jitter, so retries from concurrent searches spread out.
+    - After failure_threshold consecutive failures the circuit opens and
+      fetches fail fast with CircuitOpenError. Once the cooldown passes a
+      single probe fetch is let through; success closes the circuit again.
+    """
+
+    def __init__(self, store: str, max_concurrency: int = 1, min_concurrency: int = 1,
+                 max_retries: int = MAX_RETRIES, backoff: float = RETRY_BACKOFF,
+                 max_backoff: float = MAX_RETRY_BACKOFF, slow_after: float = SLOW_RESPONSE_SECONDS,
+                 failure_threshold: int = CIRCUIT_FAILURE_THRESHOLD, cooldown: float = CIRCUIT_COOLDOWN,
+                 clock: Callable[[], float] = time.monotonic):
+        """
+        Args:
+            store: Store name, used in errors and metric labels
+            max_concurrency: Upper bound for concurrent fetches (the store's politeness limit)
+            min_concurrency: Lower bound the limit shrinks to
+            max_retries: Retries per fetch after the first attempt
+            backoff: Base delay in seconds, doubled on every retry
+            max_backoff: Cap on a single retry delay
+            slow_after: Fetches taking longer than this (seconds) count as congestion
+            failure_threshold: Consecutive failures that open the circuit
+            cooldown: Seconds the circuit stays open before a probe fetch
+            clock: Monotonic time source
+        """
+        self.store = store
+        self.max_concurrency = max(max_concurrency, 1)
+        self.min_concurrency = max(min(min_concurrency, self.max_concurrency), 1)
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.slow_after = slow_after
+        self.failure_threshold = failure_threshold
+        self.cooldown = cooldown
+        self.clock = clock
+
+        # Start low and let successes open up concurrency
+        self.limit = float(self.min_concurrency)
+        self.state = CLOSED
+        self.consecutive_failures = 0
+        self._opened_at = 0.0
+        self._probe_in_flight = False
+        self._in_flight = 0
+        self._condition: Optional[asyncio.Condition] = None
+
+    @classmethod
+    def for_adapter(cls, adapter, **kwargs) -> 'FetchController':
+        """Build a controller bounded by a store adapter's concurrency limit"""
+        return cls(adapter.name, max_concurrency=adapter.max_concurrency, **kwargs)
+
+    async def call(self, fetch: Callable[..., Awaitable[Any]], *args) -> Any:
+        """
+        Run a fetch under the store's concurrency limit, retrying failures
+        Raises:
+            CircuitOpenError: The store's circuit is open
+            Exception: The last error once retries are exhausted
+        """
+        for attempt in range(self.max_retries + 1):
+            probe = self._check_circuit()
+            await self._acquire()
+            started = self.clock()
+            try:
+                result = await fetch(*args)
+            except Exception as e:
+                self._record_failure(probe)
+                if attempt == self.max_retries or self.state == OPEN:
+                    metrics.counter("fetch_failures", store=self.store).inc()
+                    raise
+                delay = self.retry_delay(attempt)
+                print(f"{self.store.title()} fetch failed ({type(e).__name__}: {e}); "
+                      f"retry {attempt + 1}/{self.max_retries} in {delay:.1f}s")
+                metrics.counter("fetch_retries", store=self.store).inc()
+            else:
+                self._record_success(probe, self.clock() - started)
+                return result
+            finally:
+                if probe:
+                    self._probe_in_flight = False
+                await self._release()
+            await asyncio.sleep(delay)
+
+    def retry_delay(self, attempt: int) -> float:
+        """Full-jitter exponential backoff for the given retry attempt (0-based)"""
+        return random.uniform(0, min(self.backoff * (2 ** attempt), self.max_backoff))
+
+    def _check_circuit(self) -> bool:
+        """Raise while the circuit is open; returns True when this call is the half-open probe"""
+        if self.state == CLOSED:
+            return False
+        remaining = self._opened_at + self.cooldown - self.clock()
+        if self.state == OPEN and remaining <= 0:
+            self.state = HALF_OPEN
+        if self.state == HALF_OPEN and not self._probe_in_flight:
+            self._probe_in_flight = True
+            return True
+        raise CircuitOpenError(self.store, max(remaining, 0))
+
+    def _record_success(self, probe: bool, elapsed: float) -> None:
+        self.consecutive_failures = 0
+        if probe:
+            self.state = CLOSED
+            print(f"{self.store.title()} is responding again; circuit closed")
+        if elapsed > self.slow_after:
+            self._decrease()
+        else:
+            self.limit = min(self.limit + 1 / self.limit, float(self.max_concurrency))
+
+    def _record_failure(self, probe: bool) -> None:
+        self.consecutive_failures += 1
+        self._decrease()
+        if probe or (self.state == CLOSED and self.consecutive_failures >= self.failure_threshold):
+            self.state = OPEN
+            self._opened_at = self.clock()
+            metrics.counter("circuit_opened", store=self.store).inc()
+            print(f"{self.store.title()} failed {self.consecutive_failures} times in a row; "
+                  f"pausing fetches for {self.cooldown:.0f}s")
+
+    def shrink(self) -> None:
+        """Halve the concurrency limit from outside, e.g. when memory runs short"""
+        self._decrease()
+
+    def _decrease(self) -> None:
+        self.limit = max(self.limit / 2, float(self.min_concurrency))
+
+    async def _acquire(self) -> None:
+        if self._condition is None:
+            self._condition = asyncio.Condition()
+        async with self._condition:
+            await self._condition.wait_for(lambda: self._in_flight < int(self.limit))
+            self._in_flight += 1
+
+    async def _release(self) -> None:
+        async with self._condition:
+            self._in_flight -= 1
+            self._condition.notify_all()
+
+    def report(self) -> str:
+        return (f"limit={self.limit:.1f}/{self.max_concurrency} circuit={self.state} "
+                f"consecutive_failures={self.consecutive_failures}")
@@ -1,37 +1,43 @@
-from playwright.async_api import async_playwright
 from bs4 import BeautifulSoup
+from typing import Optional
+from urllib.parse import quote_plus
 from config import SCRAPE_TARGETS
+from metrics import metrics
+from .browser import ResourceBlockRules, load_storage_state, open_page
 import asyncio
 
-async def fetch_microcenter_html(search_param: str) -> BeautifulSoup:
-    async with async_playwright() as p:
-        # Launch the browser
-        browser = await p.chromium.launch(headless=False)
-        page = await browser.new_page()
-        
-        # Go to Microcenter homepage
-        await page.goto(SCRAPE_TARGETS["microcenter"])
-        
-        # Find and fill the search input
-        await page.fill('input[id="search-query"]', search_param)
-        
-        # Press Enter to submit the search
-        await page.press('input[id="search-query"]', 'Enter')
-        
-        # Wait for the search results to load
-        # Adjust the selector based on Microcenter's actual page structure
-        await page.wait_for_selector('.product_wrapper')
-        
-        # Add a small delay to ensure all dynamic content is loaded
-        await asyncio.sleep(3)
-        
+def microcenter_search_url(search_param: str, page: int = 1) -> str:
+    """Build the search results URL for a term and results page"""
+    url = f"{SCRAPE_TARGETS['microcenter']}/search/search_results.aspx?Ntt={quote_plus(search_param)}"
+    return url if page == 1 else f"{url}&page={page}"
+
+async def fetch_microcenter_html(search_param: str, page: int = 1,
+                                 block_rules: Optional[ResourceBlockRules] = None) -> BeautifulSoup:
+    # Without saved cookies, visit the homepage once so the site sets them up
+    # (consent, store location); they are saved for every later search
+    first_visit = load_storage_state("microcenter") is None
+    async with open_page(block_rules, "microcenter") as browser_page:
+        if first_visit:
+            with metrics.timer("page_step", store="microcenter", step="home"):
+                await browser_page.goto(SCRAPE_TARGETS["microcenter"])
+
+        with metrics.timer("page_step", store="microcenter", step="goto"):
+            # The results URL is canonical, so search by navigating straight to it
+            await browser_page.goto(microcenter_search_url(search_param, page))
+
+        with metrics.timer("page_step", store="microcenter", step="wait_for_results"):
+            # Wait for the search results to load
+            # Adjust the selector based on Microcenter's actual page structure
+            await browser_page.wait_for_selector('.product_wrapper')
+
+        with metrics.timer("page_step", store="microcenter", step="settle"):
+            # Add a small delay to ensure all dynamic content is loaded
+            await asyncio.sleep(3)
+
         # Get the page content
-        html = await page.content()
-        
-        # Close the browser
-        await browser.close()
-        
-        return BeautifulSoup(html, 'html.parser')
+        html = await browser_page.content()
+
+    return BeautifulSoup(html, 'html.parser')
 
 if __name__ == "__main__":
-    asyncio.run(fetch_microcenter_html())
\ No newline at end of file
+    asyncio.run(fetch_microcenter_html("gpu"))
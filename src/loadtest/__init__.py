@@ -0,0 +1,2 @@
+# End-to-end load testing against a local stand-in for the scraped stores.
+# Run with: python -m loadtest --runs 3 (from the src directory)
@@ -0,0 +1,45 @@
+import argparse
+import asyncio
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+from .harness import run_load_test
+from .mock_store import MockStoreConfig, MockStoreServer
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Load-test automated runs against a local mock store")
+    parser.add_argument("--runs", type=int, default=3, help="Automated runs to perform")
+    parser.add_argument("--products", type=int, default=24, help="Products per results page")
+    parser.add_argument("--pages", type=int, default=3, help="Results pages per search term")
+    parser.add_argument("--latency", type=float, default=0.2, help="Seconds added to every response")
+    parser.add_argument("--jitter", type=float, default=0.1, help="Up to this many extra seconds per response")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Fraction of requests answered with 503")
+    parser.add_argument("--seed", type=int, default=0, help="Seed for names, prices, latency and errors")
+    parser.add_argument("--serve", action="store_true",
+                        help="Only run the mock store until interrupted, e.g. for `main.py run` by hand")
+    parser.add_argument("--port", type=int, default=8400, help="Port for --serve")
+    args = parser.parse_args()
+
+    config = MockStoreConfig(products_per_page=args.products, pages=args.pages, latency=args.latency,
+                             latency_jitter=args.jitter, error_rate=args.error_rate, seed=args.seed)
+    if args.serve:
+        with MockStoreServer(config, port=args.port) as server:
+            targets = server.targets()
+            print(f"Mock store listening on {server.url}; point the scraper at it with")
+            print(f"  SCRAPE_TARGET_MICROCENTER={targets['microcenter']} SCRAPE_TARGET_BH={targets['bh']}")
+            try:
+                while True:
+                    time.sleep(3600)
+            except KeyboardInterrupt:
+                pass
+        return 0
+
+    with tempfile.TemporaryDirectory(prefix="tpt-load-") as work_dir:
+        report = asyncio.run(run_load_test(args.runs, Path(work_dir), config))
+    print(f"\n{report}")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
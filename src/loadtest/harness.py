@@ -0,0 +1,112 @@
+import os
+import resource
+import statistics
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Dict, Generator, List, Optional
+
+from main import run_once
+from metrics import metrics
+from .mock_store import MockStoreConfig, MockStoreServer
+
+@dataclass
+class LoadTestReport:
+    """Throughput, latency and memory of a series of automated runs"""
+    runs: int
+    elapsed: float  # seconds for all runs
+    # Wall seconds per search, including request pacing and page queue backpressure
+    search_latencies: List[float] = field(default_factory=list)
+    products: int = 0
+    fetch_failures: int = 0
+    peak_rss_mb: float = 0.0  # this process
+    peak_child_rss_mb: float = 0.0  # largest finished child process (browsers)
+    server_requests: int = 0
+    server_errors: int = 0
+
+    @property
+    def runs_per_hour(self) -> float:
+        return self.runs * 3600 / self.elapsed if self.elapsed else 0.0
+
+    def latency_percentile(self, percent: float) -> float:
+        """Search latency at the given percentile (0-100), interpolated; 0 and 100 are the min and max"""
+        if not self.search_latencies:
+            return 0.0
+        if percent <= 0:
+            return min(self.search_latencies)
+        if percent >= 100:
+            return max(self.search_latencies)
+        if len(self.search_latencies) == 1:
+            return self.search_latencies[0]
+        # 99 cut points, for percentiles 1 to 99
+        cuts = statistics.quantiles(self.search_latencies, n=100, method="inclusive")
+        return cuts[min(max(int(percent), 1), 99) - 1]
+
+    def __str__(self) -> str:
+        return "\n".join([
+            f"Load test: {self.runs} runs in {self.elapsed:.1f}s ({self.runs_per_hour:.1f} runs/hour)",
+            f"  Searches: {len(self.search_latencies)}, p50={self.latency_percentile(50):.2f}s "
+            f"p95={self.latency_percentile(95):.2f}s",
+            f"  Products parsed: {self.products}, fetch failures: {self.fetch_failures}",
+            f"  Mock store: {self.server_requests} requests, {self.server_errors} injected errors",
+            f"  Peak RSS: {self.peak_rss_mb:.1f} MB (largest browser process {self.peak_child_rss_mb:.1f} MB)",
+        ])
+
+def _peak_rss_mb(who: int) -> float:
+    # ru_maxrss is in kilobytes on Linux
+    return resource.getrusage(who).ru_maxrss / 1024
+
+@contextmanager
+def _scrape_targets(targets: Dict[str, str]) -> Generator[None, None, None]:
+    """Point the fetchers at other URLs for the duration of the block"""
+    from config import SCRAPE_TARGETS
+    original = dict(SCRAPE_TARGETS)
+    SCRAPE_TARGETS.update(targets)
+    try:
+        yield
+    finally:
+        SCRAPE_TARGETS.clear()
+        SCRAPE_TARGETS.update(original)
+
+@contextmanager
+def _working_directory(path: Path) -> Generator[None, None, None]:
+    """Run with `path` as the working directory, so src/data/ (database and CSVs) lives under it"""
+    (path / "src" / "data").mkdir(parents=True, exist_ok=True)
+    previous = os.getcwd()
+    os.chdir(path)
+    try:
+        yield
+    finally:
+        os.chdir(previous)
+
+async def run_load_test(runs: int, work_dir: Path, config: Optional[MockStoreConfig] = None) -> LoadTestReport:
+    """
+    Drive automated runs (main.run_once) end to end against a local mock store
+    Args:
+        runs: Automated runs, one after another
+        work_dir: Directory for the run's database and CSV exports
+        config: Mock store behaviour (page sizes, latency, error injection)
+    Returns:
+        Report with runs/hour, per-search latency percentiles and peak RSS
+    """
+    report = LoadTestReport(runs=runs, elapsed=0.0)
+    with MockStoreServer(config) as server, _scrape_targets(server.targets()), _working_directory(work_dir):
+        started = time.perf_counter()
+        for run in range(runs):
+            metrics.reset()
+            # The same run main() performs, without Telegram alerts
+            await run_once(automated=True, resume=False, alerts=False)
+            report.search_latencies.extend(
+                span.duration for span in metrics.spans if span.name == "search_wall" and span.duration is not None
+            )
+            report.products += metrics.counter_total("products_parsed")
+            report.fetch_failures += metrics.counter_total("fetch_failures")
+            print(f"Run {run + 1}/{runs} finished after {time.perf_counter() - started:.1f}s")
+        report.elapsed = time.perf_counter() - started
+        report.server_requests = server.stats.requests
+        report.server_errors = server.stats.errors
+
+    report.peak_rss_mb = _peak_rss_mb(resource.RUSAGE_SELF)
+    report.peak_child_rss_mb = _peak_rss_mb(resource.RUSAGE_CHILDREN)
+    return report
@@ -0,0 +1,218 @@
+import copy
+import random
+import threading
+import time
+from dataclasses import dataclass
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Callable, Dict, Optional
+from urllib.parse import parse_qs, urlsplit
+
+from benchmarks.generators import product_name
+
+FIXTURES_DIR = Path(__file__).parent.parent / "tests" / "fixtures"
+
+MICROCENTER_HOME = """<!DOCTYPE html>
+<html><head><title>Micro Center (mock)</title></head>
+<body>
+<form action="/search/search_results.aspx" method="get">
+<input id="search-query" name="Ntt" type="text"/>
+</form>
+</body></html>"""
+
+@dataclass
+class MockStoreConfig:
+    """How the mock store behaves"""
+    products_per_page: int = 24
+    pages: int = 3  # result pages per search term
+    latency: float = 0.2  # seconds added to every response
+    latency_jitter: float = 0.1  # up to this many seconds more, at random
+    error_rate: float = 0.0  # fraction of requests answered with 503
+    price_drift: float = 0.05  # each request moves a price by up to this fraction
+    seed: int = 0
+
+@dataclass
+class MockStoreStats:
+    requests: int = 0
+    errors: int = 0
+    pages: int = 0
+
+def _set_microcenter_card(card, name: str, price: float, link: str, image: str) -> None:
+    name_link = card.find("div", class_="h2").find("a")
+    name_link.string = name
+    name_link["href"] = link
+    name_link["data-name"] = name
+    card.find("div", class_="result_left").find("a")["href"] = link
+    img = card.find("div", class_="result_left").find("img")
+    img["src"] = image
+    img["alt"] = name
+    price_tag = card.find("span", itemprop="price")
+    price_tag["content"] = f"{price:.2f}"
+    price_tag.contents[2].string = f"${price:,.2f}"
+
+def _set_bh_card(card, name: str, price: float, link: str, image: str) -> None:
+    for anchor in card.find_all("a"):
+        anchor["href"] = link
+    card.find("span", attrs={"data-selenium": "miniProductPageProductName"}).string = name
+    img = card.find("img", attrs={"data-selenium": "miniProductPageImg"})
+    img["src"] = image
+    img["alt"] = name
+    dollars, cents = f"{price:,.2f}".split(".")
+    card.find("span", attrs={"data-selenium": "uppedDecimalPriceFirst"}).string = f"${dollars}."
+    card.find("sup", attrs={"data-selenium": "uppedDecimalPriceSecond"}).string = cents
+
+@dataclass(frozen=True)
+class _PageTemplate:
+    fixture: str
+    card_selector: Dict
+    # Cards without it (out of stock) are not used as templates
+    price_selector: Dict
+    link_prefix: str
+    set_card: Callable
+
+# Store key -> recorded search page the mock pages are built from
+TEMPLATES: Dict[str, _PageTemplate] = {
+    "microcenter": _PageTemplate("microcenter_search.html", {"name": "li", "class_": "product_wrapper"},
+                                 {"name": "span", "itemprop": "price"}, "/product/", _set_microcenter_card),
+    "bh": _PageTemplate("bh_search.html", {"name": "div", "attrs": {"data-selenium": "miniProductPage"}},
+                        {"name": "span", "attrs": {"data-selenium": "uppedDecimalPriceFirst"}},
+                        "/c/product/", _set_bh_card),
+}
+
+class MockStoreServer:
+    """
+    Local stand-in for the scraped stores, serving search results pages
+    built from the recorded fixtures in tests/fixtures.
+
+    Routes mirror the real sites, so only SCRAPE_TARGETS changes (see targets()):
+        /                                  Micro Center home page with the search box
+        /search/search_results.aspx?Ntt=   Micro Center results (&page=N)
+        /c/search?q=                       B&H results (&pn=N)
+    Pages past MockStoreConfig.pages have no product cards. Every search term
+    lists the same products on every request, with prices drifting a little.
+    Runs in a background thread:
+        with MockStoreServer(MockStoreConfig(error_rate=0.05)) as server:
+            SCRAPE_TARGETS.update(server.targets())
+    """
+
+    def __init__(self, config: Optional[MockStoreConfig] = None, host: str = "127.0.0.1", port: int = 0):
+        """
+        Args:
+            config: Page sizes, latency and error injection
+            host: Interface to listen on
+            port: Port to listen on (0 picks a free one)
+        """
+        self.config = config or MockStoreConfig()
+        self.stats = MockStoreStats()
+        self._rng = random.Random(self.config.seed)
+        self._lock = threading.Lock()
+        self._templates = {}
+        self._server = ThreadingHTTPServer((host, port), self._handler_class())
+        self._server.daemon_threads = True
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def targets(self) -> Dict[str, str]:
+        """SCRAPE_TARGETS entries pointing every store at this server"""
+        return {"microcenter": self.url, "bh": f"{self.url}/c/search"}
+
+    def start(self) -> 'MockStoreServer':
+        self._thread = threading.Thread(target=self._server.serve_forever, name="mock-store", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._server.shutdown()
+        self._server.server_close()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def __enter__(self) -> 'MockStoreServer':
+        return self.start()
+
+    def __exit__(self, exc_type, exc_val, exc_tb) -> None:
+        self.stop()
+
+    def render(self, store: str, search: str, page: int = 1) -> str:
+        """Search results page for a store, term and page number"""
+        from bs4 import BeautifulSoup
+        template = TEMPLATES[store]
+        if store not in self._templates:
+            self._templates[store] = (FIXTURES_DIR / template.fixture).read_text(encoding="utf-8")
+        soup = BeautifulSoup(self._templates[store], "html.parser")
+        originals = soup.find_all(**template.card_selector)
+        parent = originals[0].parent
+        for card in originals:
+            card.extract()
+        priced = [card for card in originals if card.find(**template.price_selector) is not None]
+
+        search_box = soup.find("input", id="search-query")
+        if search_box is not None:
+            search_box["value"] = search
+        if page > self.config.pages:
+            return str(soup)
+
+        # Seeded by term and page, so a product keeps its name and base price across requests
+        rng = random.Random(f"{self.config.seed}:{store}:{search}:{page}")
+        for i in range(self.config.products_per_page):
+            index = (page - 1) * self.config.products_per_page + i
+            name = f"{product_name(rng, index)} {search}"
+            base_price = rng.uniform(20, 2500)
+            with self._lock:
+                drift = self._rng.uniform(-self.config.price_drift, self.config.price_drift)
+            slug = f"{search.replace(' ', '-')}-{index}"
+            card = copy.copy(priced[i % len(priced)])
+            template.set_card(card, name, round(base_price * (1 + drift), 2),
+                              f"{template.link_prefix}{slug}", f"/images/{slug}.jpg")
+            parent.append(card)
+        return str(soup)
+
+    def _respond(self, path: str) -> tuple:
+        """(status, body) for a request path"""
+        url = urlsplit(path)
+        query = {key: values[0] for key, values in parse_qs(url.query).items()}
+        if url.path == "/":
+            return 200, MICROCENTER_HOME
+        if url.path == "/search/search_results.aspx":
+            return 200, self.render("microcenter", query.get("Ntt", ""), int(query.get("page", 1)))
+        if url.path == "/c/search":
+            return 200, self.render("bh", query.get("q", ""), int(query.get("pn", 1)))
+        return 404, "Not found"
+
+    def _handler_class(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self) -> None:
+                config = server.config
+                with server._lock:
+                    server.stats.requests += 1
+                    delay = config.latency + server._rng.uniform(0, config.latency_jitter)
+                    fail = server._rng.random() < config.error_rate
+                    if fail:
+                        server.stats.errors += 1
+                time.sleep(delay)
+
+                if fail:
+                    status, body = 503, "Service temporarily unavailable"
+                else:
+                    status, body = server._respond(self.path)
+                    if status == 200:
+                        with server._lock:
+                            server.stats.pages += 1
+                data = body.encode("utf-8")
+                self.send_response(status)
+                self.send_header("Content-Type", "text/html; charset=utf-8")
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def log_message(self, format, *args) -> None:
+                pass
+
+        return Handler
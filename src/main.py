@@ -1,22 +1,248 @@
+import argparse
 import asyncio
-import os
-from modes import automated, interactive
-from alerts import telegram_handler
+from datetime import timedelta
+from typing import List, Optional
+from config import (
+    AUTOMATED_MODE, METRICS_EXPORT_PATH, SQL_PROFILE, SQL_PROFILE_SLOW_MS, SQL_PROFILE_PATH,
+    RESUME_RUNS, RESUME_WINDOW_HOURS, MEMORY_BUDGET_MB, MEMORY_TRACEMALLOC,
+    SAVE_SNAPSHOTS, SNAPSHOT_BACKUPS, EXPORT_FORMAT, CLUSTER_COORDINATOR_URL, CLUSTER_WORKER_JOBS
+)
+from metrics import metrics, export_metrics, MemoryBudget, enable_memory_budget, disable_memory_budget
 
-async def main():
+# Heavy dependencies (Playwright, BeautifulSoup, python-telegram-bot) are
+# imported inside the commands that need them, so inspection commands and
+# short scheduled jobs start quickly.
+
+async def run_once(automated: bool = AUTOMATED_MODE, parallel: bool = False, workers: Optional[int] = None,
+                   resume: bool = RESUME_RUNS, cluster: bool = False, local_workers: int = 0,
+                   alerts: bool = True) -> None:
+    """
+    One scrape run: the selected mode, alerts, flushing the store, cross-store
+    matching, the run's job ledger and the optional snapshot. Shared by main()
+    and the load test harness.
+    """
+    from modes import automated as automated_mode, interactive as interactive_mode, parallel as parallel_mode
+    from cluster import coordinator as cluster_mode
+    from alerts import telegram_handler
+    from storage.db import Database
+    from storage.db_store import get_async_store
+    from processing.matching import ProductMatcher
+
+    ledger = None
+    if not parallel:
+        ledger = await asyncio.to_thread(
+            Database().open_ledger, resume, timedelta(hours=RESUME_WINDOW_HOURS)
+        )
+        if ledger.resumed:
+            print(f"Resuming run {ledger.run_id}: finished pages will be skipped")
+    mode = "parallel" if parallel else "cluster" if cluster else "automated" if automated else "interactive"
+    with metrics.span("run", mode=mode):
+        # Check if running in automated mode (e.g., via CRON job)
+        if parallel:
+            print("Running in parallel mode...")
+            processed_files = await parallel_mode.run(workers)
+        elif cluster:
+            print("Running in cluster mode...")
+            processed_files = await cluster_mode.run(ledger, local_workers)
+        elif automated:
+            print("Running in automated mode...")
+            processed_files = await automated_mode.run(ledger)
+        else:
+            print("Running in interactive mode...")
+            processed_files = await interactive_mode.run(ledger)
+
+        # Send alerts regardless of mode
+        if alerts:
+            await telegram_handler.send_alerts(processed_files)
+
+        # Flush any writes still queued for the background DB writer
+        await get_async_store().aclose()
+
+        # Group new listings with the same product from other stores
+        print(await asyncio.to_thread(ProductMatcher(Database()).match_new_products))
+
+        if ledger is not None and not await asyncio.to_thread(ledger.finish):
+            print(f"Run {ledger.run_id} has unfinished jobs; rerun with --resume to pick them up")
+
+        if SAVE_SNAPSHOTS:
+            with metrics.timer("snapshot"):
+                print(await asyncio.to_thread(Database().snapshot, backup=SNAPSHOT_BACKUPS))
+
+async def main(automated: bool = AUTOMATED_MODE, metrics_path: Optional[str] = METRICS_EXPORT_PATH,
+               profile_sql: bool = SQL_PROFILE, parallel: bool = False, workers: Optional[int] = None,
+               resume: bool = RESUME_RUNS, memory_budget_mb: float = MEMORY_BUDGET_MB,
+               trace_memory: bool = MEMORY_TRACEMALLOC, cluster: bool = False, local_workers: int = 0):
     """Main entry point for the tech product tracker."""
-    # Check if running in automated mode (e.g., via CRON job)
-    is_automated = False
-    
-    if is_automated:
-        print("Running in automated mode...")
-        processed_files = await automated.run()
+    if parallel and resume:
+        # The writer process keeps its own ledger; workers do not read it to skip finished pages
+        raise ValueError("--resume is not supported with --parallel")
+    from storage.db import QueryProfiler, enable_profiling, disable_profiling
+    from storage.db_store import query_cache
+
+    if profile_sql:
+        enable_profiling(QueryProfiler(slow_ms=SQL_PROFILE_SLOW_MS))
+
+    metrics.reset()
+    # Worker processes of a parallel run are measured but not throttled
+    memory = enable_memory_budget(MemoryBudget(memory_budget_mb, trace=trace_memory)).start()
+    try:
+        await run_once(automated, parallel, workers, resume, cluster, local_workers)
+    finally:
+        await memory.stop()
+        disable_memory_budget()
+
+    print(f"\n{metrics.summary()}")
+    print(query_cache.report())
+    print(memory.report())
+    if metrics_path:
+        print(f"Run metrics written to {export_metrics(metrics, metrics_path)}")
+
+    profiler = disable_profiling()
+    if profiler is not None:
+        print(f"\n{profiler.report()}")
+        if SQL_PROFILE_PATH:
+            print(f"SQL profile written to {profiler.dump(SQL_PROFILE_PATH)}")
+
+def show_stats(from_snapshot: bool = False) -> None:
+    """Print a per-store summary of the product database without scraping."""
+    from storage.db import Database
+    from storage.db_store import get_store_summary
+
+    if from_snapshot:
+        snapshot = Database.open_latest_snapshot()
+        if snapshot is None:
+            print("No snapshot taken yet; run `snapshot` first")
+            return
+        summary = snapshot.products.get_store_summary()
+    else:
+        summary = get_store_summary()
+    if not summary:
+        print("No products stored yet")
+        return
+    for row in summary:
+        print(f"{row['store'].title()}: {row['product_count']} products, last updated {row['last_updated']}")
+
+def show_comparison(limit: int, rematch: bool = False) -> None:
+    """Print the cheapest store for each product sold by more than one store."""
+    from processing.matching import ProductMatcher, cheapest_offers_report
+    from storage.db import Database
+
+    db = Database()
+    print(ProductMatcher(db).match_new_products(rebuild=rematch))
+    lines = cheapest_offers_report(db, limit)
+    if not lines:
+        print("No products found in more than one store yet")
+    for line in lines:
+        print(line)
+
+def take_snapshot(backup: bool = SNAPSHOT_BACKUPS) -> None:
+    """Copy the product database into a new snapshot while scrapes keep writing."""
+    from storage.db import Database
+
+    print(Database().snapshot(backup=backup))
+
+def export_products(full: bool = False, fmt: str = EXPORT_FORMAT, stores: Optional[List[str]] = None) -> None:
+    """Export what changed per store since its last export, or every product with full=True."""
+    from storage.db import Database
+    from storage.delta_export import export_changes
+
+    db = Database()
+    for store in stores or [row['store'] for row in db.products.get_store_summary()]:
+        result = export_changes(db, store, fmt, full=full)
+        print(result or f"No changes in {store} since its last export")
+
+def run_worker(coordinator_url: str, jobs: int) -> None:
+    """Fetch and parse jobs leased from a cluster coordinator until its run is finished."""
+    from cluster.worker import ClusterWorker
+
+    asyncio.run(ClusterWorker(coordinator_url, jobs=jobs).run())
+
+def run_bot(use_snapshots: bool = False) -> None:
+    """Answer /price, /history and /lowest queries over Telegram until interrupted."""
+    from modes import bot
+
+    bot.run(use_snapshots=use_snapshots)
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(description="Track tech product prices and availability")
+    subparsers = parser.add_subparsers(dest="command")
+
+    run_parser = subparsers.add_parser("run", help="Scrape stores and send alerts (default)")
+    run_parser.add_argument("--automated", action="store_true", default=AUTOMATED_MODE,
+                            help="Use the default stores and search parameters instead of prompting")
+    run_parser.add_argument("--parallel", action="store_true",
+                            help="Run the automated jobs across worker processes with a single DB writer process")
+    run_parser.add_argument("--workers", type=int, help="Worker processes for --parallel (default: PARALLEL_WORKERS)")
+    run_parser.add_argument("--cluster", action="store_true",
+                            help="Lease the automated jobs to fetch/parse workers over HTTP (see `worker`)")
+    run_parser.add_argument("--local-workers", type=int, default=0,
+                            help="Worker processes to start on this machine for --cluster")
+    run_parser.add_argument("--resume", action="store_true", default=RESUME_RUNS,
+                            help="Continue the latest unfinished run, skipping pages it already stored "
+                                 "(not with --parallel)")
+    run_parser.add_argument("--memory-budget", type=float, default=MEMORY_BUDGET_MB, metavar="MB",
+                            help="RSS ceiling for the run and its browsers; concurrency and batches back off near it")
+    run_parser.add_argument("--trace-memory", action="store_true", default=MEMORY_TRACEMALLOC,
+                            help="Also trace Python allocations with tracemalloc and report the top sites")
+    run_parser.add_argument("--metrics-out", default=METRICS_EXPORT_PATH,
+                            help="Write run metrics to this file (.json, or .prom for Prometheus text)")
+    run_parser.add_argument("--profile-sql", action="store_true", default=SQL_PROFILE,
+                            help="Record per-method SQL statement counts and timings and print a ranked report")
+
+    stats_parser = subparsers.add_parser("stats", help="Show stored product counts per store")
+    stats_parser.add_argument("--snapshot", action="store_true", help="Read the latest snapshot instead of the live database")
+    snapshot_parser = subparsers.add_parser("snapshot", help="Copy the database into SNAPSHOT_DIR without blocking writers")
+    snapshot_parser.add_argument("--backup", action="store_true", default=SNAPSHOT_BACKUPS,
+                                 help="Also keep a gzip-compressed, rotated backup")
+    compare_parser = subparsers.add_parser("compare", help="Show the cheapest store for products sold by several stores")
+    compare_parser.add_argument("--limit", type=int, default=20, help="Products to list (default: 20)")
+    compare_parser.add_argument("--rematch", action="store_true",
+                                help="Discard stored matches and match every product again")
+    export_parser = subparsers.add_parser("export", help="Export products changed since the last export, with a manifest")
+    export_parser.add_argument("--full", action="store_true", help="Export every product and restart deltas from here")
+    export_parser.add_argument("--format", choices=["csv", "jsonl"], default=EXPORT_FORMAT,
+                               help="Data file format (default: EXPORT_FORMAT)")
+    export_parser.add_argument("--store", action="append", dest="stores",
+                               help="Store to export (repeatable; default: every stored store)")
+    worker_parser = subparsers.add_parser("worker", help="Fetch and parse jobs for a `run --cluster` coordinator")
+    worker_parser.add_argument("--coordinator", default=CLUSTER_COORDINATOR_URL,
+                               help="Coordinator URL (default: CLUSTER_COORDINATOR_URL)")
+    worker_parser.add_argument("--jobs", type=int, default=CLUSTER_WORKER_JOBS, help="Jobs to run at once")
+    bot_parser = subparsers.add_parser("bot", help="Answer price queries over Telegram (long-running)")
+    bot_parser.add_argument("--snapshot", action="store_true", help="Answer from the latest snapshot instead of the live database")
+    return parser
+
+def cli(argv: Optional[List[str]] = None) -> None:
+    parser = build_parser()
+    args = parser.parse_args(argv)
+    if getattr(args, "parallel", False) and getattr(args, "resume", False):
+        parser.error("--resume is not supported with --parallel (parallel workers do not skip finished pages)")
+
+    if args.command == "stats":
+        show_stats(args.snapshot)
+    elif args.command == "snapshot":
+        take_snapshot(args.backup)
+    elif args.command == "compare":
+        show_comparison(args.limit, args.rematch)
+    elif args.command == "export":
+        export_products(args.full, args.format, args.stores)
+    elif args.command == "worker":
+        run_worker(args.coordinator, args.jobs)
+    elif args.command == "bot":
+        run_bot(args.snapshot)
     else:
-        print("Running in interactive mode...")
-        processed_files = await interactive.run()
-    
-    # Send alerts regardless of mode
-    await telegram_handler.send_alerts(processed_files)
+        asyncio.run(main(
+            getattr(args, "automated", AUTOMATED_MODE),
+            getattr(args, "metrics_out", METRICS_EXPORT_PATH),
+            getattr(args, "profile_sql", SQL_PROFILE),
+            getattr(args, "parallel", False),
+            getattr(args, "workers", None),
+            getattr(args, "resume", RESUME_RUNS),
+            getattr(args, "memory_budget", MEMORY_BUDGET_MB),
+            getattr(args, "trace_memory", MEMORY_TRACEMALLOC),
+            getattr(args, "cluster", False),
+            getattr(args, "local_workers", 0)
+        ))
 
 if __name__ == "__main__":
-    asyncio.run(main())
+    cli()
@@ -0,0 +1,11 @@
+# Run instrumentation: timers, counters and spans shared by every stage
+from .registry import MetricsRegistry, Counter, Histogram, Span
+from .exporters import export_metrics, to_json, to_prometheus
+from .memory import MemoryBudget, enable_memory_budget, disable_memory_budget, active_memory_budget
+
+# Process-wide registry used by fetchers, the pipeline, storage and alerts
+metrics = MetricsRegistry()
+
+__all__ = ['metrics', 'MetricsRegistry', 'Counter', 'Histogram', 'Span',
+           'export_metrics', 'to_json', 'to_prometheus',
+           'MemoryBudget', 'enable_memory_budget', 'disable_memory_budget', 'active_memory_budget']
@@ -0,0 +1,86 @@
+import json
+import math
+from dataclasses import asdict
+from pathlib import Path
+from typing import Dict, Union
+
+from .registry import MetricsRegistry, LabelKey
+
+def to_json(registry: MetricsRegistry) -> Dict:
+    """Counters, histograms and spans as a JSON-serialisable dict"""
+    return {
+        "started_at": registry.started_at,
+        "counters": [
+            {"name": name, "labels": dict(labels), "value": counter.value}
+            for (name, labels), counter in sorted(registry.counters.items())
+        ],
+        "histograms": [
+            {
+                "name": name,
+                "labels": dict(labels),
+                "count": histogram.count,
+                "sum": histogram.sum,
+                "max": histogram.max,
+                "buckets": {
+                    ("+Inf" if math.isinf(bound) else str(bound)): count
+                    for bound, count in zip(histogram.buckets, histogram.bucket_counts)
+                },
+            }
+            for (name, labels), histogram in sorted(registry.histograms.items())
+        ],
+        "spans": [asdict(span) for span in registry.spans],
+        "dropped_spans": registry.dropped_spans,
+    }
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+def _prometheus_labels(labels: LabelKey, **extra) -> str:
+    pairs = list(labels) + [(key, str(value)) for key, value in extra.items()]
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{key}="{_escape(value)}"' for key, value in pairs) + "}"
+
+def to_prometheus(registry: MetricsRegistry, prefix: str = "tpt_") -> str:
+    """Counters and histograms in the Prometheus text exposition format"""
+    lines = []
+    typed = set()
+
+    for (name, labels), counter in sorted(registry.counters.items()):
+        metric = f"{prefix}{name}_total"
+        if metric not in typed:
+            lines.append(f"# TYPE {metric} counter")
+            typed.add(metric)
+        lines.append(f"{metric}{_prometheus_labels(labels)} {counter.value}")
+
+    for (name, labels), histogram in sorted(registry.histograms.items()):
+        metric = f"{prefix}{name}"
+        if metric not in typed:
+            lines.append(f"# TYPE {metric} histogram")
+            typed.add(metric)
+        cumulative = 0
+        for bound, count in zip(histogram.buckets, histogram.bucket_counts):
+            cumulative += count
+            le = "+Inf" if math.isinf(bound) else repr(bound)
+            lines.append(f"{metric}_bucket{_prometheus_labels(labels, le=le)} {cumulative}")
+        lines.append(f"{metric}_sum{_prometheus_labels(labels)} {histogram.sum}")
+        lines.append(f"{metric}_count{_prometheus_labels(labels)} {histogram.count}")
+
+    return "\n".join(lines) + "\n"
+
+def export_metrics(registry: MetricsRegistry, path: Union[str, Path]) -> Path:
+    """
+    Write the registry to a local file
+    Args:
+        registry: Registry to export
+        path: Destination; a .prom or .txt suffix selects Prometheus text, anything else JSON
+    Returns:
+        The path written
+    """
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    if path.suffix in (".prom", ".txt"):
+        path.write_text(to_prometheus(registry), encoding="utf-8")
+    else:
+        path.write_text(json.dumps(to_json(registry), indent=2), encoding="utf-8")
+    return path
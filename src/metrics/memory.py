@@ -0,0 +1,225 @@
+import asyncio
+import gc
+import os
+import threading
+import time
+import tracemalloc
+from dataclasses import dataclass
+from typing import Callable, Dict, List, Optional
+from config import MEMORY_BUDGET_MB, MEMORY_SOFT_LIMIT, MEMORY_SAMPLE_INTERVAL, MEMORY_TRACEMALLOC
+
+_PAGE_SIZE = os.sysconf("SC_PAGE_SIZE") if hasattr(os, "sysconf") else 4096
+
+def _children(pid: int) -> List[int]:
+    children = []
+    try:
+        for tid in os.listdir(f"/proc/{pid}/task"):
+            with open(f"/proc/{pid}/task/{tid}/children") as f:
+                children.extend(int(child) for child in f.read().split())
+    except OSError:
+        pass
+    return children
+
+def _rss_bytes(pid: int) -> int:
+    try:
+        with open(f"/proc/{pid}/statm") as f:
+            return int(f.read().split()[1]) * _PAGE_SIZE
+    except (OSError, ValueError, IndexError):
+        return 0
+
+def process_tree_rss_mb(pid: Optional[int] = None) -> float:
+    """
+    Resident memory of a process and all its descendants (the browsers), in MB.
+    Shared pages are counted once per process, so this errs on the high side.
+    Falls back to this process's peak RSS where /proc is unavailable.
+    """
+    root = pid or os.getpid()
+    if not os.path.exists(f"/proc/{root}/statm"):
+        import resource  # POSIX only, and only needed without /proc
+        # ru_maxrss is in kilobytes on Linux and bytes on macOS
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak / (1024 * 1024) if os.uname().sysname == "Darwin" else peak / 1024
+    total, stack, seen = 0, [root], set()
+    while stack:
+        current = stack.pop()
+        if current in seen:
+            continue
+        seen.add(current)
+        total += _rss_bytes(current)
+        stack.extend(_children(current))
+    return total / (1024 * 1024)
+
+@dataclass
+class StageMemory:
+    """Memory observed while one pipeline stage was running"""
+    samples: int = 0
+    peak_rss_mb: float = 0.0
+    peak_traced_mb: float = 0.0
+
+class MemoryBudget:
+    """
+    RSS ceiling for a run, with sampling attributed to pipeline stages.
+
+    Stages call sample(stage) as they work and a background task samples every
+    `interval` seconds. Reading the process tree's RSS walks /proc, so stage
+    samples reuse a reading taken less than `interval` seconds ago. Above soft_limit (a fraction of limit_mb) the budget
+    reports `under_pressure`, and the pipeline backs off: fetch concurrency is
+    halved and DB batches shrink. At the ceiling, new fetches wait for headroom.
+    With trace=True, tracemalloc also attributes Python allocations and the top
+    allocation sites at the peak are reported.
+    """
+
+    def __init__(self, limit_mb: float = MEMORY_BUDGET_MB, soft_limit: float = MEMORY_SOFT_LIMIT,
+                 interval: float = MEMORY_SAMPLE_INTERVAL, trace: bool = MEMORY_TRACEMALLOC, max_wait: float = 30.0,
+                 rss_reader: Callable[[], float] = process_tree_rss_mb,
+                 clock: Callable[[], float] = time.monotonic):
+        """
+        Args:
+            limit_mb: RSS ceiling in MB for the process and its browsers (0 only measures)
+            soft_limit: Fraction of limit_mb where back-off starts
+            interval: Seconds between background samples
+            trace: Also sample Python allocations with tracemalloc
+            max_wait: Longest a fetch waits for memory at the ceiling before going ahead anyway
+            rss_reader: Returns the current RSS in MB
+            clock: Monotonic time source
+        """
+        self.limit_mb = limit_mb
+        self.soft_limit = soft_limit
+        self.interval = interval
+        self.trace = trace
+        self.max_wait = max_wait
+        self.rss_reader = rss_reader
+        self.clock = clock
+
+        self.stages: Dict[str, StageMemory] = {}
+        self.current_rss_mb = 0.0
+        self.peak_rss_mb = 0.0
+        self.peak_stage: Optional[str] = None
+        self.backoffs = 0
+        self.waits = 0
+        self.top_allocations: List[str] = []
+        self._last_snapshot = float("-inf")
+        self._rss_read_at = float("-inf")
+        self._lock = threading.Lock()
+        self._task: Optional[asyncio.Task] = None
+        self._started_tracing = False
+
+    @property
+    def enabled(self) -> bool:
+        return self.limit_mb > 0
+
+    @property
+    def under_pressure(self) -> bool:
+        return self.enabled and self.current_rss_mb >= self.limit_mb * self.soft_limit
+
+    @property
+    def exceeded(self) -> bool:
+        return self.enabled and self.current_rss_mb >= self.limit_mb
+
+    def sample(self, stage: str, fresh: bool = False) -> float:
+        """
+        Measure memory, attribute it to a stage and return the RSS in MB
+        Args:
+            stage: Pipeline stage running now
+            fresh: Read the RSS even if the last reading is under `interval` seconds old
+        """
+        now = self.clock()
+        if fresh or now - self._rss_read_at >= self.interval:
+            self._rss_read_at = now
+            rss = self.rss_reader()
+        else:
+            rss = self.current_rss_mb
+        traced = tracemalloc.get_traced_memory()[0] / (1024 * 1024) if tracemalloc.is_tracing() else 0.0
+        with self._lock:
+            self.current_rss_mb = rss
+            stats = self.stages.setdefault(stage, StageMemory())
+            stats.samples += 1
+            stats.peak_rss_mb = max(stats.peak_rss_mb, rss)
+            stats.peak_traced_mb = max(stats.peak_traced_mb, traced)
+            new_peak = rss > self.peak_rss_mb
+            if new_peak:
+                self.peak_rss_mb = rss
+                self.peak_stage = stage
+        if new_peak and tracemalloc.is_tracing() and self.clock() - self._last_snapshot >= 5 * self.interval:
+            # Snapshots cost time proportional to live allocations, so take them sparingly
+            self._last_snapshot = self.clock()
+            stats = tracemalloc.take_snapshot().statistics("lineno")[:5]
+            self.top_allocations = [f"{stat.size / (1024 * 1024):.1f} MB in {stat.traceback}" for stat in stats]
+        return rss
+
+    def scaled_batch_size(self, batch_size: int) -> int:
+        """DB batch size to use now: a quarter of batch_size under pressure"""
+        return max(batch_size // 4, 1) if self.under_pressure else batch_size
+
+    def note_backoff(self) -> None:
+        self.backoffs += 1
+
+    async def wait_for_headroom(self, stage: str = "fetch") -> None:
+        """
+        While the last sample is at the ceiling, collect garbage and wait (up to
+        max_wait) for other stages to drain, sampling again as it goes
+        """
+        deadline = self.clock() + self.max_wait
+        waited = False
+        while self.exceeded and self.clock() < deadline:
+            waited = True
+            gc.collect()
+            await asyncio.sleep(min(self.interval, 0.5))
+            self.sample(stage, fresh=True)
+        if waited:
+            self.waits += 1
+
+    def start(self) -> 'MemoryBudget':
+        """Start tracemalloc (if tracing) and the background sampler on the running loop"""
+        if self.trace and not tracemalloc.is_tracing():
+            tracemalloc.start()
+            self._started_tracing = True
+        self._task = asyncio.get_running_loop().create_task(self._sample_forever())
+        return self
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        self.sample("run", fresh=True)
+        if self._started_tracing:
+            tracemalloc.stop()
+            self._started_tracing = False
+
+    async def _sample_forever(self) -> None:
+        while True:
+            self.sample("run", fresh=True)
+            await asyncio.sleep(self.interval)
+
+    def report(self) -> str:
+        """Human readable per-run peak memory report"""
+        limit = f" of {self.limit_mb:.0f} MB budget" if self.enabled else ""
+        lines = [f"Memory: peak RSS {self.peak_rss_mb:.1f} MB{limit} (during {self.peak_stage or '-'}), "
+                 f"{self.backoffs} back-offs, {self.waits} waits for headroom"]
+        for stage, stats in sorted(self.stages.items(), key=lambda item: -item[1].peak_rss_mb):
+            traced = f" python={stats.peak_traced_mb:.1f} MB" if stats.peak_traced_mb else ""
+            lines.append(f"  {stage:<6} peak_rss={stats.peak_rss_mb:.1f} MB{traced} samples={stats.samples}")
+        for allocation in self.top_allocations:
+            lines.append(f"  {allocation}")
+        return "\n".join(lines)
+
+_active: Optional[MemoryBudget] = None
+
+def enable_memory_budget(budget: Optional[MemoryBudget] = None) -> MemoryBudget:
+    """Apply a memory budget to every pipeline created from now on"""
+    global _active
+    _active = budget or MemoryBudget()
+    return _active
+
+def disable_memory_budget() -> Optional[MemoryBudget]:
+    """Stop applying the memory budget and return the budget that was active"""
+    global _active
+    budget, _active = _active, None
+    return budget
+
+def active_memory_budget() -> Optional[MemoryBudget]:
+    return _active
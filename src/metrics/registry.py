@@ -0,0 +1,173 @@
+import bisect
+import contextvars
+import itertools
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from typing import Deque, Dict, Generator, Optional, Tuple
+from config import METRICS_MAX_SPANS
+
+# Upper bounds (seconds) of the duration histogram buckets
+DEFAULT_BUCKETS: Tuple[float, ...] = (
+    0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, float("inf")
+)
+
+LabelKey = Tuple[Tuple[str, str], ...]
+
+def _label_key(labels: Dict[str, object]) -> LabelKey:
+    return tuple(sorted((name, str(value)) for name, value in labels.items()))
+
+class Counter:
+    """Monotonically increasing count"""
+
+    def __init__(self, name: str, labels: LabelKey, lock: threading.Lock):
+        self.name = name
+        self.labels = labels
+        self.value = 0
+        self._lock = lock
+
+    def inc(self, amount: int = 1) -> None:
+        with self._lock:
+            self.value += amount
+
+class Histogram:
+    """Distribution of observed values (durations in seconds)"""
+
+    def __init__(self, name: str, labels: LabelKey, lock: threading.Lock,
+                 buckets: Tuple[float, ...] = DEFAULT_BUCKETS):
+        self.name = name
+        self.labels = labels
+        self.buckets = buckets
+        self.bucket_counts = [0] * len(buckets)
+        self.count = 0
+        self.sum = 0.0
+        self.max = 0.0
+        self._lock = lock
+
+    def observe(self, value: float) -> None:
+        with self._lock:
+            self.bucket_counts[bisect.bisect_left(self.buckets, value)] += 1
+            self.count += 1
+            self.sum += value
+            self.max = max(self.max, value)
+
+    @property
+    def mean(self) -> float:
+        return self.sum / self.count if self.count else 0.0
+
+@dataclass
+class Span:
+    """One timed operation within a run"""
+    id: int
+    name: str
+    labels: Dict[str, str]
+    parent_id: Optional[int]
+    start: float  # seconds since the run started
+    duration: Optional[float] = None
+    error: Optional[str] = None
+
+_current_span: contextvars.ContextVar[Optional[int]] = contextvars.ContextVar("current_span", default=None)
+
+@dataclass
+class MetricsRegistry:
+    """
+    Counters, histograms and spans for a scrape run.
+
+    Safe to use from the event loop and from worker threads (such as the
+    background DB writer). Only the latest METRICS_MAX_SPANS spans are kept,
+    so long-running processes (the bot, a cluster coordinator) stay bounded;
+    histograms still count every timed block.
+    """
+    counters: Dict[Tuple[str, LabelKey], Counter] = field(default_factory=dict)
+    histograms: Dict[Tuple[str, LabelKey], Histogram] = field(default_factory=dict)
+    spans: Deque[Span] = field(default_factory=lambda: deque(maxlen=METRICS_MAX_SPANS))
+    dropped_spans: int = 0
+    started_at: float = field(default_factory=time.time)
+    _started_perf: float = field(default_factory=time.perf_counter)
+    _lock: threading.Lock = field(default_factory=threading.Lock)
+    _span_ids: itertools.count = field(default_factory=lambda: itertools.count(1))
+
+    def reset(self) -> None:
+        """Forget everything recorded so far and start a new run"""
+        with self._lock:
+            self.counters.clear()
+            self.histograms.clear()
+            self.spans.clear()
+            self.dropped_spans = 0
+            self.started_at = time.time()
+            self._started_perf = time.perf_counter()
+
+    def counter(self, name: str, **labels) -> Counter:
+        key = (name, _label_key(labels))
+        with self._lock:
+            if key not in self.counters:
+                self.counters[key] = Counter(name, key[1], threading.Lock())
+            return self.counters[key]
+
+    def histogram(self, name: str, **labels) -> Histogram:
+        key = (name, _label_key(labels))
+        with self._lock:
+            if key not in self.histograms:
+                self.histograms[key] = Histogram(name, key[1], threading.Lock())
+            return self.histograms[key]
+
+    @contextmanager
+    def span(self, name: str, **labels) -> Generator[Span, None, None]:
+        """Record a span; spans opened inside it (same task or thread) become its children"""
+        span = Span(
+            id=next(self._span_ids),
+            name=name,
+            labels={key: str(value) for key, value in labels.items()},
+            parent_id=_current_span.get(),
+            start=time.perf_counter() - self._started_perf,
+        )
+        with self._lock:
+            if len(self.spans) == self.spans.maxlen:
+                self.dropped_spans += 1
+            self.spans.append(span)
+        token = _current_span.set(span.id)
+        try:
+            yield span
+        except BaseException as e:
+            span.error = type(e).__name__
+            raise
+        finally:
+            _current_span.reset(token)
+            span.duration = time.perf_counter() - self._started_perf - span.start
+
+    @contextmanager
+    def timer(self, name: str, **labels) -> Generator[Span, None, None]:
+        """Time a block into the `name` histogram and record it as a span"""
+        with self.span(name, **labels) as span:
+            try:
+                yield span
+            finally:
+                self.histogram(f"{name}_seconds", **labels).observe(
+                    time.perf_counter() - self._started_perf - span.start
+                )
+
+    def counter_total(self, name: str) -> int:
+        """Sum of a counter across all label sets"""
+        return sum(counter.value for (counter_name, _), counter in self.counters.items() if counter_name == name)
+
+    def summary(self) -> str:
+        """Human readable run summary"""
+        elapsed = time.perf_counter() - self._started_perf
+        lines = [f"Run summary ({elapsed:.1f}s):"]
+
+        if self.histograms:
+            lines.append("  Timings:")
+            for (name, labels), histogram in sorted(self.histograms.items()):
+                label_text = ",".join(f"{key}={value}" for key, value in labels)
+                lines.append(
+                    f"    {name:<24} {label_text:<28} n={histogram.count:<5} "
+                    f"total={histogram.sum:7.2f}s mean={histogram.mean:6.2f}s max={histogram.max:6.2f}s"
+                )
+        if self.counters:
+            lines.append("  Counters:")
+            for (name, labels), counter in sorted(self.counters.items()):
+                label_text = ",".join(f"{key}={value}" for key, value in labels)
+                lines.append(f"    {name:<24} {label_text:<28} {counter.value}")
+        return "\n".join(lines)
@@ -1,4 +1,10 @@
-from . import automated
-from . import interactive
+# Modes are imported on first attribute access so that commands which never
+# scrape do not pay for the processing chain.
+import importlib
 
-__all__ = ['automated', 'interactive'] 
\ No newline at end of file
+__all__ = ['automated', 'interactive', 'parallel', 'bot']
+
+def __getattr__(name):
+    if name in __all__:
+        return importlib.import_module(f".{name}", __name__)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
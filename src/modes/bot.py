@@ -0,0 +1,130 @@
+import asyncio
+import html
+from typing import Optional
+from config import TELEGRAM_BOT_TOKEN, BOT_CACHE_SIZE, BOT_CACHE_TTL, BOT_RESULT_LIMIT, SNAPSHOT_DIR
+from metrics import metrics
+from storage.cache import QueryCache
+from storage.db import Database, Product
+
+DEFAULT_DB_PATH = "src/data/products.db"
+
+HELP_TEXT = (
+    "<b>Tech Product Tracker</b>\n"
+    "/price &lt;term&gt; - current prices of matching products\n"
+    "/history &lt;product&gt; - price history of the best matching product\n"
+    "/lowest &lt;category&gt; - cheapest matching products"
+)
+
+class ProductLookup:
+    """
+    Answers bot queries from the product database as Telegram HTML messages.
+    Lookups go through the products_fts index, and answers for hot queries
+    are kept in a small cache. The bot runs apart from the scraper, so
+    entries simply expire after BOT_CACHE_TTL seconds.
+
+    With a snapshot directory, queries read the newest snapshot (see
+    Database.snapshot) rather than the file the scraper is writing.
+    """
+
+    def __init__(self, db_path: str = DEFAULT_DB_PATH, limit: int = BOT_RESULT_LIMIT,
+                 cache: Optional[QueryCache] = None, snapshot_dir: Optional[str] = None):
+        """
+        Args:
+            db_path: Path of the SQLite database
+            limit: Products listed per answer
+            cache: Answer cache (defaults to BOT_CACHE_SIZE entries for BOT_CACHE_TTL seconds)
+            snapshot_dir: Read the latest snapshot in this directory, falling back to db_path
+        """
+        self.db = Database(db_path)
+        self.limit = limit
+        self.cache = cache or QueryCache(BOT_CACHE_SIZE, BOT_CACHE_TTL)
+        self.snapshot_dir = snapshot_dir
+
+    def _database(self) -> Database:
+        # Resolved per query, so a newer snapshot is picked up as soon as it exists
+        if self.snapshot_dir:
+            snapshot = Database.open_latest_snapshot(self.snapshot_dir)
+            if snapshot is not None:
+                return snapshot
+        return self.db
+
+    def answer(self, command: str, text: str) -> str:
+        """Answer a /price, /history or /lowest query"""
+        handler = {"price": self.price, "history": self.history, "lowest": self.lowest}[command]
+        text = " ".join(text.split()).lower()
+        if not text:
+            return f"Usage: /{command} &lt;search term&gt;"
+        with metrics.timer("bot_query", command=command):
+            return self.cache.get_or_load((f"bot.{command}", text), (), lambda: handler(text))
+
+    def price(self, text: str) -> str:
+        products = self._database().products.search_products(text, limit=self.limit, fuzzy=True)
+        if not products:
+            return f"No products found for <i>{html.escape(text)}</i>"
+        lines = [f"<b>Prices for {html.escape(text)}</b>"]
+        lines.extend(_product_line(product) for product in products)
+        return "\n".join(lines)
+
+    def history(self, text: str) -> str:
+        queries = self._database().products
+        products = queries.search_products(text, limit=1, fuzzy=True)
+        if not products:
+            return f"No products found for <i>{html.escape(text)}</i>"
+        product = products[0]
+        history = queries.get_price_history(product.id)
+        stats = queries.get_price_statistics_batch([product.id]).get(product.id)
+
+        lines = [_product_line(product)]
+        if stats:
+            lines.append(f"Lowest ${stats['lowest_price']:,.2f} / highest ${stats['highest_price']:,.2f} / "
+                         f"average ${stats['avg_price']:,.2f} over {stats['points']} prices")
+        lines.extend(f"{entry.recorded_at:%Y-%m-%d}: ${entry.price:,.2f}" for entry in history[:10])
+        if not history:
+            lines.append("No price changes recorded yet")
+        return "\n".join(lines)
+
+    def lowest(self, text: str) -> str:
+        products = self._database().products.get_lowest_priced(text, limit=self.limit)
+        if not products:
+            return f"No products found for <i>{html.escape(text)}</i>"
+        lines = [f"<b>Cheapest {html.escape(text)}</b>"]
+        lines.extend(_product_line(product) for product in products)
+        return "\n".join(lines)
+
+def _product_line(product: Product) -> str:
+    change = ""
+    if product.price_change_percentage:
+        change = f" ({product.price_change_percentage:+.1f}%)"
+    return (f"<a href=\"{html.escape(product.link, quote=True)}\">{html.escape(product.name)}</a> - "
+            f"${product.price:,.2f}{change} at {html.escape(product.store.title())}")
+
+def build_application(token: str, lookup: ProductLookup):
+    """Create the Telegram application with a handler per bot command"""
+    # python-telegram-bot is only imported by the bot command
+    from telegram import LinkPreviewOptions
+    from telegram.ext import Application, CommandHandler
+
+    def reply_with(command: str):
+        async def handle(update, context) -> None:
+            text = await asyncio.to_thread(lookup.answer, command, " ".join(context.args))
+            await update.message.reply_text(text, parse_mode="HTML",
+                                            link_preview_options=LinkPreviewOptions(is_disabled=True))
+        return handle
+
+    async def help_command(update, context) -> None:
+        await update.message.reply_text(HELP_TEXT, parse_mode="HTML")
+
+    application = Application.builder().token(token).build()
+    for command in ("price", "history", "lowest"):
+        application.add_handler(CommandHandler(command, reply_with(command)))
+    application.add_handler(CommandHandler(["start", "help"], help_command))
+    return application
+
+def run(token: Optional[str] = TELEGRAM_BOT_TOKEN, db_path: str = DEFAULT_DB_PATH,
+        use_snapshots: bool = False) -> None:
+    """Answer bot queries until interrupted (blocking)."""
+    if not token:
+        raise SystemExit("TELEGRAM_BOT_TOKEN is not set")
+    lookup = ProductLookup(db_path, snapshot_dir=SNAPSHOT_DIR if use_snapshots else None)
+    print("Bot is running; press Ctrl+C to stop")
+    build_application(token, lookup).run_polling()
@@ -0,0 +1,56 @@
+import asyncio
+from typing import Dict, List, Optional, Tuple
+from processing.pipeline import Pipeline, CsvExportSubscriber
+from storage.db import JobLedger
+from stores import get_adapter
+
+async def process_store(store: str, search_params: List[Optional[str]],
+                        ledger: Optional[JobLedger] = None) -> List[Tuple[str, Optional[str], str]]:
+    """Stream a store's searches through its pipeline and return (file_name, search_param, store) for each export"""
+    adapter = get_adapter(store)
+    if adapter is None:
+        print(f"Handler for {store} not implemented yet")
+        return []
+
+    if not adapter.has_search_params:
+        search_params = [None]
+
+    for search_param in search_params:
+        if search_param:
+            print(f"\nProcessing {store.title()} for {search_param}...")
+        else:
+            print(f"\nProcessing {store.title()}...")
+
+    pipeline = Pipeline.for_adapter(adapter, ledger=ledger)
+    exporter = pipeline.subscribe(CsvExportSubscriber())
+    await pipeline.run(search_params)
+    await exporter.finish()
+    print(pipeline.report())
+
+    for file_name, _, _ in exporter.files:
+        print(f"Data written to src/data/{file_name}")
+    return exporter.files
+
+async def run_stores(jobs: Dict[str, List[Optional[str]]],
+                     ledger: Optional[JobLedger] = None) -> List[Tuple[str, Optional[str], str]]:
+    """
+    Process several stores concurrently
+    Args:
+        jobs: Store key -> search parameters to run for it
+        ledger: Job ledger recording each page, so an interrupted run can be resumed
+    Returns:
+        List of (file_name, search_param, store) for every written export
+    """
+    results = await asyncio.gather(
+        *(process_store(store, search_params, ledger) for store, search_params in jobs.items()),
+        return_exceptions=True
+    )
+
+    processed_files = []
+    for store, result in zip(jobs, results):
+        if isinstance(result, BaseException):
+            # One store failing should not throw away the others' results
+            print(f"Failed to process {store.title()}: {result}")
+            continue
+        processed_files.extend(result)
+    return processed_files
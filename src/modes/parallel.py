@@ -0,0 +1,315 @@
+import asyncio
+import hashlib
+import multiprocessing
+import queue
+import traceback
+import zlib
+from typing import AsyncIterator, Dict, Iterable, List, Optional, Set, Tuple
+
+from config import (
+    PARALLEL_WORKERS, PARALLEL_SHARDING, PARALLEL_JOB_RETRIES, DB_WRITE_BATCH_SIZE, DB_WRITE_LINGER,
+    EXPORT_MODE, EXPORT_DELTA_DIR
+)
+from storage.csv_writer import FOLDER_PATH
+
+# A job is one search on one store
+Job = Tuple[str, Optional[str]]
+
+SHARDING_STRATEGIES = ("round_robin", "by_store", "hash")
+
+DB_PATH = "src/data/products.db"
+
+# Seconds between checks that the writer process is still alive while waiting on it
+WRITER_POLL_INTERVAL = 0.5
+
+def shard_jobs(jobs: List[Job], workers: int, strategy: str = PARALLEL_SHARDING) -> List[List[Job]]:
+    """
+    Split jobs between workers
+    Args:
+        jobs: (store, search_param) pairs
+        workers: Number of worker processes
+        strategy: 'round_robin' spreads jobs evenly; 'by_store' keeps each store on
+            one worker so its politeness limits hold across processes; 'hash' pins a
+            job to the same worker on every run
+    """
+    if strategy not in SHARDING_STRATEGIES:
+        raise ValueError(f"Unknown sharding strategy {strategy!r}, expected one of {SHARDING_STRATEGIES}")
+
+    shards: List[List[Job]] = [[] for _ in range(max(workers, 1))]
+    if strategy == "round_robin":
+        for index, job in enumerate(jobs):
+            shards[index % len(shards)].append(job)
+    elif strategy == "by_store":
+        stores = list(dict.fromkeys(store for store, _ in jobs))
+        for store, search_param in jobs:
+            shards[stores.index(store) % len(shards)].append((store, search_param))
+    else:
+        for job in jobs:
+            shards[zlib.crc32(repr(job).encode()) % len(shards)].append(job)
+    return [shard for shard in shards if shard]
+
+# --------------------
+# Worker processes
+# --------------------
+
+async def fetch_job_pages(store: str, search_param: Optional[str], controllers: Dict,
+                          skip_pages: Iterable[int] = (),
+                          exhausted_page: Optional[int] = None) -> AsyncIterator[Tuple[int, Optional[List[Dict]]]]:
+    """
+    Fetch and parse every page of one job, yielding (page, products), and
+    (page, None) for the first page past the search's last results page
+    Args:
+        store: Store key
+        search_param: Search term (None for stores without search parameters)
+        controllers: Store key -> FetchController, shared by the caller's jobs
+        skip_pages: Pages already stored, which are not fetched again
+        exhausted_page: Page already found past the last results page; it and later pages are not fetched
+    """
+    from fetchers.controller import FetchController
+    from stores import get_adapter
+
+    adapter = get_adapter(store)
+    if adapter is None:
+        raise ValueError(f"Handler for {store} not implemented yet")
+    # One controller per store and worker, shared by the worker's jobs
+    controller = controllers.setdefault(store, FetchController.for_adapter(adapter))
+
+    skip_pages = set(skip_pages)
+    last_page = min(adapter.max_pages, exhausted_page - 1) if exhausted_page else adapter.max_pages
+    for page in range(1, last_page + 1):
+        if page in skip_pages:
+            continue
+        content = await controller.call(adapter.fetch, search_param, page)
+        if content is None:
+            yield page, None
+            break
+        yield page, list(adapter.parser(content))
+        if adapter.request_delay:
+            await asyncio.sleep(adapter.request_delay)
+
+async def _fetch_job(store: str, search_param: Optional[str], results, controllers: Dict) -> int:
+    """Fetch and parse every page of one job, sending each page's products to the writer"""
+    product_count = 0
+    async for page, products in fetch_job_pages(store, search_param, controllers):
+        if products is None:
+            break
+        product_count += len(products)
+        results.put(("products", store, search_param, (page, products)))
+    return product_count
+
+def _worker_main(worker_id: int, jobs: List[Job], results, status) -> None:
+    """
+    Entry point of a fetch/parse worker process. A job that raises is reported
+    failed rather than retried: its FetchController already retried every page.
+    """
+    async def run_jobs():
+        controllers = {}
+        for store, search_param in jobs:
+            try:
+                count = await _fetch_job(store, search_param, results, controllers)
+            except Exception as e:
+                print(f"[worker {worker_id}] {store}/{search_param} failed: {e}")
+                status.put(("failed", store, search_param, f"{type(e).__name__}: {e}"))
+            else:
+                results.put(("done", store, search_param, count))
+                status.put(("done", store, search_param, count))
+
+    asyncio.run(run_jobs())
+
+# --------------------
+# Writer process
+# --------------------
+
+def _writer_main(results, summary, db_path: str, batch_size: int, linger: float,
+                 export_mode: str = EXPORT_MODE, folder_path: str = FOLDER_PATH,
+                 delta_folder: str = EXPORT_DELTA_DIR) -> None:
+    """
+    Entry point of the single process allowed to write to SQLite; exports each store once at the end.
+    Every page is stored under its own job in the run's ledger, so a page sent
+    again by a job re-run after a worker crash is skipped, and jobs that failed
+    leave the run incomplete.
+    """
+    pending: List[Tuple[int, List, str]] = []  # (ledger job id, products, fingerprint) per page
+    pending_products = 0
+    completed: List[Job] = []
+    written = 0
+
+    try:
+        from storage.db import Database, Product
+        from storage.delta_export import export_completed
+
+        db = Database(db_path)
+        ledger = db.open_ledger()
+
+        def flush(conn) -> None:
+            nonlocal written, pending, pending_products
+            if pending:
+                for job_id, products, _ in pending:
+                    db.products.upsert_products_in_transaction(products, conn, job_id=job_id)
+                conn.commit()
+                for job_id, products, fingerprint in pending:
+                    ledger.complete_job(job_id, len(products), fingerprint)
+                written += pending_products
+                pending, pending_products = [], 0
+
+        with db.connection.get_connection() as conn:
+            while True:
+                try:
+                    message = results.get(timeout=linger)
+                except queue.Empty:
+                    flush(conn)
+                    continue
+                if message is None:
+                    break
+
+                kind, store, search_param, payload = message
+                if kind == "products":
+                    page, products = payload
+                    ledger_job = ledger.start_job(store, search_param, page)
+                    if ledger_job.finished:
+                        continue
+                    digest = hashlib.sha1()
+                    for product in products:
+                        digest.update(f"{product.get('name')}\x1f{product.get('price')}\n".encode())
+                    pending.append((ledger_job.id, [
+                        Product.from_dict({**product, 'store': store, 'price_change_percentage': 0})
+                        for product in products
+                    ], digest.hexdigest()))
+                    pending_products += len(products)
+                    if pending_products >= batch_size:
+                        flush(conn)
+                elif kind == "done":
+                    completed.append((store, search_param))
+                elif kind == "failed":
+                    ledger.fail_search(store, search_param, payload)
+            flush(conn)
+        ledger.finish()
+
+        processed_files = export_completed(db, completed, export_mode, folder_path, delta_folder)
+        summary.put(("ok", processed_files, written))
+    except Exception:
+        summary.put(("error", traceback.format_exc(), written))
+
+# --------------------
+# Coordinator
+# --------------------
+
+def _check_writer(writer, summary, processes) -> None:
+    """Stop the workers and raise if the writer died: they would block on the full results queue"""
+    if writer.is_alive():
+        return
+    for process in processes:
+        if process.is_alive():
+            process.terminate()
+    for process in processes:
+        process.join()
+    try:
+        _, detail, _ = summary.get(timeout=WRITER_POLL_INTERVAL)
+    except queue.Empty:
+        detail = f"exit code {writer.exitcode}"
+    raise RuntimeError(f"Writer process failed:\n{detail}")
+
+def run_jobs(jobs: List[Job], workers: int = PARALLEL_WORKERS, strategy: str = PARALLEL_SHARDING,
+             retries: int = PARALLEL_JOB_RETRIES, db_path: str = DB_PATH) -> List[Tuple[str, Optional[str], str]]:
+    """
+    Fetch and parse jobs across worker processes and persist them through one writer process
+    Args:
+        jobs: (store, search_param) pairs
+        workers: Number of fetch/parse worker processes
+        strategy: Sharding strategy (see shard_jobs)
+        retries: Rounds re-running jobs lost to a crashed worker (failed fetches are retried per page
+            by the workers' FetchControllers, not here)
+        db_path: SQLite database the writer process owns
+    Returns:
+        List of (file_name, search_param, store) for every written export
+    """
+    ctx = multiprocessing.get_context("spawn")
+    results = ctx.Queue(maxsize=workers * 4)  # bounded, so slow writes hold back the workers
+    summary = ctx.Queue()
+    status = ctx.Queue()
+
+    writer = ctx.Process(target=_writer_main, name="db-writer",
+                         args=(results, summary, db_path, DB_WRITE_BATCH_SIZE, DB_WRITE_LINGER))
+    writer.start()
+
+    finished: Set[Job] = set()
+    failures: Dict[Job, str] = {}
+    remaining = list(jobs)
+    for round_number in range(retries + 1):
+        if not remaining:
+            break
+        if round_number:
+            print(f"Re-running {len(remaining)} job(s) lost to crashed workers...")
+
+        processes = [
+            ctx.Process(target=_worker_main, name=f"fetch-worker-{index}",
+                        args=(index, shard, results, status))
+            for index, shard in enumerate(shard_jobs(remaining, workers, strategy))
+        ]
+        print(f"Starting {len(processes)} worker(s) for {len(remaining)} job(s)")
+        for process in processes:
+            process.start()
+
+        # Drain status while waiting so workers never block on a full pipe
+        while any(process.is_alive() for process in processes) or not status.empty():
+            _check_writer(writer, summary, processes)
+            try:
+                kind, store, search_param, detail = status.get(timeout=0.5)
+            except queue.Empty:
+                continue
+            if kind == "done":
+                finished.add((store, search_param))
+                print(f"{store.title()} / {search_param}: {detail} products")
+            else:
+                failures[(store, search_param)] = detail
+                print(f"{store.title()} / {search_param} failed: {detail}")
+        for process in processes:
+            process.join()
+
+        remaining = [job for job in remaining if job not in finished and job not in failures]
+
+    for store, search_param in remaining:
+        failures[(store, search_param)] = "worker process crashed"
+
+    # Failures go to the writer's ledger, then None stops it
+    messages = [("failed", store, search_param, error) for (store, search_param), error in failures.items()]
+    for message in messages + [None]:
+        while True:
+            _check_writer(writer, summary, [])
+            try:
+                results.put(message, timeout=WRITER_POLL_INTERVAL)
+                break
+            except queue.Full:
+                continue
+    while True:
+        exited = not writer.is_alive()
+        try:
+            outcome, detail, written = summary.get(timeout=WRITER_POLL_INTERVAL)
+            break
+        except queue.Empty:
+            if exited:
+                raise RuntimeError(f"Writer process exited without a summary (exit code {writer.exitcode})")
+    writer.join()
+    if outcome == "error":
+        raise RuntimeError(f"Writer process failed:\n{detail}")
+
+    print(f"Wrote {written} products from {len(finished)} job(s); {len(failures)} failed")
+    return detail
+
+def default_jobs() -> List[Job]:
+    """(store, search_param) jobs of an automated run"""
+    from .automated import DEFAULT_STORES, DEFAULT_SEARCH_PARAMS
+    from stores import get_adapter
+
+    jobs: List[Job] = []
+    for store in DEFAULT_STORES:
+        adapter = get_adapter(store)
+        if adapter is not None and not adapter.has_search_params:
+            jobs.append((store, None))
+        else:
+            jobs.extend((store, search_param) for search_param in DEFAULT_SEARCH_PARAMS.get(store, []))
+    return jobs
+
+async def run(workers: Optional[int] = None) -> List[Tuple[str, Optional[str], str]]:
+    """Run the automated default jobs across a process pool."""
+    return await asyncio.to_thread(run_jobs, default_jobs(), workers or PARALLEL_WORKERS)
@@ -0,0 +1,36 @@
+from bs4 import BeautifulSoup
+from typing import Dict, Iterator, List
+
+BASE_URL = "https://www.bhphotovideo.com"
+
+def iter_bh_html(beautiful_soup_object: BeautifulSoup) -> Iterator[Dict]:
+    """Yield products from a B&H search results page one card at a time"""
+    product_cards = beautiful_soup_object.find_all("div", attrs={"data-selenium": "miniProductPage"})
+
+    for product_card in product_cards:
+        name_link = product_card.find("a", attrs={"data-selenium": "miniProductPageProductNameLink"})
+        price_whole = product_card.find("span", attrs={"data-selenium": "uppedDecimalPriceFirst"})
+        # Cards without a price are out of stock or "see price in cart"
+        if name_link is None or price_whole is None:
+            continue
+
+        price_cents = product_card.find("sup", attrs={"data-selenium": "uppedDecimalPriceSecond"})
+        product_price = price_whole.text.strip().rstrip(".")
+        if price_cents is not None:
+            product_price = f"{product_price}.{price_cents.text.strip()}"
+
+        product_link = name_link["href"]
+        if product_link.startswith("/"):
+            product_link = BASE_URL + product_link
+
+        image = product_card.find("img", attrs={"data-selenium": "miniProductPageImg"})
+
+        yield {
+            "name": name_link.text.strip(),
+            "price": product_price,
+            "link": product_link,
+            "image": image["src"] if image is not None else ""
+        }
+
+def parse_bh_html(beautiful_soup_object: BeautifulSoup) -> List[Dict]:
+    return list(iter_bh_html(beautiful_soup_object))
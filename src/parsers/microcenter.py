@@ -1,7 +1,8 @@
 from bs4 import BeautifulSoup
+from typing import Dict, Iterator, List
 
-def parse_microcenter_html(beautiful_soup_object: BeautifulSoup) -> dict:
-    data = []
+def iter_microcenter_html(beautiful_soup_object: BeautifulSoup) -> Iterator[Dict]:
+    """Yield products one card at a time so downstream stages can start before the page is done"""
     # Get all the product cards
     product_cards_container = beautiful_soup_object.find("article", id="productGrid")
     product_cards = product_cards_container.find_all("li", class_="product_wrapper")
@@ -14,11 +15,12 @@ def parse_microcenter_html(beautiful_soup_object: BeautifulSoup) -> dict:
         product_link = "https://www.microcenter.com" + product_link
         product_image = product_card.find("div", class_="result_left").find("img")["src"]
 
-        data.append({
+        yield {
             "name": product_name,
             "price": product_price,
             "link": product_link,
             "image": product_image
-        })
+        }
 
-    return data
\ No newline at end of file
+def parse_microcenter_html(beautiful_soup_object: BeautifulSoup) -> List[Dict]:
+    return list(iter_microcenter_html(beautiful_soup_object))
\ No newline at end of file
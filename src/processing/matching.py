@@ -0,0 +1,188 @@
+import re
+from dataclasses import dataclass, field
+from typing import Dict, FrozenSet, List, Optional
+from config import MATCH_MIN_SCORE
+from metrics import metrics
+
+# Brands recognised at any position in a title
+BRANDS = frozenset({
+    "acer", "amd", "apple", "asrock", "asus", "be quiet", "corsair", "crucial", "dell", "evga",
+    "gigabyte", "hp", "intel", "kingston", "lenovo", "lg", "logitech", "msi", "noctua", "nvidia",
+    "nzxt", "pny", "razer", "samsung", "sapphire", "seagate", "sk hynix", "sony", "teamgroup",
+    "western digital", "wd", "xfx", "zotac",
+})
+
+# Words that turn one model into another ("RTX 4070" vs "RTX 4070 Ti SUPER")
+MODEL_QUALIFIERS = frozenset({
+    "ti", "super", "xt", "xtx", "x3d", "pro", "max", "plus", "ultra", "mini", "air", "evo", "gre",
+})
+
+# Memory types, bus and interface versions and timings: they describe a model
+# ("GDDR6X", "PCIe Gen4", "DDR5 CL30") but sellers leave them out of titles,
+# so they are scored as words rather than required to match
+SPEC_TOKEN = re.compile(r"^(?:lp)?g?ddr\d+[a-z]?$|^gen\d+$|^cl\d+$|^pcie\d*$|^usb\d*$|^sata\d*$|^x\d+$")
+
+_CAPACITY = re.compile(r"\b(\d+(?:\.\d+)?)\s*(tb|gb|mb)\b")
+# "PCIe 4.0" is written "PCIe Gen4" just as often; "M.2" is also "M2"
+_PCIE_VERSION = re.compile(r"\bpcie\s*(?:gen\s*)?(\d)(?:\.0)?\b")
+_M2 = re.compile(r"\bm\.2\b")
+_TOKEN = re.compile(r"[a-z0-9]+")
+# "rtx4070" -> "rtx 4070", leaving "7900x3d" and "i7" alone
+_GLUED_MODEL = re.compile(r"\b([a-z]{2,})(\d{3,}[a-z0-9]*)\b")
+
+@dataclass(frozen=True)
+class TitleSignature:
+    """The parts of a listing title that identify the product"""
+    brand: Optional[str]
+    # Model numbers plus model qualifiers; equal for the same product
+    models: FrozenSet[str]
+    # Storage/memory sizes, normalised like "16gb"
+    capacities: FrozenSet[str]
+    tokens: FrozenSet[str] = field(default_factory=frozenset)
+
+    @property
+    def model_key(self) -> str:
+        """Blocking key (core model numbers and qualifiers): only products with the same key are ever compared"""
+        return " ".join(sorted(self.models)) if any(any(c.isdigit() for c in m) for m in self.models) else ""
+
+def _is_model_token(token: str) -> bool:
+    # Short numbers are interface versions and form factors ("PCIe 4.0", "M.2"), not models
+    if SPEC_TOKEN.match(token):
+        return False
+    return (len(token) >= 3 and any(c.isdigit() for c in token)) or token in MODEL_QUALIFIERS
+
+def normalise_title(name: str) -> TitleSignature:
+    """Break a listing title into brand, model, capacity and word tokens"""
+    text = name.lower()
+    capacities = frozenset(f"{float(size):g}{unit}" for size, unit in _CAPACITY.findall(text))
+    text = _M2.sub("m2", _PCIE_VERSION.sub(r"pcie gen\1", text))
+    text = _GLUED_MODEL.sub(r"\1 \2", _CAPACITY.sub(" ", text))
+    tokens = _TOKEN.findall(text)
+
+    joined = f" {' '.join(tokens)} "
+    brand = next((brand for brand in sorted(BRANDS, key=len, reverse=True) if f" {brand} " in joined), None)
+    models = frozenset(token for token in tokens if _is_model_token(token))
+    return TitleSignature(brand, models, capacities, frozenset(tokens) | capacities)
+
+def match_score(a: TitleSignature, b: TitleSignature) -> float:
+    """
+    Similarity of two signatures between 0 and 1. Conflicting brands,
+    capacities or models score 0; otherwise the word-token Jaccard index.
+    """
+    if a.models != b.models or not a.model_key:
+        return 0.0
+    if a.brand and b.brand and a.brand != b.brand:
+        return 0.0
+    if a.capacities and b.capacities and a.capacities != b.capacities:
+        return 0.0
+    union = a.tokens | b.tokens
+    return len(a.tokens & b.tokens) / len(union) if union else 0.0
+
+def _stored_signature(row, models: FrozenSet[str]) -> TitleSignature:
+    """Rebuild a signature from a product_signatures row found by its model key"""
+    return TitleSignature(row['brand'], models, frozenset(row['capacities'].split()),
+                          frozenset(row['tokens'].split()))
+
+@dataclass
+class MatchReport:
+    signed: int = 0
+    matched: int = 0
+    groups_created: int = 0
+    groups_merged: int = 0
+
+    def __str__(self) -> str:
+        return (f"Matched {self.matched} of {self.signed} new listings "
+                f"({self.groups_created} groups created, {self.groups_merged} merged)")
+
+class ProductMatcher:
+    """
+    Groups listings of the same product across stores.
+
+    Each product gets a title signature once. A new product is only compared
+    with products from other stores that share its model key (an indexed
+    lookup), and joins the group of its best match per store. A group holds
+    at most one listing per store.
+    """
+
+    def __init__(self, db, min_score: float = MATCH_MIN_SCORE):
+        """
+        Args:
+            db: Database to match in
+            min_score: Lowest match_score accepted as the same product
+        """
+        self.db = db
+        self.min_score = min_score
+
+    def match_new_products(self, rebuild: bool = False) -> MatchReport:
+        """
+        Sign and match every product that has no signature yet
+        Args:
+            rebuild: Drop existing signatures and groups and match everything again
+        """
+        report = MatchReport()
+        groups = self.db.groups
+        with metrics.timer("match"), self.db.connection.transaction() as conn:
+            if rebuild:
+                groups.clear(conn)
+            products = groups.get_unsigned_products(conn)
+            signatures = {row['id']: normalise_title(row['name']) for row in products}
+            groups.save_signatures(conn, (
+                (product_id, sig.brand, sig.model_key, " ".join(sorted(sig.capacities)), " ".join(sorted(sig.tokens)))
+                for product_id, sig in signatures.items()
+            ))
+            report.signed = len(products)
+
+            for row in products:
+                signature = signatures[row['id']]
+                if signature.model_key:
+                    self._match_product(conn, row['id'], row['store'], signature, report)
+        metrics.counter("products_matched").inc(report.matched)
+        return report
+
+    def _match_product(self, conn, product_id: int, store: str, signature: TitleSignature,
+                       report: MatchReport) -> None:
+        groups = self.db.groups
+        # Best candidate per other store
+        best: Dict[str, tuple] = {}
+        for candidate in groups.get_candidates(conn, signature.model_key, store):
+            score = match_score(signature, _stored_signature(candidate, signature.models))
+            if score >= self.min_score and score > best.get(candidate['store'], (0.0,))[0]:
+                best[candidate['store']] = (score, candidate['product_id'])
+
+        for score, candidate_id in sorted(best.values(), reverse=True):
+            group_id = groups.get_group_id(conn, product_id)
+            candidate_group = groups.get_group_id(conn, candidate_id)
+            if group_id is not None and group_id == candidate_group:
+                continue
+            if group_id is None and candidate_group is None:
+                group_id = groups.create_group(conn, signature.model_key)
+                groups.add_member(conn, group_id, candidate_id, score)
+                groups.add_member(conn, group_id, product_id, score)
+                report.groups_created += 1
+            elif group_id is None:
+                if store in groups.get_group_stores(conn, candidate_group):
+                    continue
+                groups.add_member(conn, candidate_group, product_id, score)
+            elif candidate_group is None:
+                if self._store_of(conn, candidate_id) in groups.get_group_stores(conn, group_id):
+                    continue
+                groups.add_member(conn, group_id, candidate_id, score)
+            else:
+                if groups.get_group_stores(conn, group_id) & groups.get_group_stores(conn, candidate_group):
+                    continue
+                groups.merge_groups(conn, min(group_id, candidate_group), max(group_id, candidate_group))
+                report.groups_merged += 1
+            report.matched += 1
+
+    @staticmethod
+    def _store_of(conn, product_id: int) -> str:
+        return conn.execute("SELECT store FROM products WHERE id = ?", (product_id,)).fetchone()['store']
+
+def cheapest_offers_report(db, limit: int = 20) -> List[str]:
+    """Lines describing the cheapest offer of each matched product"""
+    lines = []
+    for offer in db.groups.get_cheapest_offers(limit):
+        product = offer['product']
+        lines.append(f"{product.name}: ${product.price:,.2f} at {product.store.title()} "
+                     f"({offer['offers']} offers, saves ${offer['savings']:,.2f})")
+    return lines
@@ -0,0 +1,414 @@
+import asyncio
+import hashlib
+import time
+from dataclasses import dataclass
+from typing import Any, Awaitable, Callable, Dict, Iterable, List, Optional, Tuple
+
+from config import EXPORT_MODE, PIPELINE_BATCH_SIZE, PIPELINE_PAGE_QUEUE_SIZE, PIPELINE_PRODUCT_QUEUE_SIZE
+from fetchers.controller import FetchController
+from metrics import MemoryBudget, active_memory_budget, metrics
+from storage.csv_writer import write_to_csv
+from storage.delta_export import export_changes, join_searches
+from storage.db import Database, JobLedger
+from storage.db.ledger import EXHAUSTED
+from storage.db_store import AsyncProductStore, get_async_store
+
+# A fetch stage turns a search parameter and page number into a page (or None
+# past the last page); a parse stage turns a page into a stream of product
+# dictionaries. Adding a store means providing one of each.
+FetchStage = Callable[[Optional[str], int], Awaitable[Any]]
+ParseStage = Callable[[Any], Iterable[Dict]]
+
+# Marks the end of a search on the product queue
+_END_OF_SEARCH = object()
+# Marks the end of a ledger job's page on the product queue
+_END_OF_PAGE = object()
+# Marks a ledger job's page the parser failed on; its products so far are stored
+_PAGE_FAILED = object()
+# Marks the end of all input on a queue
+_DONE = object()
+
+@dataclass
+class StageStats:
+    """Throughput and backlog counters for one pipeline stage"""
+    name: str
+    items_in: int = 0
+    items_out: int = 0
+    busy_seconds: float = 0.0
+    # Depth of the queue this stage feeds
+    queue_depth: int = 0
+    max_queue_depth: int = 0
+
+    @property
+    def throughput(self) -> float:
+        """Items produced per second of busy time"""
+        return self.items_out / self.busy_seconds if self.busy_seconds else 0.0
+
+    def observe_queue(self, depth: int) -> None:
+        self.queue_depth = depth
+        self.max_queue_depth = max(self.max_queue_depth, depth)
+
+@dataclass
+class CompletedBatch:
+    """A batch of products that has been committed to the database"""
+    store: str
+    search_param: Optional[str]
+    products: List[Dict]
+    product_ids: List[int]
+    # True on the last batch of a search
+    final: bool = False
+
+Subscriber = Callable[[CompletedBatch], Awaitable[None]]
+
+@dataclass
+class _Page:
+    search_param: Optional[str]
+    content: Any
+    # Ledger job the page belongs to, when the run keeps a ledger
+    job_id: Optional[int] = None
+    page_number: int = 0
+
+class Pipeline:
+    """
+    Streaming fetch -> parse -> store pipeline for a single store.
+
+    Stages run concurrently and are connected by bounded asyncio queues, so a
+    slow stage applies backpressure upstream instead of letting pages and
+    products pile up in memory. Subscribers (exports, alerts) are notified each
+    time a batch is committed.
+
+    With a JobLedger, every (search parameter, page) is recorded as a job:
+    pages a resumed run already finished are skipped, and products are written
+    under their job id so a retried page cannot duplicate price history.
+
+    With a FetchController, fetches are retried and paced adaptively. A page
+    that still fails is recorded in `failures` and its search is cut short;
+    the remaining searches carry on. A page the parser raises on is recorded
+    in `failures` too, and parsing moves on to the next page.
+
+    With a MemoryBudget (by default the one enabled for the run), each stage
+    samples memory as it works. Near the budget, fetch concurrency is halved
+    and DB batches shrink; at the ceiling, new fetches wait for headroom.
+    """
+
+    def __init__(self, store: str, fetch: FetchStage, parse: ParseStage,
+                 db: Optional[AsyncProductStore] = None,
+                 ledger: Optional[JobLedger] = None,
+                 controller: Optional[FetchController] = None,
+                 memory: Optional[MemoryBudget] = None,
+                 max_pages: int = 1,
+                 fetch_concurrency: int = 1,
+                 request_delay: float = 0.0,
+                 batch_size: int = PIPELINE_BATCH_SIZE,
+                 page_queue_size: int = PIPELINE_PAGE_QUEUE_SIZE,
+                 product_queue_size: int = PIPELINE_PRODUCT_QUEUE_SIZE):
+        """
+        Args:
+            store: Store name (e.g., 'microcenter')
+            fetch: Coroutine fetching the page for a search parameter
+            parse: Function yielding product dictionaries from a fetched page
+            db: Async store to write to (defaults to the shared store)
+            ledger: Job ledger recording the progress of each page
+            controller: Adaptive concurrency/retry control applied to every fetch
+            memory: Memory budget to sample and back off under (defaults to the active one)
+            max_pages: Result pages fetched per search parameter
+            fetch_concurrency: Searches fetched at the same time
+            request_delay: Minimum seconds between two fetches
+            batch_size: Maximum number of products per DB write
+            page_queue_size: Fetched pages allowed to wait for the parser
+            product_queue_size: Parsed products allowed to wait for the writer
+        """
+        self.store = store
+        self.fetch = fetch
+        self.parse = parse
+        self.db = db or get_async_store()
+        self.ledger = ledger
+        self.controller = controller
+        self.memory = memory or active_memory_budget()
+        self.max_pages = max_pages
+        self.fetch_concurrency = max(fetch_concurrency, 1)
+        self.request_delay = request_delay
+        self.batch_size = batch_size
+        self.page_queue_size = page_queue_size
+        self.product_queue_size = product_queue_size
+        self.subscribers: List[Subscriber] = []
+        self.stats: Dict[str, StageStats] = {
+            name: StageStats(name) for name in ("fetch", "parse", "store")
+        }
+        self._request_lock = asyncio.Lock()
+        self._next_request_at = 0.0
+        # (search_param, page, error) for pages that could not be fetched
+        self.failures: List[Tuple[Optional[str], int, str]] = []
+
+    @classmethod
+    def for_adapter(cls, adapter, **kwargs) -> 'Pipeline':
+        """Build a pipeline from a store adapter's stages and politeness limits"""
+        kwargs.setdefault("controller", FetchController.for_adapter(adapter))
+        return cls(
+            adapter.name, adapter.fetch, adapter.parser,
+            max_pages=adapter.max_pages,
+            fetch_concurrency=adapter.max_concurrency,
+            request_delay=adapter.request_delay,
+            **kwargs
+        )
+
+    def subscribe(self, subscriber: Subscriber) -> Subscriber:
+        """Register a coroutine called with every committed batch"""
+        self.subscribers.append(subscriber)
+        return subscriber
+
+    async def run(self, search_params: List[Optional[str]]) -> None:
+        """Run every search parameter through the pipeline"""
+        pages: asyncio.Queue = asyncio.Queue(maxsize=self.page_queue_size)
+        products: asyncio.Queue = asyncio.Queue(maxsize=self.product_queue_size)
+
+        tasks = [
+            asyncio.create_task(self._fetch_stage(search_params, pages)),
+            asyncio.create_task(self._parse_stage(pages, products)),
+            asyncio.create_task(self._store_stage(products)),
+        ]
+        try:
+            await asyncio.gather(*tasks)
+        except BaseException:
+            for task in tasks:
+                task.cancel()
+            raise
+
+    async def _fetch_stage(self, search_params: List[Optional[str]], pages: asyncio.Queue) -> None:
+        pending: asyncio.Queue = asyncio.Queue()
+        for search_param in search_params:
+            pending.put_nowait(search_param)
+
+        workers = [
+            asyncio.create_task(self._fetch_worker(pending, pages))
+            for _ in range(min(self.fetch_concurrency, len(search_params)))
+        ]
+        try:
+            await asyncio.gather(*workers)
+        except BaseException:
+            for worker in workers:
+                worker.cancel()
+            raise
+        await pages.put(_DONE)
+
+    async def _fetch_worker(self, pending: asyncio.Queue, pages: asyncio.Queue) -> None:
+        stats = self.stats["fetch"]
+        while not pending.empty():
+            search_param = pending.get_nowait()
+            # Wall time of a search, from its first page request to its last page
+            # queued: besides the fetches (fetch_seconds) it includes request pacing,
+            # memory budget waits and backpressure from a full page queue
+            with metrics.timer("search_wall", store=self.store):
+                for page_number in range(1, self.max_pages + 1):
+                    job_id = None
+                    if self.ledger is not None:
+                        job = await asyncio.to_thread(self.ledger.start_job, self.store, search_param, page_number)
+                        if job.finished:
+                            metrics.counter("jobs_skipped", store=self.store).inc()
+                            if job.state == EXHAUSTED:
+                                break
+                            continue
+                        job_id = job.id
+
+                    stats.items_in += 1
+                    await self._wait_for_turn()
+                    if self.memory is not None:
+                        await self._respect_memory_budget()
+                    started = time.perf_counter()
+                    try:
+                        with metrics.timer("fetch", store=self.store):
+                            if self.controller is not None:
+                                content = await self.controller.call(self.fetch, search_param, page_number)
+                            else:
+                                content = await self.fetch(search_param, page_number)
+                    except Exception as e:
+                        # Give up on the rest of this search; pages already fetched are still stored
+                        error = f"{type(e).__name__}: {e}"
+                        print(f"{self.store.title()} / {search_param} page {page_number} failed: {error}")
+                        self.failures.append((search_param, page_number, error))
+                        if job_id is not None:
+                            await asyncio.to_thread(self.ledger.fail_job, job_id, error)
+                        break
+                    stats.busy_seconds += time.perf_counter() - started
+                    if self.memory is not None:
+                        self.memory.sample("fetch")
+                    if content is None:
+                        if job_id is not None:
+                            await asyncio.to_thread(self.ledger.exhaust_job, job_id)
+                        break
+                    stats.items_out += 1
+                    await pages.put(_Page(search_param, content, job_id, page_number))
+                    stats.observe_queue(pages.qsize())
+            await pages.put(_Page(search_param, _END_OF_SEARCH))
+
+    async def _wait_for_turn(self) -> None:
+        """Space requests at least request_delay apart across all fetch workers"""
+        if not self.request_delay:
+            return
+        loop = asyncio.get_running_loop()
+        async with self._request_lock:
+            delay = self._next_request_at - loop.time()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            self._next_request_at = loop.time() + self.request_delay
+
+    async def _respect_memory_budget(self) -> None:
+        """Halve fetch concurrency near the budget and hold the next fetch at the ceiling"""
+        self.memory.sample("fetch")
+        if self.memory.under_pressure and self.controller is not None:
+            self.controller.shrink()
+            self.memory.note_backoff()
+        await self.memory.wait_for_headroom("fetch")
+
+    async def _parse_stage(self, pages: asyncio.Queue, products: asyncio.Queue) -> None:
+        stats = self.stats["parse"]
+        while True:
+            page = await pages.get()
+            if page is _DONE:
+                break
+            if page.content is _END_OF_SEARCH:
+                await products.put((page.search_param, None, _END_OF_SEARCH))
+                continue
+            stats.items_in += 1
+            parsed = metrics.counter("products_parsed", store=self.store)
+            parse_seconds = metrics.histogram("parse_seconds", store=self.store)
+            page_parse_seconds = 0.0
+            end_of_page = _END_OF_PAGE
+            cards = None
+            while True:
+                # Only time spent inside the parser counts; waiting on a full
+                # queue is backpressure from the writer
+                started = time.perf_counter()
+                try:
+                    if cards is None:
+                        cards = iter(self.parse(page.content))
+                    product = next(cards, _DONE)
+                except Exception as e:
+                    product = e
+                page_parse_seconds += time.perf_counter() - started
+                if isinstance(product, Exception):
+                    # A malformed page: give up on the rest of it, not on the store
+                    error = f"{type(product).__name__}: {product}"
+                    print(f"{self.store.title()} / {page.search_param} page {page.page_number} "
+                          f"could not be parsed: {error}")
+                    self.failures.append((page.search_param, page.page_number, error))
+                    if page.job_id is not None:
+                        await asyncio.to_thread(self.ledger.fail_job, page.job_id, error)
+                    end_of_page = _PAGE_FAILED
+                    break
+                if product is _DONE:
+                    break
+                stats.items_out += 1
+                parsed.inc()
+                await products.put((page.search_param, page.job_id, product))
+                stats.observe_queue(products.qsize())
+            stats.busy_seconds += page_parse_seconds
+            parse_seconds.observe(page_parse_seconds)
+            if self.memory is not None:
+                self.memory.sample("parse")
+            if page.job_id is not None:
+                await products.put((page.search_param, page.job_id, end_of_page))
+        await products.put(_DONE)
+
+    async def _store_stage(self, products: asyncio.Queue) -> None:
+        stats = self.stats["store"]
+        # Concurrent fetch workers interleave searches, so batch per search.
+        # A search's pages arrive in order, so a ledger job's products are
+        # contiguous and end with its _END_OF_PAGE marker.
+        batches: Dict[Optional[str], List[Dict]] = {}
+        fingerprints: Dict[int, Tuple[Any, int]] = {}
+        while True:
+            item = await products.get()
+            if item is _DONE:
+                break
+            search_param, job_id, product = item
+            batch = batches.setdefault(search_param, [])
+            if product is _END_OF_SEARCH:
+                await self._flush(search_param, batches.pop(search_param), final=True)
+                continue
+            if product is _END_OF_PAGE or product is _PAGE_FAILED:
+                batches[search_param] = []
+                await self._flush(search_param, batch, final=False, job_id=job_id)
+                digest, count = fingerprints.pop(job_id, (hashlib.sha1(), 0))
+                if product is _END_OF_PAGE:
+                    await asyncio.to_thread(self.ledger.complete_job, job_id, count, digest.hexdigest())
+                continue
+            stats.items_in += 1
+            batch.append(product)
+            if job_id is not None:
+                digest, count = fingerprints.get(job_id, (hashlib.sha1(), 0))
+                digest.update(f"{product.get('name')}\x1f{product.get('price')}\n".encode())
+                fingerprints[job_id] = (digest, count + 1)
+            batch_size = self.memory.scaled_batch_size(self.batch_size) if self.memory else self.batch_size
+            if len(batch) >= batch_size:
+                batches[search_param] = []
+                await self._flush(search_param, batch, final=False, job_id=job_id)
+
+    async def _flush(self, search_param: Optional[str], batch: List[Dict], final: bool,
+                     job_id: Optional[int] = None) -> None:
+        if not batch and not final:
+            return
+        stats = self.stats["store"]
+        started = time.perf_counter()
+        with metrics.timer("store", store=self.store):
+            product_ids = await self.db.store_products(batch, self.store, job_id)
+        stats.busy_seconds += time.perf_counter() - started
+        stats.items_out += len(product_ids)
+        if self.memory is not None:
+            self.memory.sample("store")
+
+        completed = CompletedBatch(self.store, search_param, batch, product_ids, final)
+        for subscriber in self.subscribers:
+            await subscriber(completed)
+
+    def report(self) -> str:
+        """Human readable per-stage throughput and queue depth summary"""
+        lines = [f"Pipeline stats for {self.store.title()}:"]
+        for stage in self.stats.values():
+            lines.append(
+                f"  {stage.name:<6} in={stage.items_in:<6} out={stage.items_out:<6} "
+                f"busy={stage.busy_seconds:.2f}s rate={stage.throughput:.1f}/s "
+                f"max_queue={stage.max_queue_depth}"
+            )
+        if self.controller is not None:
+            lines.append(f"  fetch control: {self.controller.report()}")
+        for search_param, page, error in self.failures:
+            lines.append(f"  failed: {search_param or '-'} page {page}: {error}")
+        return "\n".join(lines)
+
+class CsvExportSubscriber:
+    """
+    Exports a store's products after its searches: in "full" mode by rewriting
+    {store}.csv each time one of its searches completes; in "delta" mode once
+    per store when finish() is called after the run, with only what changed
+    since the previous export (see storage.delta_export)
+    """
+
+    def __init__(self, db: Optional[AsyncProductStore] = None, mode: str = EXPORT_MODE):
+        self.db = db or get_async_store()
+        self.mode = mode
+        self.files: List[Tuple[str, Optional[str], str]] = []  # (file_name, search_param, store)
+        # Store -> searches completed since its last delta export
+        self._completed: Dict[str, List[Optional[str]]] = {}
+
+    async def __call__(self, batch: CompletedBatch) -> None:
+        if not batch.final:
+            return
+        if self.mode == "delta":
+            self._completed.setdefault(batch.store, []).append(batch.search_param)
+            return
+        with metrics.timer("export", store=batch.store):
+            products_with_stats = await self.db.get_products_with_stats(store=batch.store)
+            file_name = f"{batch.store}.csv"
+            await asyncio.to_thread(write_to_csv, products_with_stats, file_name)
+        self.files.append((file_name, batch.search_param, batch.store))
+
+    async def finish(self) -> List[Tuple[str, Optional[str], str]]:
+        """Write one delta per store with completed searches and return every exported file"""
+        completed, self._completed = self._completed, {}
+        for store, search_params in completed.items():
+            with metrics.timer("export", store=store):
+                result = await asyncio.to_thread(export_changes, Database(self.db.db_path), store)
+            if result is not None:
+                self.files.append((result.file_name, join_searches(search_params), store))
+        return self.files
@@ -0,0 +1,167 @@
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, Hashable, Iterable, Optional, Set, Tuple
+
+from metrics import metrics
+
+def store_tag(store: Optional[str]) -> str:
+    """Tag for results covering one store, or every store when store is None"""
+    return f"store:{store}" if store else "store:*"
+
+def product_tag(product_id: int) -> str:
+    return f"product:{product_id}"
+
+@dataclass
+class CacheStats:
+    hits: int = 0
+    misses: int = 0
+    evictions: int = 0
+    expirations: int = 0
+    invalidations: int = 0
+
+    @property
+    def hit_rate(self) -> float:
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
+
+@dataclass
+class _Entry:
+    value: Any
+    expires_at: float
+    tags: Tuple[str, ...]
+
+class QueryCache:
+    """
+    LRU cache with a time-to-live for read query results.
+
+    Entries carry tags (see store_tag and product_tag) naming the rows they
+    were built from, and writers invalidate exactly the tags they touched.
+    The TTL bounds staleness from writes this process does not see (another
+    process writing the same database).
+
+    Cached values are shared between callers; lists and dicts are copied on
+    the way out, but the records inside them must be treated as read-only.
+    """
+
+    def __init__(self, max_entries: int = 1024, ttl: float = 300.0,
+                 clock: Callable[[], float] = time.monotonic):
+        """
+        Args:
+            max_entries: Entries kept before the least recently used is evicted
+            ttl: Seconds an entry stays valid (0 disables caching)
+            clock: Monotonic time source
+        """
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.clock = clock
+        self.stats = CacheStats()
+        self._entries: 'OrderedDict[Hashable, _Entry]' = OrderedDict()
+        self._by_tag: Dict[str, Set[Hashable]] = {}
+        # Bumped by every invalidation; a load that overlaps one is not cached
+        self._generation = 0
+        self._lock = threading.Lock()
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_entries > 0 and self.ttl > 0
+
+    def get(self, key: Hashable) -> Tuple[bool, Any]:
+        """Return (hit, value) for a key"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry.expires_at <= self.clock():
+                self._remove(key)
+                self.stats.expirations += 1
+                entry = None
+            if entry is None:
+                self.stats.misses += 1
+                metrics.counter("query_cache_misses", query=key[0]).inc()
+                return False, None
+            self._entries.move_to_end(key)
+            self.stats.hits += 1
+        metrics.counter("query_cache_hits", query=key[0]).inc()
+        return True, _copy(entry.value)
+
+    def put(self, key: Hashable, value: Any, tags: Iterable[str], generation: Optional[int] = None) -> None:
+        """
+        Cache a value under key
+        Args:
+            key: Tuple starting with the query name
+            value: Query result
+            tags: Rows the result depends on
+            generation: Value of `generation` read before the query ran; the
+                result is dropped if an invalidation happened since
+        """
+        if not self.enabled:
+            return
+        with self._lock:
+            if generation is not None and generation != self._generation:
+                return
+            if key in self._entries:
+                self._remove(key)
+            tags = tuple(tags)
+            self._entries[key] = _Entry(value, self.clock() + self.ttl, tags)
+            for tag in tags:
+                self._by_tag.setdefault(tag, set()).add(key)
+            while len(self._entries) > self.max_entries:
+                self._remove(next(iter(self._entries)))
+                self.stats.evictions += 1
+
+    @property
+    def generation(self) -> int:
+        return self._generation
+
+    def get_or_load(self, key: Hashable, tags: Iterable[str], load: Callable[[], Any]) -> Any:
+        """Return the cached value for key, running load() and caching its result on a miss"""
+        hit, value = self.get(key)
+        if hit:
+            return value
+        generation = self._generation
+        value = load()
+        self.put(key, value, tags, generation)
+        return _copy(value)
+
+    def invalidate(self, tags: Iterable[str]) -> int:
+        """Drop every entry carrying one of the tags. Returns the number dropped."""
+        with self._lock:
+            self._generation += 1
+            keys = set()
+            for tag in tags:
+                keys.update(self._by_tag.get(tag, ()))
+            for key in keys:
+                self._remove(key)
+            self.stats.invalidations += len(keys)
+            return len(keys)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._generation += 1
+            self._entries.clear()
+            self._by_tag.clear()
+
+    def _remove(self, key: Hashable) -> None:
+        entry = self._entries.pop(key)
+        for tag in entry.tags:
+            keys = self._by_tag.get(tag)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self._by_tag[tag]
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def report(self) -> str:
+        stats = self.stats
+        return (f"Query cache: {stats.hits} hits, {stats.misses} misses ({stats.hit_rate:.0%} hit rate), "
+                f"{len(self)} entries, {stats.evictions} evicted, {stats.expirations} expired, "
+                f"{stats.invalidations} invalidated")
+
+def _copy(value: Any) -> Any:
+    if isinstance(value, list):
+        return list(value)
+    if isinstance(value, dict):
+        return dict(value)
+    return value
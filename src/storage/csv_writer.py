@@ -7,45 +7,49 @@ from .db import Product
 
 FOLDER_PATH = "src/data/"
 
-def write_to_csv(products_with_stats: List[Dict], filename: str) -> None:
+CSV_HEADER = [
+    "Name",
+    "Current Price",
+    "Price Change %",
+    "Lowest Price",
+    "Highest Price",
+    "Average Price",
+    "Link",
+    "Image",
+    "Store"
+]
+
+def csv_row(product: Product, stats: Dict) -> List[str]:
+    """One export row (CSV_HEADER columns) for a product and its price statistics"""
+    return [
+        product.name,
+        f"${product.price:.2f}",
+        f"{product.price_change_percentage:+.1f}%" if product.price_change_percentage else "0.0%",
+        f"${stats['lowest_price']:.2f}",
+        f"${stats['highest_price']:.2f}",
+        f"${stats['avg_price']:.2f}",
+        product.link,
+        product.image_url,
+        product.store
+    ]
+
+def write_to_csv(products_with_stats: List[Dict], filename: str, folder_path: str = FOLDER_PATH) -> None:
     """
     Write products to CSV file, including price statistics
     Args:
         products_with_stats: List of dictionaries containing products and their price statistics
         filename: Name of the CSV file
+        folder_path: Folder to write the CSV file to
     """
     # Create the folder if it doesn't exist
-    if not os.path.exists(FOLDER_PATH):
-        os.makedirs(FOLDER_PATH)
+    if not os.path.exists(folder_path):
+        os.makedirs(folder_path)
 
-    file_path = os.path.join(FOLDER_PATH, filename)
+    file_path = os.path.join(folder_path, filename)
 
     with open(file_path, 'w', newline='', encoding='utf-8') as file:
         writer = csv.writer(file)
-        writer.writerow([
-            "Name",
-            "Current Price",
-            "Price Change %",
-            "Lowest Price",
-            "Highest Price",
-            "Average Price",
-            "Link",
-            "Image",
-            "Store"
-        ])
+        writer.writerow(CSV_HEADER)
         
         for product_data in products_with_stats:
-            product = product_data['product']
-            stats = product_data['stats']
-            
-            writer.writerow([
-                product.name,
-                f"${product.price:.2f}",
-                f"{product.price_change_percentage:+.1f}%" if product.price_change_percentage else "0.0%",
-                f"${stats['lowest_price']:.2f}",
-                f"${stats['highest_price']:.2f}",
-                f"${stats['avg_price']:.2f}",
-                product.link,
-                product.image_url,
-                product.store
-            ])
\ No newline at end of file
+            writer.writerow(csv_row(product_data['product'], product_data['stats']))
@@ -1,27 +1,73 @@
+import os
+from datetime import timedelta
+from typing import Optional
+from config import SNAPSHOT_DIR
 from .connection import DatabaseConnection
-from .models import Product, PriceHistory
+from .models import Product, PriceHistory, ProductBatch
 from .queries import ProductQueries
+from .groups import GroupQueries
+from .changes import ChangeQueries, ProductChange
 from .migrations import migrate_database
+from .ledger import JobLedger, LedgerJob
+from .snapshot import SnapshotResult, create_snapshot, latest_snapshot
+from .profiler import QueryProfiler, enable_profiling, disable_profiling
 
 class Database:
-    def __init__(self, db_path: str = "src/data/products.db"):
-        self.connection = DatabaseConnection(db_path)
-        self._initialize_database()
+    # Databases already migrated by this process
+    _migrated_paths = set()
+
+    def __init__(self, db_path: str = "src/data/products.db", read_only: bool = False):
+        """
+        Args:
+            db_path: Path of the SQLite database
+            read_only: Open a snapshot (or any migrated database) without migrating or writing
+        """
+        self.connection = DatabaseConnection(db_path, read_only)
+        if not read_only:
+            self._initialize_database()
+
+    @classmethod
+    def open_latest_snapshot(cls, snapshot_dir: str = SNAPSHOT_DIR) -> Optional['Database']:
+        """Read-only Database on the newest snapshot, or None when there is none"""
+        path = latest_snapshot(snapshot_dir)
+        return cls(str(path), read_only=True) if path else None
 
     def _initialize_database(self) -> None:
-        """Initialize the database with latest migrations"""
+        """Initialize the database with latest migrations (once per process and path)"""
+        db_path = os.path.abspath(self.connection.db_path)
+        if db_path in Database._migrated_paths and os.path.exists(db_path):
+            return
         with self.connection.get_connection() as conn:
             migrate_database(conn)
+        Database._migrated_paths.add(db_path)
 
     @property
     def products(self) -> ProductQueries:
         """Get the product queries interface"""
         return ProductQueries(self.connection)
 
+    @property
+    def groups(self) -> GroupQueries:
+        """Get the cross-store product group queries interface"""
+        return GroupQueries(self.connection)
+
+    @property
+    def changes(self) -> ChangeQueries:
+        """Get the product change log and export watermark interface"""
+        return ChangeQueries(self.connection)
+
+    def open_ledger(self, resume: bool = False, resume_window: Optional[timedelta] = None) -> JobLedger:
+        """Start a job ledger for a new run, or continue the latest unfinished run when resuming"""
+        return JobLedger.open(self.connection, resume, resume_window)
+
+    def snapshot(self, snapshot_dir: str = SNAPSHOT_DIR, backup: bool = False) -> SnapshotResult:
+        """Copy this database into a new snapshot without blocking writers (see create_snapshot)"""
+        return create_snapshot(self.connection.db_path, snapshot_dir, backup)
+
     def __enter__(self):
         return self
 
     def __exit__(self, exc_type, exc_val, exc_tb):
         pass
 
-__all__ = ['Database', 'Product', 'PriceHistory'] 
\ No newline at end of file
+__all__ = ['Database', 'Product', 'PriceHistory', 'ProductBatch', 'ProductChange', 'JobLedger', 'LedgerJob', 'SnapshotResult', 'create_snapshot', 'latest_snapshot', 'QueryProfiler', 'enable_profiling', 'disable_profiling'] 
\ No newline at end of file
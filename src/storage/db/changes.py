@@ -0,0 +1,107 @@
+from dataclasses import dataclass
+from typing import List, Optional
+
+from .connection import DatabaseConnection
+
+@dataclass(frozen=True)
+class ProductChange:
+    """Net change to one product between two change-log sequence numbers"""
+    product_id: int
+    store: str
+    op: str  # 'insert', 'update' or 'delete'
+
+def net_op(first_op: str, last_op: str) -> Optional[str]:
+    """
+    Collapse a product's first and last logged operation in a range into the
+    one a consumer needs, or None when the product came and went unseen
+    """
+    if last_op == 'delete':
+        return None if first_op == 'insert' else 'delete'
+    return 'insert' if first_op == 'insert' else 'update'
+
+class ChangeQueries:
+    """
+    Product change log (filled by triggers on products) and the export
+    watermarks of its consumers: the last sequence number each one emitted.
+    """
+
+    def __init__(self, connection: DatabaseConnection):
+        self.connection = connection
+
+    def current_seq(self) -> int:
+        """Sequence number of the latest logged change (0 when none)"""
+        with self.connection.get_connection() as conn:
+            row = conn.execute("SELECT seq FROM sqlite_sequence WHERE name = 'product_changes'").fetchone()
+            return row['seq'] if row else 0
+
+    def get_watermark(self, consumer: str) -> Optional[int]:
+        """Last sequence number a consumer exported, or None if it never has"""
+        with self.connection.get_connection() as conn:
+            row = conn.execute("SELECT seq FROM export_watermarks WHERE consumer = ?", (consumer,)).fetchone()
+            return row['seq'] if row else None
+
+    def set_watermark(self, consumer: str, seq: int) -> None:
+        """Record a successful export up to seq (a watermark never moves back)"""
+        with self.connection.transaction() as conn:
+            conn.execute("""
+                INSERT INTO export_watermarks (consumer, seq, exported_at)
+                VALUES (?, ?, CURRENT_TIMESTAMP)
+                ON CONFLICT (consumer) DO UPDATE
+                SET seq = MAX(seq, excluded.seq), exported_at = excluded.exported_at
+            """, (consumer, seq))
+
+    def reset_watermark(self, consumer: str) -> None:
+        """Forget a consumer, so its next export starts from a full baseline"""
+        with self.connection.transaction() as conn:
+            conn.execute("DELETE FROM export_watermarks WHERE consumer = ?", (consumer,))
+
+    def get_changes_since(self, from_seq: int, to_seq: int, store: Optional[str] = None) -> List[ProductChange]:
+        """
+        Net change per product in the sequence range (from_seq, to_seq]
+        Args:
+            from_seq: Exclusive lower bound, usually a consumer's watermark
+            to_seq: Inclusive upper bound, usually current_seq() read beforehand
+            store: Optional store filter
+        Returns:
+            One ProductChange per product, by product ID; products inserted
+            and deleted within the range are left out
+        """
+        with self.connection.get_connection() as conn:
+            cursor = conn.execute("""
+                WITH ranged AS (
+                    SELECT product_id, store, op,
+                           ROW_NUMBER() OVER (PARTITION BY product_id ORDER BY seq) AS first_rank,
+                           ROW_NUMBER() OVER (PARTITION BY product_id ORDER BY seq DESC) AS last_rank
+                    FROM product_changes
+                    WHERE seq > ? AND seq <= ? AND (? IS NULL OR store = ?)
+                )
+                SELECT product_id,
+                       MAX(CASE WHEN last_rank = 1 THEN store END) AS store,
+                       MAX(CASE WHEN first_rank = 1 THEN op END) AS first_op,
+                       MAX(CASE WHEN last_rank = 1 THEN op END) AS last_op
+                FROM ranged
+                WHERE first_rank = 1 OR last_rank = 1
+                GROUP BY product_id
+                ORDER BY product_id
+            """, (from_seq, to_seq, store, store))
+            changes = []
+            for row in cursor:
+                op = net_op(row['first_op'], row['last_op'])
+                if op is not None:
+                    changes.append(ProductChange(row['product_id'], row['store'], op))
+            return changes
+
+    def prune(self) -> int:
+        """
+        Delete changes every consumer has exported past and return how many.
+        Without any consumer nothing is kept: a first export is a full baseline anyway.
+        """
+        with self.connection.transaction() as conn:
+            row = conn.execute("SELECT MIN(seq) AS seq FROM export_watermarks").fetchone()
+            upto = row['seq'] if row['seq'] is not None else self._max_seq(conn)
+            return conn.execute("DELETE FROM product_changes WHERE seq <= ?", (upto,)).rowcount
+
+    @staticmethod
+    def _max_seq(conn) -> int:
+        row = conn.execute("SELECT MAX(seq) AS seq FROM product_changes").fetchone()
+        return row['seq'] or 0
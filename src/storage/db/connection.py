@@ -3,11 +3,19 @@ from contextlib import contextmanager
 import os
 from typing import Generator
 from pathlib import Path
+from .profiler import active_profiler
 
 class DatabaseConnection:
-    def __init__(self, db_path: str = "src/data/products.db"):
+    def __init__(self, db_path: str = "src/data/products.db", read_only: bool = False):
+        """
+        Args:
+            db_path: Path of the SQLite database
+            read_only: Open connections read-only (e.g. on a snapshot); writes then fail
+        """
         self.db_path = db_path
-        self._ensure_db_directory()
+        self.read_only = read_only
+        if not read_only:
+            self._ensure_db_directory()
 
     def _ensure_db_directory(self) -> None:
         """Ensure the database directory exists"""
@@ -17,11 +25,18 @@ class DatabaseConnection:
     def get_connection(self) -> Generator[sqlite3.Connection, None, None]:
         """
         Context manager for database connections.
+        While a QueryProfiler is enabled (see profiler.enable_profiling), the
+        connection records its statements and timings.
         Usage:
             with db.get_connection() as conn:
                 conn.execute(...)
         """
-        conn = sqlite3.connect(self.db_path)
+        profiler = active_profiler()
+        target = f"{Path(self.db_path).resolve().as_uri()}?mode=ro" if self.read_only else self.db_path
+        if profiler is not None:
+            conn = profiler.connect(target, uri=self.read_only)
+        else:
+            conn = sqlite3.connect(target, uri=self.read_only)
         conn.row_factory = sqlite3.Row  # Enable dictionary-like row access
         try:
             yield conn
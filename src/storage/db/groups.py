@@ -0,0 +1,127 @@
+import sqlite3
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+from .connection import DatabaseConnection
+from .models import Product
+
+# (product_id, brand, model_key, capacities, tokens)
+SignatureRow = Tuple[int, Optional[str], str, str, str]
+
+class GroupQueries:
+    """
+    Storage for cross-store product matching: title signatures and the groups
+    of listings that are the same product in different stores.
+    Methods taking a connection run inside the caller's transaction.
+    """
+
+    def __init__(self, connection: DatabaseConnection):
+        self.connection = connection
+
+    def get_unsigned_products(self, conn: sqlite3.Connection) -> List[sqlite3.Row]:
+        """Products that have no title signature yet, oldest first"""
+        return conn.execute("""
+            SELECT p.id, p.name, p.store
+            FROM products p
+            LEFT JOIN product_signatures s ON s.product_id = p.id
+            WHERE s.product_id IS NULL
+            ORDER BY p.id
+        """).fetchall()
+
+    def save_signatures(self, conn: sqlite3.Connection, rows: Iterable[SignatureRow]) -> None:
+        conn.executemany("""
+            INSERT OR REPLACE INTO product_signatures (product_id, brand, model_key, capacities, tokens)
+            VALUES (?, ?, ?, ?, ?)
+        """, rows)
+
+    def get_candidates(self, conn: sqlite3.Connection, model_key: str, exclude_store: str) -> List[sqlite3.Row]:
+        """Signed products from other stores sharing a model key, with their group if any"""
+        return conn.execute("""
+            SELECT s.product_id, p.store, s.brand, s.capacities, s.tokens, m.group_id
+            FROM product_signatures s
+            JOIN products p ON p.id = s.product_id
+            LEFT JOIN product_group_members m ON m.product_id = s.product_id
+            WHERE s.model_key = ? AND p.store != ?
+        """, (model_key, exclude_store)).fetchall()
+
+    def get_group_id(self, conn: sqlite3.Connection, product_id: int) -> Optional[int]:
+        row = conn.execute("SELECT group_id FROM product_group_members WHERE product_id = ?",
+                           (product_id,)).fetchone()
+        return row['group_id'] if row else None
+
+    def get_group_stores(self, conn: sqlite3.Connection, group_id: int) -> Set[str]:
+        return {row['store'] for row in conn.execute("""
+            SELECT p.store FROM product_group_members m
+            JOIN products p ON p.id = m.product_id
+            WHERE m.group_id = ?
+        """, (group_id,))}
+
+    def create_group(self, conn: sqlite3.Connection, model_key: str) -> int:
+        return conn.execute("INSERT INTO product_groups (model_key) VALUES (?)", (model_key,)).lastrowid
+
+    def add_member(self, conn: sqlite3.Connection, group_id: int, product_id: int, score: float) -> None:
+        conn.execute("""
+            INSERT OR REPLACE INTO product_group_members (product_id, group_id, score)
+            VALUES (?, ?, ?)
+        """, (product_id, group_id, score))
+
+    def merge_groups(self, conn: sqlite3.Connection, keep_id: int, drop_id: int) -> None:
+        """Move every member of drop_id into keep_id and delete drop_id"""
+        conn.execute("UPDATE product_group_members SET group_id = ? WHERE group_id = ?", (keep_id, drop_id))
+        conn.execute("DELETE FROM product_groups WHERE id = ?", (drop_id,))
+
+    def clear(self, conn: sqlite3.Connection) -> None:
+        """Forget every signature and group, so matching starts over"""
+        conn.execute("DELETE FROM product_group_members")
+        conn.execute("DELETE FROM product_groups")
+        conn.execute("DELETE FROM product_signatures")
+
+    def get_cheapest_offers(self, limit: int = 50, min_offers: int = 2) -> List[Dict]:
+        """
+        Cheapest current offer per product group, biggest saving first
+        Args:
+            limit: Maximum number of groups returned
+            min_offers: Only groups with at least this many listings
+        Returns:
+            Dicts with group_id, product (the cheapest listing), offers,
+            highest_price and savings (highest minus cheapest price)
+        """
+        with self.connection.get_connection() as conn:
+            cursor = conn.execute("""
+                WITH ranked AS (
+                    SELECT m.group_id, p.id, p.name, p.price, p.link, p.image_url, p.store,
+                           p.price_change_percentage, p.created_at, p.updated_at,
+                           ROW_NUMBER() OVER (PARTITION BY m.group_id ORDER BY p.price, p.id) AS offer_rank,
+                           COUNT(*) OVER (PARTITION BY m.group_id) AS offers,
+                           MAX(p.price) OVER (PARTITION BY m.group_id) AS highest_price
+                    FROM product_group_members m
+                    JOIN products p ON p.id = m.product_id
+                )
+                SELECT * FROM ranked
+                WHERE offer_rank = 1 AND offers >= ?
+                ORDER BY highest_price - price DESC, group_id
+                LIMIT ?
+            """, (min_offers, limit))
+            return [
+                {
+                    'group_id': row['group_id'],
+                    'product': Product.from_row(row),
+                    'offers': row['offers'],
+                    'highest_price': row['highest_price'],
+                    'savings': round(row['highest_price'] - row['price'], 2),
+                }
+                for row in cursor
+            ]
+
+    def get_group_offers(self, group_id: int) -> List[Product]:
+        """Every listing in a group, cheapest first"""
+        with self.connection.get_connection() as conn:
+            cursor = conn.execute("""
+                SELECT p.id, p.name, p.price, p.link, p.image_url, p.store,
+                       p.price_change_percentage, p.created_at, p.updated_at
+                FROM product_group_members m
+                JOIN products p ON p.id = m.product_id
+                WHERE m.group_id = ?
+                ORDER BY p.price
+            """, (group_id,))
+            cursor.row_factory = Product.row_factory
+            return cursor.fetchall()
@@ -0,0 +1,172 @@
+import itertools
+from dataclasses import dataclass
+from datetime import timedelta
+from typing import List, Optional
+
+from .connection import DatabaseConnection
+
+# Job states. DONE and EXHAUSTED are final: a resumed run skips those jobs.
+PENDING = "pending"
+RUNNING = "running"
+DONE = "done"
+EXHAUSTED = "exhausted"  # the page is past the search's last results page
+FAILED = "failed"
+FINAL_STATES = (DONE, EXHAUSTED)
+
+@dataclass
+class LedgerJob:
+    """One (store, search term, page) job of a scrape run"""
+    id: int
+    store: str
+    search_param: Optional[str]
+    page: int
+    state: str
+    attempts: int = 0
+    product_count: int = 0
+    fingerprint: Optional[str] = None
+    error: Optional[str] = None
+
+    @property
+    def finished(self) -> bool:
+        return self.state in FINAL_STATES
+
+    @classmethod
+    def from_row(cls, row) -> 'LedgerJob':
+        return cls(
+            id=row['id'],
+            store=row['store'],
+            # NULL would defeat the UNIQUE constraint, so "no search term" is stored as ''
+            search_param=row['search_param'] or None,
+            page=row['page'],
+            state=row['state'],
+            attempts=row['attempts'],
+            product_count=row['product_count'],
+            fingerprint=row['fingerprint'],
+            error=row['error']
+        )
+
+class JobLedger:
+    """
+    Persistent record of the jobs of one scrape run. Each job moves from
+    pending/running to done, exhausted or failed as the pipeline works through
+    it, so a run that dies midway can be resumed from the jobs it did not finish.
+    """
+
+    def __init__(self, connection: DatabaseConnection, run_id: int, resumed: bool = False):
+        self.connection = connection
+        self.run_id = run_id
+        self.resumed = resumed
+
+    @classmethod
+    def open(cls, connection: DatabaseConnection, resume: bool = False,
+             resume_window: Optional[timedelta] = None) -> 'JobLedger':
+        """
+        Start a new run, or continue the latest unfinished one
+        Args:
+            connection: Database holding the ledger
+            resume: Continue the most recent run that did not complete
+            resume_window: Only resume runs started within this long ago
+        """
+        with connection.transaction() as conn:
+            if resume:
+                # Compared in SQL, since started_at is CURRENT_TIMESTAMP (UTC)
+                window = f"-{resume_window.total_seconds()} seconds" if resume_window is not None else None
+                row = conn.execute("""
+                    SELECT id, (? IS NULL OR started_at >= datetime('now', ?)) AS in_window
+                    FROM scrape_runs
+                    WHERE status != 'completed'
+                    ORDER BY id DESC
+                    LIMIT 1
+                """, (window, window)).fetchone()
+                if row is not None and row['in_window']:
+                    conn.execute("UPDATE scrape_runs SET status = 'running' WHERE id = ?", (row['id'],))
+                    return cls(connection, row['id'], resumed=True)
+            run_id = conn.execute("INSERT INTO scrape_runs (status) VALUES ('running')").lastrowid
+        return cls(connection, run_id)
+
+    def start_job(self, store: str, search_param: Optional[str], page: int) -> LedgerJob:
+        """
+        Record that a job is about to run and return its ledger entry.
+        Jobs already finished in this run are returned untouched for the caller to skip.
+        """
+        key = (self.run_id, store, search_param or '', page)
+        with self.connection.transaction() as conn:
+            conn.execute("""
+                INSERT OR IGNORE INTO scrape_jobs (run_id, store, search_param, page)
+                VALUES (?, ?, ?, ?)
+            """, key)
+            conn.execute("""
+                UPDATE scrape_jobs
+                SET state = ?, attempts = attempts + 1, error = NULL, updated_at = CURRENT_TIMESTAMP
+                WHERE run_id = ? AND store = ? AND search_param = ? AND page = ?
+                AND state NOT IN (?, ?)
+            """, (RUNNING, *key, *FINAL_STATES))
+            row = conn.execute("""
+                SELECT * FROM scrape_jobs
+                WHERE run_id = ? AND store = ? AND search_param = ? AND page = ?
+            """, key).fetchone()
+        return LedgerJob.from_row(row)
+
+    def _set_state(self, job_id: int, state: str, **columns) -> None:
+        assignments = "".join(f", {column} = ?" for column in columns)
+        with self.connection.transaction() as conn:
+            conn.execute(f"""
+                UPDATE scrape_jobs
+                SET state = ?, updated_at = CURRENT_TIMESTAMP{assignments}
+                WHERE id = ?
+            """, (state, *columns.values(), job_id))
+
+    def complete_job(self, job_id: int, product_count: int, fingerprint: str) -> None:
+        """
+        Mark a job done once all of its products are committed
+        Args:
+            job_id: Ledger job id
+            product_count: Products the page yielded
+            fingerprint: Digest of the page's products, for comparing pages across runs
+        """
+        self._set_state(job_id, DONE, product_count=product_count, fingerprint=fingerprint)
+
+    def exhaust_job(self, job_id: int) -> None:
+        """Mark a job as past the last results page of its search"""
+        self._set_state(job_id, EXHAUSTED)
+
+    def fail_job(self, job_id: int, error: str) -> None:
+        self._set_state(job_id, FAILED, error=error)
+
+    def fail_search(self, store: str, search_param: Optional[str], error: str) -> LedgerJob:
+        """
+        Record a (store, search) that failed as a whole under its first unfinished
+        page, so the run stays incomplete and resuming retries it
+        """
+        finished = {job.page for job in self.jobs()
+                    if job.store == store and job.search_param == (search_param or None) and job.finished}
+        page = next(page for page in itertools.count(1) if page not in finished)
+        job = self.start_job(store, search_param, page)
+        self.fail_job(job.id, error)
+        return job
+
+    def jobs(self) -> List[LedgerJob]:
+        """Every job recorded for this run"""
+        with self.connection.get_connection() as conn:
+            rows = conn.execute("""
+                SELECT * FROM scrape_jobs WHERE run_id = ? ORDER BY id
+            """, (self.run_id,)).fetchall()
+        return [LedgerJob.from_row(row) for row in rows]
+
+    def incomplete_jobs(self) -> List[LedgerJob]:
+        """Jobs of this run that were started but never finished"""
+        return [job for job in self.jobs() if not job.finished]
+
+    def finish(self) -> bool:
+        """
+        Close the run. It is only marked completed when every job finished, so
+        an incomplete run stays available to resume.
+        Returns:
+            True when the run completed
+        """
+        completed = not self.incomplete_jobs()
+        with self.connection.transaction() as conn:
+            conn.execute("""
+                UPDATE scrape_runs SET status = ?, finished_at = CURRENT_TIMESTAMP WHERE id = ?
+            """, ('completed' if completed else 'incomplete', self.run_id))
+        return completed
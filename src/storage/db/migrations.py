@@ -98,6 +98,233 @@ def get_migrations() -> List[Tuple[int, str, str]]:
             DROP INDEX IF EXISTS idx_product_price_history;
             DROP TABLE IF EXISTS price_history;
             """
+        ),
+        (
+            3,
+            # Up migration: job ledger for resumable runs. price_history rows
+            # written by a ledger job carry its id, so a retried job cannot
+            # record the same price twice.
+            """
+            CREATE TABLE scrape_runs (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                status TEXT NOT NULL DEFAULT 'running',
+                started_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                finished_at TIMESTAMP
+            );
+
+            CREATE TABLE scrape_jobs (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                run_id INTEGER NOT NULL,
+                store TEXT NOT NULL,
+                search_param TEXT NOT NULL DEFAULT '',
+                page INTEGER NOT NULL,
+                state TEXT NOT NULL DEFAULT 'pending',
+                attempts INTEGER NOT NULL DEFAULT 0,
+                product_count INTEGER NOT NULL DEFAULT 0,
+                fingerprint TEXT,
+                error TEXT,
+                updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                FOREIGN KEY (run_id) REFERENCES scrape_runs (id) ON DELETE CASCADE,
+                UNIQUE (run_id, store, search_param, page)
+            );
+
+            ALTER TABLE price_history ADD COLUMN job_id INTEGER;
+
+            CREATE UNIQUE INDEX idx_price_history_job
+            ON price_history(product_id, job_id) WHERE job_id IS NOT NULL;
+            """,
+            # Down migration
+            """
+            DROP INDEX IF EXISTS idx_price_history_job;
+            ALTER TABLE price_history DROP COLUMN job_id;
+            DROP TABLE IF EXISTS scrape_jobs;
+            DROP TABLE IF EXISTS scrape_runs;
+            """
+        ),
+        (
+            4,
+            # Up migration: full-text index over product names, kept in sync by
+            # triggers, and a covering index for per-product price statistics
+            """
+            CREATE VIRTUAL TABLE products_fts USING fts5(
+                name,
+                content='products',
+                content_rowid='id',
+                tokenize='unicode61 remove_diacritics 2',
+                prefix='2 3'
+            );
+
+            CREATE TRIGGER products_fts_insert AFTER INSERT ON products BEGIN
+                INSERT INTO products_fts(rowid, name) VALUES (new.id, new.name);
+            END;
+
+            CREATE TRIGGER products_fts_delete AFTER DELETE ON products BEGIN
+                INSERT INTO products_fts(products_fts, rowid, name) VALUES ('delete', old.id, old.name);
+            END;
+
+            CREATE TRIGGER products_fts_update AFTER UPDATE OF name ON products BEGIN
+                INSERT INTO products_fts(products_fts, rowid, name) VALUES ('delete', old.id, old.name);
+                INSERT INTO products_fts(rowid, name) VALUES (new.id, new.name);
+            END;
+
+            INSERT INTO products_fts(products_fts) VALUES ('rebuild');
+
+            CREATE INDEX idx_price_history_product_price ON price_history(product_id, price);
+            """,
+            # Down migration
+            """
+            DROP INDEX IF EXISTS idx_price_history_product_price;
+            DROP TRIGGER IF EXISTS products_fts_update;
+            DROP TRIGGER IF EXISTS products_fts_delete;
+            DROP TRIGGER IF EXISTS products_fts_insert;
+            DROP TABLE IF EXISTS products_fts;
+            """
+        ),
+        (
+            5,
+            # Up migration: trigram index over product names for fuzzy matching
+            # (typos, reworded listings), and an indexed name key that ignores
+            # case, spacing and punctuation for cheap cross-run matching
+            """
+            CREATE VIRTUAL TABLE products_trigram USING fts5(
+                name,
+                content='products',
+                content_rowid='id',
+                tokenize='trigram'
+            );
+
+            CREATE TRIGGER products_trigram_insert AFTER INSERT ON products BEGIN
+                INSERT INTO products_trigram(rowid, name) VALUES (new.id, new.name);
+            END;
+
+            CREATE TRIGGER products_trigram_delete AFTER DELETE ON products BEGIN
+                INSERT INTO products_trigram(products_trigram, rowid, name) VALUES ('delete', old.id, old.name);
+            END;
+
+            CREATE TRIGGER products_trigram_update AFTER UPDATE OF name ON products BEGIN
+                INSERT INTO products_trigram(products_trigram, rowid, name) VALUES ('delete', old.id, old.name);
+                INSERT INTO products_trigram(rowid, name) VALUES (new.id, new.name);
+            END;
+
+            INSERT INTO products_trigram(products_trigram) VALUES ('rebuild');
+
+            ALTER TABLE products ADD COLUMN name_key TEXT GENERATED ALWAYS AS (
+                lower(replace(replace(replace(replace(replace(replace(
+                    name, ' ', ''), '-', ''), '_', ''), ',', ''), '(', ''), ')', ''))
+            ) VIRTUAL;
+
+            CREATE INDEX idx_products_store_name_key ON products(store, name_key);
+            """,
+            # Down migration
+            """
+            DROP INDEX IF EXISTS idx_products_store_name_key;
+            ALTER TABLE products DROP COLUMN name_key;
+            DROP TRIGGER IF EXISTS products_trigram_update;
+            DROP TRIGGER IF EXISTS products_trigram_delete;
+            DROP TRIGGER IF EXISTS products_trigram_insert;
+            DROP TABLE IF EXISTS products_trigram;
+            """
+        ),
+        (
+            6,
+            # Up migration: cross-store product matching. Signatures hold each
+            # product's normalised title; model_key is the blocking index that
+            # keeps candidate lookups from comparing every pair of products.
+            # A renamed product loses its signature and group, so the next
+            # matching pass signs and groups it under its new title.
+            """
+            CREATE TABLE product_signatures (
+                product_id INTEGER PRIMARY KEY,
+                brand TEXT,
+                model_key TEXT NOT NULL,
+                capacities TEXT NOT NULL,
+                tokens TEXT NOT NULL,
+                FOREIGN KEY (product_id) REFERENCES products (id) ON DELETE CASCADE
+            );
+
+            CREATE INDEX idx_product_signatures_model_key ON product_signatures(model_key);
+
+            CREATE TABLE product_groups (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                model_key TEXT NOT NULL,
+                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+            );
+
+            CREATE TABLE product_group_members (
+                product_id INTEGER PRIMARY KEY,
+                group_id INTEGER NOT NULL,
+                score REAL NOT NULL,
+                FOREIGN KEY (product_id) REFERENCES products (id) ON DELETE CASCADE,
+                FOREIGN KEY (group_id) REFERENCES product_groups (id) ON DELETE CASCADE
+            );
+
+            CREATE INDEX idx_product_group_members_group ON product_group_members(group_id);
+
+            CREATE TRIGGER products_signature_rename AFTER UPDATE OF name ON products
+            WHEN old.name IS NOT new.name
+            BEGIN
+                DELETE FROM product_group_members WHERE product_id = old.id;
+                DELETE FROM product_signatures WHERE product_id = old.id;
+            END;
+            """,
+            # Down migration
+            """
+            DROP TRIGGER IF EXISTS products_signature_rename;
+            DROP INDEX IF EXISTS idx_product_group_members_group;
+            DROP TABLE IF EXISTS product_group_members;
+            DROP TABLE IF EXISTS product_groups;
+            DROP INDEX IF EXISTS idx_product_signatures_model_key;
+            DROP TABLE IF EXISTS product_signatures;
+            """
+        ),
+        (
+            7,
+            # Up migration: change log for incremental exports. Triggers append
+            # one row per product insert, real change and delete; exporters keep
+            # the last sequence number they emitted as a per-consumer watermark.
+            # Updates that only touch updated_at (an unchanged rescrape) are not logged.
+            """
+            CREATE TABLE product_changes (
+                seq INTEGER PRIMARY KEY AUTOINCREMENT,
+                product_id INTEGER NOT NULL,
+                store TEXT NOT NULL,
+                op TEXT NOT NULL CHECK (op IN ('insert', 'update', 'delete')),
+                changed_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+            );
+
+            CREATE INDEX idx_product_changes_store_seq ON product_changes(store, seq);
+
+            CREATE TRIGGER products_changes_insert AFTER INSERT ON products BEGIN
+                INSERT INTO product_changes (product_id, store, op) VALUES (new.id, new.store, 'insert');
+            END;
+
+            CREATE TRIGGER products_changes_update AFTER UPDATE ON products
+            WHEN old.name IS NOT new.name OR old.price IS NOT new.price OR old.link IS NOT new.link
+                OR old.image_url IS NOT new.image_url OR old.store IS NOT new.store
+                OR old.price_change_percentage IS NOT new.price_change_percentage
+            BEGIN
+                INSERT INTO product_changes (product_id, store, op) VALUES (new.id, new.store, 'update');
+            END;
+
+            CREATE TRIGGER products_changes_delete AFTER DELETE ON products BEGIN
+                INSERT INTO product_changes (product_id, store, op) VALUES (old.id, old.store, 'delete');
+            END;
+
+            CREATE TABLE export_watermarks (
+                consumer TEXT PRIMARY KEY,
+                seq INTEGER NOT NULL,
+                exported_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+            );
+            """,
+            # Down migration
+            """
+            DROP TABLE IF EXISTS export_watermarks;
+            DROP TRIGGER IF EXISTS products_changes_delete;
+            DROP TRIGGER IF EXISTS products_changes_update;
+            DROP TRIGGER IF EXISTS products_changes_insert;
+            DROP INDEX IF EXISTS idx_product_changes_store_seq;
+            DROP TABLE IF EXISTS product_changes;
+            """
         )
     ]
 
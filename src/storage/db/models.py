@@ -1,8 +1,18 @@
-from dataclasses import dataclass
+from array import array
+from dataclasses import dataclass, field
 from datetime import datetime
-from typing import Optional
+from typing import Iterator, List, Optional, Sequence, Union
 
-@dataclass
+# Timestamps are kept as the ISO text SQLite returns and only parsed into
+# datetimes when read, since most consumers (CSV export, stats) never look at them.
+# The raw value takes part in eq/hash; the parsed one is cached in a slot that
+# does not, so reading a timestamp never changes a record's hash
+Timestamp = Union[datetime, str]
+
+def _parse_timestamp(value: Timestamp) -> datetime:
+    return datetime.fromisoformat(value) if isinstance(value, str) else value
+
+@dataclass(frozen=True, slots=True, init=False)
 class Product:
     id: Optional[int]
     name: str
@@ -11,12 +21,47 @@ class Product:
     image_url: str
     store: str
     price_change_percentage: float
-    created_at: datetime
-    updated_at: datetime
+    _created_at: Timestamp
+    _updated_at: Timestamp
+    _created_at_parsed: Optional[datetime] = field(default=None, compare=False, hash=False, repr=False)
+    _updated_at_parsed: Optional[datetime] = field(default=None, compare=False, hash=False, repr=False)
+
+    # Positional order matches the column order of the products SELECTs, so a
+    # cursor row can be passed straight through as Product(*row)
+    def __init__(self, id: Optional[int], name: str, price: float, link: str, image_url: str,
+                 store: str, price_change_percentage: float, created_at: Timestamp, updated_at: Timestamp):
+        object.__setattr__(self, 'id', id)
+        object.__setattr__(self, 'name', name)
+        object.__setattr__(self, 'price', price)
+        object.__setattr__(self, 'link', link)
+        object.__setattr__(self, 'image_url', image_url)
+        object.__setattr__(self, 'store', store)
+        object.__setattr__(self, 'price_change_percentage', price_change_percentage)
+        object.__setattr__(self, '_created_at', created_at)
+        object.__setattr__(self, '_updated_at', updated_at)
+        object.__setattr__(self, '_created_at_parsed', None)
+        object.__setattr__(self, '_updated_at_parsed', None)
+
+    @property
+    def created_at(self) -> datetime:
+        if self._created_at_parsed is None:
+            object.__setattr__(self, '_created_at_parsed', _parse_timestamp(self._created_at))
+        return self._created_at_parsed
+
+    @property
+    def updated_at(self) -> datetime:
+        if self._updated_at_parsed is None:
+            object.__setattr__(self, '_updated_at_parsed', _parse_timestamp(self._updated_at))
+        return self._updated_at_parsed
+
+    @staticmethod
+    def row_factory(cursor, row: tuple) -> 'Product':
+        """sqlite3 row factory building a Product directly from the cursor tuple"""
+        return Product(*row)
 
     @classmethod
-    def from_row(cls, row: dict) -> 'Product':
-        """Create a Product instance from a database row"""
+    def from_row(cls, row) -> 'Product':
+        """Create a Product instance from a database row (any mapping of column names)"""
         return cls(
             id=row['id'],
             name=row['name'],
@@ -25,13 +70,14 @@ class Product:
             image_url=row['image_url'],
             store=row['store'],
             price_change_percentage=row['price_change_percentage'],
-            created_at=datetime.fromisoformat(row['created_at']),
-            updated_at=datetime.fromisoformat(row['updated_at'])
+            created_at=row['created_at'],
+            updated_at=row['updated_at']
         )
 
     @classmethod
     def from_dict(cls, data: dict) -> 'Product':
         """Create a Product instance from a dictionary"""
+        now = datetime.now()
         return cls(
             id=None,
             name=data['name'],
@@ -40,23 +86,91 @@ class Product:
             image_url=data['image'],
             store=data.get('store', 'unknown'),
             price_change_percentage=data.get('price_change_percentage', 0),
-            created_at=datetime.now(),
-            updated_at=datetime.now()
+            created_at=now,
+            updated_at=now
         )
 
-@dataclass
+@dataclass(frozen=True, slots=True, init=False)
 class PriceHistory:
     id: Optional[int]
     product_id: int
     price: float
-    recorded_at: datetime
+    _recorded_at: Timestamp
+    _recorded_at_parsed: Optional[datetime] = field(default=None, compare=False, hash=False, repr=False)
+
+    def __init__(self, id: Optional[int], product_id: int, price: float, recorded_at: Timestamp):
+        object.__setattr__(self, 'id', id)
+        object.__setattr__(self, 'product_id', product_id)
+        object.__setattr__(self, 'price', price)
+        object.__setattr__(self, '_recorded_at', recorded_at)
+        object.__setattr__(self, '_recorded_at_parsed', None)
+
+    @property
+    def recorded_at(self) -> datetime:
+        if self._recorded_at_parsed is None:
+            object.__setattr__(self, '_recorded_at_parsed', _parse_timestamp(self._recorded_at))
+        return self._recorded_at_parsed
+
+    @staticmethod
+    def row_factory(cursor, row: tuple) -> 'PriceHistory':
+        """sqlite3 row factory building a PriceHistory directly from the cursor tuple"""
+        return PriceHistory(*row)
 
     @classmethod
-    def from_row(cls, row: dict) -> 'PriceHistory':
-        """Create a PriceHistory instance from a database row"""
+    def from_row(cls, row) -> 'PriceHistory':
+        """Create a PriceHistory instance from a database row (any mapping of column names)"""
         return cls(
             id=row['id'],
             product_id=row['product_id'],
             price=row['price'],
-            recorded_at=datetime.fromisoformat(row['recorded_at'])
-        ) 
\ No newline at end of file
+            recorded_at=row['recorded_at']
+        )
+
+class ProductBatch:
+    """
+    Column-oriented block of products for bulk paths (exports, analytics).
+    Numbers live in typed arrays and text in plain lists, so a million rows
+    cost a handful of containers instead of a million objects. Indexing or
+    iterating materialises Product records on demand.
+    """
+
+    __slots__ = ('ids', 'names', 'prices', 'links', 'image_urls', 'stores',
+                 'price_change_percentages', 'created_at', 'updated_at')
+
+    def __init__(self):
+        self.ids = array('q')
+        self.names: List[str] = []
+        self.prices = array('d')
+        self.links: List[str] = []
+        self.image_urls: List[str] = []
+        self.stores: List[str] = []
+        self.price_change_percentages = array('d')
+        self.created_at: List[str] = []
+        self.updated_at: List[str] = []
+
+    def extend(self, rows: Sequence[tuple]) -> None:
+        """Append rows in products SELECT column order"""
+        for row in rows:
+            self.ids.append(row[0])
+            self.names.append(row[1])
+            self.prices.append(row[2])
+            self.links.append(row[3])
+            self.image_urls.append(row[4])
+            self.stores.append(row[5])
+            self.price_change_percentages.append(row[6] or 0.0)
+            self.created_at.append(row[7])
+            self.updated_at.append(row[8])
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def __getitem__(self, index: int) -> Product:
+        return Product(
+            self.ids[index], self.names[index], self.prices[index], self.links[index],
+            self.image_urls[index], self.stores[index], self.price_change_percentages[index],
+            self.created_at[index], self.updated_at[index]
+        )
+
+    def __iter__(self) -> Iterator[Product]:
+        for index in range(len(self)):
+            yield self[index]
@@ -0,0 +1,191 @@
+import json
+import os
+import sqlite3
+import sys
+import threading
+import time
+from dataclasses import dataclass, field, asdict
+from pathlib import Path
+from typing import Dict, List, Optional, Union
+
+# Frames from these files are plumbing, not the caller we want to blame
+_SKIP_FILES = (
+    os.path.normcase(os.path.abspath(__file__)),
+    os.path.normcase(os.path.join(os.path.dirname(os.path.abspath(__file__)), "connection.py")),
+)
+
+def _calling_method(depth: int = 2) -> str:
+    """Name the first frame outside the DB plumbing, as Class.method when it is a method"""
+    frame = sys._getframe(depth)
+    while frame is not None:
+        filename = os.path.normcase(os.path.abspath(frame.f_code.co_filename))
+        if filename not in _SKIP_FILES and not filename.endswith("contextlib.py"):
+            owner = frame.f_locals.get("self")
+            if owner is not None:
+                return f"{type(owner).__name__}.{frame.f_code.co_name}"
+            return f"{Path(filename).stem}.{frame.f_code.co_name}"
+        frame = frame.f_back
+    return "<unknown>"
+
+@dataclass
+class CallerStats:
+    """Database cost attributed to one calling method"""
+    caller: str
+    connections: int = 0
+    statements: int = 0
+    executes: int = 0
+    total_ms: float = 0.0
+
+@dataclass
+class SlowStatement:
+    caller: str
+    sql: str
+    elapsed_ms: float
+    plan: List[str] = field(default_factory=list)
+
+class QueryProfiler:
+    """
+    Records SQL statement counts, execution time and connection opens per
+    calling method. Statement counts come from sqlite3 trace callbacks, so
+    statements run by executescript are included.
+    """
+
+    def __init__(self, slow_ms: float = 50.0, explain: bool = True, max_slow: int = 20):
+        """
+        Args:
+            slow_ms: Statements slower than this are kept with their query plan
+            explain: Capture EXPLAIN QUERY PLAN for slow statements
+            max_slow: Number of slowest statements kept
+        """
+        self.slow_ms = slow_ms
+        self.explain = explain
+        self.max_slow = max_slow
+        self.callers: Dict[str, CallerStats] = {}
+        self.slow_statements: List[SlowStatement] = []
+        self._lock = threading.Lock()
+        self._local = threading.local()
+
+    def _stats(self, caller: str) -> CallerStats:
+        if caller not in self.callers:
+            self.callers[caller] = CallerStats(caller)
+        return self.callers[caller]
+
+    def connect(self, db_path: str, uri: bool = False) -> sqlite3.Connection:
+        """Open a connection whose statements are recorded by this profiler"""
+        conn = sqlite3.connect(db_path, factory=ProfilingConnection, uri=uri)
+        conn._profiler = self
+        conn.set_trace_callback(self._on_statement)
+        with self._lock:
+            self._stats(_calling_method()).connections += 1
+        return conn
+
+    def _on_statement(self, sql: str) -> None:
+        if getattr(self._local, "explaining", False):
+            return
+        caller = _calling_method()
+        with self._lock:
+            self._stats(caller).statements += 1
+
+    def record_execute(self, conn: sqlite3.Connection, sql: str, params, elapsed: float) -> None:
+        caller = _calling_method()
+        elapsed_ms = elapsed * 1000
+        with self._lock:
+            stats = self._stats(caller)
+            stats.executes += 1
+            stats.total_ms += elapsed_ms
+
+        if elapsed_ms < self.slow_ms:
+            return
+        plan = []
+        if self.explain and sql.lstrip()[:6].upper() in ("SELECT", "UPDATE", "DELETE", "INSERT"):
+            self._local.explaining = True
+            try:
+                rows = sqlite3.Connection.execute(conn, f"EXPLAIN QUERY PLAN {sql}", params or ()).fetchall()
+                plan = [row[-1] for row in rows]
+            except sqlite3.Error as e:
+                plan = [f"<plan unavailable: {e}>"]
+            finally:
+                self._local.explaining = False
+        with self._lock:
+            self.slow_statements.append(SlowStatement(caller, " ".join(sql.split()), elapsed_ms, plan))
+            self.slow_statements.sort(key=lambda statement: statement.elapsed_ms, reverse=True)
+            del self.slow_statements[self.max_slow:]
+
+    def ranked(self) -> List[CallerStats]:
+        """Callers ordered by total execution time"""
+        with self._lock:
+            return sorted(self.callers.values(), key=lambda stats: stats.total_ms, reverse=True)
+
+    def report(self) -> str:
+        """Human readable ranking of callers and slow statements"""
+        lines = ["SQL profile (by total time):",
+                 f"  {'caller':<50} {'conns':>6} {'stmts':>7} {'total ms':>10} {'ms/stmt':>8}"]
+        for stats in self.ranked():
+            per_statement = stats.total_ms / stats.executes if stats.executes else 0.0
+            lines.append(f"  {stats.caller:<50} {stats.connections:>6} {stats.statements:>7} "
+                         f"{stats.total_ms:>10.2f} {per_statement:>8.3f}")
+        if self.slow_statements:
+            lines.append(f"Slow statements (>= {self.slow_ms:g}ms):")
+            for statement in self.slow_statements:
+                lines.append(f"  {statement.elapsed_ms:8.2f}ms {statement.caller}: {statement.sql[:120]}")
+                for step in statement.plan:
+                    lines.append(f"      {step}")
+        return "\n".join(lines)
+
+    def dump(self, path: Union[str, Path]) -> Path:
+        """Write the profile as JSON"""
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(json.dumps({
+            "callers": [asdict(stats) for stats in self.ranked()],
+            "slow_statements": [asdict(statement) for statement in self.slow_statements],
+        }, indent=2), encoding="utf-8")
+        return path
+
+class ProfilingConnection(sqlite3.Connection):
+    """Connection that times execute calls for its QueryProfiler"""
+
+    def execute(self, sql, parameters=()):
+        started = time.perf_counter()
+        try:
+            return super().execute(sql, parameters)
+        finally:
+            self._profiler.record_execute(self, sql, parameters, time.perf_counter() - started)
+
+    def executemany(self, sql, seq_of_parameters):
+        started = time.perf_counter()
+        try:
+            return super().executemany(sql, seq_of_parameters)
+        finally:
+            self._profiler.record_execute(self, sql, None, time.perf_counter() - started)
+
+    def executescript(self, sql_script):
+        started = time.perf_counter()
+        try:
+            return super().executescript(sql_script)
+        finally:
+            self._profiler.record_execute(self, "<script>", None, time.perf_counter() - started)
+
+    def commit(self):
+        started = time.perf_counter()
+        try:
+            return super().commit()
+        finally:
+            self._profiler.record_execute(self, "COMMIT", None, time.perf_counter() - started)
+
+_active: Optional[QueryProfiler] = None
+
+def enable_profiling(profiler: Optional[QueryProfiler] = None) -> QueryProfiler:
+    """Profile every DatabaseConnection opened from now on"""
+    global _active
+    _active = profiler or QueryProfiler()
+    return _active
+
+def disable_profiling() -> Optional[QueryProfiler]:
+    """Stop profiling and return the profiler that was active"""
+    global _active
+    profiler, _active = _active, None
+    return profiler
+
+def active_profiler() -> Optional[QueryProfiler]:
+    return _active
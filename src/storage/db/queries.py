@@ -1,53 +1,68 @@
-from typing import List, Optional, Dict
+from typing import List, Optional, Dict, Tuple
+import re
 import sqlite3
 from datetime import datetime
+from difflib import SequenceMatcher
 
-from .models import Product, PriceHistory
+from .models import Product, PriceHistory, ProductBatch
 from .connection import DatabaseConnection
 
+# Trigram candidates fetched before rescoring a fuzzy match
+FUZZY_CANDIDATES = 20
+# A fuzzy lookup searches for any of this many consecutive pieces of the name.
+# Every edit breaks at most one piece, so a name within FUZZY_CHUNKS - 1 edits
+# (0.9 similarity on a typical 40 character title) still shares a whole piece.
+FUZZY_CHUNKS = 5
+FUZZY_MIN_CHUNK = 4
+# The expression of products.name_key (migration 5) applied to a lookup name:
+# the name without case, spacing and punctuation. Keep the two in step.
+NAME_KEY_SQL = "lower(replace(replace(replace(replace(replace(replace({}, ' ', ''), '-', ''), '_', ''), ',', ''), '(', ''), ')', ''))"
+
+def normalise_name(name: str) -> str:
+    """Lowercase a listing name and collapse its whitespace"""
+    return " ".join(name.lower().split())
+
+def name_similarity(a: str, b: str) -> float:
+    """Similarity of two listing names between 0 and 1"""
+    return SequenceMatcher(None, normalise_name(a), normalise_name(b)).ratio()
+
+def same_model_numbers(a: str, b: str) -> bool:
+    """True when two names carry the same numbers (RTX 4070 12GB vs RTX4070 12 GB, but not RTX 4080)"""
+    return sorted(re.findall(r"\d+", a)) == sorted(re.findall(r"\d+", b))
+
 class ProductQueries:
     def __init__(self, connection: DatabaseConnection):
         self.connection = connection
 
-    def insert_product(self, product: Product, conn=None) -> int:
+    def insert_product(self, product: Product, conn=None, job_id: Optional[int] = None) -> int:
         """
-        Insert a single product and return its ID
+        Insert a single product with its first price history entry and return its ID
         Args:
             product: Product to insert
             conn: Optional connection to use (for batch operations)
+            job_id: Ledger job the product came from, recorded with its first price
         """
         if conn is None:
-            with self.connection.get_connection() as conn:
-                cursor = conn.execute("""
-                    INSERT INTO products (name, price, link, image_url, store, price_change_percentage, created_at, updated_at)
-                    VALUES (?, ?, ?, ?, ?, ?, ?, ?)
-                """, (
-                    product.name,
-                    product.price,
-                    product.link,
-                    product.image_url,
-                    product.store,
-                    product.price_change_percentage,
-                    product.created_at.isoformat(),
-                    product.updated_at.isoformat()
-                ))
-                conn.commit()
-                return cursor.lastrowid
-        else:
-            cursor = conn.execute("""
-                INSERT INTO products (name, price, link, image_url, store, price_change_percentage, created_at, updated_at)
-                VALUES (?, ?, ?, ?, ?, ?, ?, ?)
-            """, (
-                product.name,
-                product.price,
-                product.link,
-                product.image_url,
-                product.store,
-                product.price_change_percentage,
-                product.created_at.isoformat(),
-                product.updated_at.isoformat()
-            ))
-            return cursor.lastrowid
+            with self.connection.transaction() as conn:
+                return self.insert_product(product, conn, job_id)
+        cursor = conn.execute("""
+            INSERT INTO products (name, price, link, image_url, store, price_change_percentage, created_at, updated_at)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+        """, (
+            product.name,
+            product.price,
+            product.link,
+            product.image_url,
+            product.store,
+            product.price_change_percentage,
+            product.created_at.isoformat(),
+            product.updated_at.isoformat()
+        ))
+        conn.execute("""
+            INSERT INTO price_history (product_id, price, job_id)
+            VALUES (?, ?, ?)
+        """, (cursor.lastrowid, product.price, job_id))
+        return cursor.lastrowid
 
     def insert_products(self, products: List[Product]) -> List[int]:
         """Insert or update multiple products and return their IDs"""
@@ -105,7 +120,42 @@ class ProductQueries:
         
         with self.connection.get_connection() as conn:
             cursor = conn.execute(query, params)
-            return [Product.from_row(dict(row)) for row in cursor.fetchall()]
+            cursor.row_factory = Product.row_factory
+            return cursor.fetchall()
+
+    def get_products_batch(self, store: Optional[str] = None, limit: Optional[int] = None,
+                           chunk_size: int = 10000) -> ProductBatch:
+        """
+        Retrieve products into a column-oriented ProductBatch for bulk paths
+        Args:
+            store: Optional store filter
+            limit: Optional maximum number of products (all products when None)
+            chunk_size: Rows fetched from SQLite at a time
+        """
+        query = """
+            SELECT id, name, price, link, image_url, store, price_change_percentage, created_at, updated_at
+            FROM products
+        """
+        params: list = []
+
+        if store:
+            query += " WHERE store = ?"
+            params.append(store)
+
+        if limit is not None:
+            query += " LIMIT ?"
+            params.append(limit)
+
+        batch = ProductBatch()
+        with self.connection.get_connection() as conn:
+            cursor = conn.execute(query, params)
+            cursor.row_factory = None  # plain tuples, no per-row mapping
+            while True:
+                rows = cursor.fetchmany(chunk_size)
+                if not rows:
+                    break
+                batch.extend(rows)
+        return batch
 
     def get_product_by_id(self, product_id: int) -> Optional[Product]:
         """Retrieve a single product by ID"""
@@ -115,8 +165,23 @@ class ProductQueries:
                 FROM products
                 WHERE id = ?
             """, (product_id,))
-            row = cursor.fetchone()
-            return Product.from_row(dict(row)) if row else None
+            cursor.row_factory = Product.row_factory
+            return cursor.fetchone()
+
+    def get_products_by_ids(self, product_ids: List[int]) -> List[Product]:
+        """Retrieve several products by ID in one query, by ID; IDs no longer stored are skipped"""
+        if not product_ids:
+            return []
+        placeholders = ",".join("?" * len(product_ids))
+        with self.connection.get_connection() as conn:
+            cursor = conn.execute(f"""
+                SELECT id, name, price, link, image_url, store, price_change_percentage, created_at, updated_at
+                FROM products
+                WHERE id IN ({placeholders})
+                ORDER BY id
+            """, product_ids)
+            cursor.row_factory = Product.row_factory
+            return cursor.fetchall()
 
     def delete_product(self, product_id: int) -> None:
         """Delete a product and its price history"""
@@ -134,7 +199,8 @@ class ProductQueries:
                 WHERE product_id = ?
                 ORDER BY recorded_at DESC
             """, (product_id,))
-            return [PriceHistory.from_row(dict(row)) for row in cursor.fetchall()]
+            cursor.row_factory = PriceHistory.row_factory
+            return cursor.fetchall()
 
     def get_latest_prices(self, product_ids: List[int]) -> Dict[int, float]:
         """Get the most recent price for multiple products"""
@@ -161,8 +227,8 @@ class ProductQueries:
                 FROM products
                 WHERE name = ? AND store = ?
             """, (name, store))
-            row = cursor.fetchone()
-            return Product.from_row(dict(row)) if row else None
+            cursor.row_factory = Product.row_factory
+            return cursor.fetchone()
 
     def calculate_price_change(self, product_id: int, new_price: float) -> float:
         """Calculate price change percentage from the last known price"""
@@ -183,45 +249,107 @@ class ProductQueries:
             return 0.0
 
     def upsert_product(self, product: Product, conn=None) -> int:
-        """Insert or update a product based on name and store"""
-        existing_product = self.get_product_by_name_and_store(product.name, product.store)
-        
-        if existing_product:
-            # Calculate price change
-            price_change = self.calculate_price_change(existing_product.id, product.price)
-            
-            # Update existing product
-            if conn is None:
-                with self.connection.get_connection() as conn:
-                    conn = conn
-            else:
-                conn = conn
-            
-                conn.execute("""
-                    UPDATE products 
-                    SET price = ?, link = ?, image_url = ?, 
-                        price_change_percentage = ?, updated_at = ?
-                    WHERE id = ?
-                """, (
-                    product.price,
-                    product.link,
-                    product.image_url,
-                    price_change,
-                    datetime.now().isoformat(),
-                    existing_product.id
-                ))
-                
-                # Record new price in history
-                conn.execute("""
-                    INSERT INTO price_history (product_id, price)
-                    VALUES (?, ?)
-                """, (existing_product.id, product.price))
-                
-                conn.commit()
-                return existing_product.id
-        else:
-            # Insert new product
-            return self.insert_product(product)
+        """
+        Insert or update a product based on name and store, committing straight away
+        (a single-product upsert_products_in_transaction)
+        Args:
+            product: Product to insert or update
+            conn: Optional connection to use (for batch operations)
+        """
+        if conn is None:
+            with self.connection.transaction() as conn:
+                return self.upsert_products_in_transaction([product], conn)[0]
+        product_id = self.upsert_products_in_transaction([product], conn)[0]
+        conn.commit()
+        return product_id
+
+    def upsert_products_in_transaction(self, products: List[Product], conn: sqlite3.Connection,
+                                       outcomes: Optional[Dict[str, int]] = None,
+                                       job_id: Optional[int] = None,
+                                       fuzzy_threshold: Optional[float] = None) -> List[int]:
+        """
+        Insert or update multiple products on an open connection without committing.
+        The caller owns the transaction, so several batches can share one commit.
+        Args:
+            products: Products to insert or update
+            conn: Connection to run every statement on
+            outcomes: Optional dict incremented with 'inserted', 'updated' and 'unchanged' counts
+            job_id: Ledger job the products came from. Products this job already
+                recorded a price for are left alone, so retrying a job is idempotent.
+            fuzzy_threshold: Similarity for fuzzy name matching (see match_existing_product).
+                A name not stored yet that differs from a stored product's only in
+                case, spacing or punctuation updates that product under its stored
+                name; with a threshold, a near-identical name also matches and
+                renames the stored product instead of inserting a duplicate
+        Returns:
+            List of inserted/updated product IDs, in input order
+        """
+        product_ids = []
+        for product in products:
+            row = conn.execute("""
+                SELECT id, price FROM products
+                WHERE name = ? AND store = ?
+            """, (product.name, product.store)).fetchone()
+
+            if row is None:
+                row = self._name_key_match(conn, product.name, product.store)
+                if row is None and fuzzy_threshold is not None:
+                    row = self._fuzzy_match(conn, product.name, product.store, fuzzy_threshold)
+                    if row is not None:
+                        # Opted in: follow the store's reworded title
+                        conn.execute("UPDATE products SET name = ? WHERE id = ?", (product.name, row['id']))
+                if row is not None and outcomes is not None:
+                    outcomes['matched'] = outcomes.get('matched', 0) + 1
+
+            if row is None:
+                product_ids.append(self.insert_product(product, conn, job_id))
+                if outcomes is not None:
+                    outcomes['inserted'] = outcomes.get('inserted', 0) + 1
+                continue
+
+            product_id = row['id']
+            if job_id is not None and conn.execute("""
+                SELECT 1 FROM price_history WHERE product_id = ? AND job_id = ?
+            """, (product_id, job_id)).fetchone():
+                product_ids.append(product_id)
+                if outcomes is not None:
+                    outcomes['unchanged'] = outcomes.get('unchanged', 0) + 1
+                continue
+
+            if outcomes is not None:
+                outcome = 'unchanged' if row['price'] == product.price else 'updated'
+                outcomes[outcome] = outcomes.get(outcome, 0) + 1
+            last_price = conn.execute("""
+                SELECT price
+                FROM price_history
+                WHERE product_id = ?
+                ORDER BY recorded_at DESC
+                LIMIT 1
+            """, (product_id,)).fetchone()
+            price_change = 0.0
+            if last_price and last_price['price'] > 0:
+                price_change = ((product.price - last_price['price']) / last_price['price']) * 100
+
+            conn.execute("""
+                UPDATE products
+                SET price = ?, link = ?, image_url = ?,
+                    price_change_percentage = ?, updated_at = ?
+                WHERE id = ?
+            """, (
+                product.price,
+                product.link,
+                product.image_url,
+                price_change,
+                datetime.now().isoformat(),
+                product_id
+            ))
+            conn.execute("""
+                INSERT OR IGNORE INTO price_history (product_id, price, job_id)
+                VALUES (?, ?, ?)
+            """, (product_id, product.price, job_id))
+            product_ids.append(product_id)
+
+        return product_ids
 
     def get_price_statistics(self, product_id: int) -> Dict[str, float]:
         """Get price statistics for a product (lowest, highest, average price)"""
@@ -254,4 +382,184 @@ class ProductQueries:
             }
             result.append(product_dict)
         
-        return result 
\ No newline at end of file
+        return result
+
+    @staticmethod
+    def fts_query(text: str) -> Optional[str]:
+        """
+        Turn free text into an FTS5 query matching every word, the last one as a prefix
+        ("rtx 407" -> '"rtx" "407"*'). Returns None when the text has no words.
+        """
+        terms = [f'"{word}"' for word in re.findall(r"\w+", text.lower())]
+        if not terms:
+            return None
+        terms[-1] += "*"
+        return " ".join(terms)
+
+    def search_products(self, text: str, store: Optional[str] = None, limit: int = 10,
+                        fuzzy: bool = False) -> List[Product]:
+        """
+        Full-text search over product names, best matches first
+        Args:
+            text: Words to look for; the last word also matches as a prefix
+            store: Optional store name to filter by
+            limit: Maximum number of products returned
+            fuzzy: Fall back to fuzzy matching (see find_similar_products) when no name has every word
+        """
+        query = self.fts_query(text)
+        if query is None:
+            return []
+        with self.connection.get_connection() as conn:
+            cursor = conn.execute("""
+                SELECT p.id, p.name, p.price, p.link, p.image_url, p.store,
+                       p.price_change_percentage, p.created_at, p.updated_at
+                FROM products_fts
+                JOIN products p ON p.id = products_fts.rowid
+                WHERE products_fts MATCH ? AND (? IS NULL OR p.store = ?)
+                ORDER BY products_fts.rank
+                LIMIT ?
+            """, (query, store, store, limit))
+            cursor.row_factory = Product.row_factory
+            products = cursor.fetchall()
+            if products or not fuzzy:
+                return products
+            return [product for product, _ in self._similar_products(conn, text, store, limit)]
+
+    @staticmethod
+    def trigram_query(text: str) -> Optional[str]:
+        """
+        FTS5 query over the trigram index matching names that contain any of
+        FUZZY_CHUNKS consecutive pieces of text, or None if text is too short.
+        Whole pieces keep the lookup selective; a query of single trigrams
+        would read the long posting lists of common ones.
+        """
+        name = normalise_name(text)
+        if len(name) < 3:
+            return None
+        count = max(min(FUZZY_CHUNKS, len(name) // FUZZY_MIN_CHUNK), 1)
+        size = len(name) // count
+        pieces = [name[i * size:(i + 1) * size if i < count - 1 else len(name)] for i in range(count)]
+        return " OR ".join('"{}"'.format(piece.replace('"', '""')) for piece in pieces)
+
+    def _similar_products(self, conn: sqlite3.Connection, name: str, store: Optional[str],
+                          limit: int, min_score: float = 0.0) -> List[Tuple[Product, float]]:
+        query = self.trigram_query(name)
+        if query is None:
+            return []
+        # Names sharing the most (and rarest) trigrams rank first; rescore those exactly
+        cursor = conn.execute("""
+            SELECT p.id, p.name, p.price, p.link, p.image_url, p.store,
+                   p.price_change_percentage, p.created_at, p.updated_at
+            FROM products_trigram
+            JOIN products p ON p.id = products_trigram.rowid
+            WHERE products_trigram MATCH ? AND (? IS NULL OR p.store = ?)
+            ORDER BY products_trigram.rank
+            LIMIT ?
+        """, (query, store, store, max(limit, FUZZY_CANDIDATES)))
+        cursor.row_factory = Product.row_factory
+        scored = [(product, name_similarity(name, product.name)) for product in cursor]
+        scored = [(product, score) for product, score in scored if score >= min_score]
+        scored.sort(key=lambda pair: pair[1], reverse=True)
+        return scored[:limit]
+
+    def find_similar_products(self, name: str, store: Optional[str] = None, limit: int = 5,
+                              min_score: float = 0.0) -> List[Tuple[Product, float]]:
+        """
+        Products whose names are close to name, tolerant of typos and re-spacing
+        Args:
+            name: Listing name (or search text) to match
+            store: Optional store name to filter by
+            limit: Maximum number of products returned
+            min_score: Minimum similarity (0-1) of returned names
+        Returns:
+            (product, similarity) pairs, most similar first
+        """
+        with self.connection.get_connection() as conn:
+            return self._similar_products(conn, name, store, limit, min_score)
+
+    def match_existing_product(self, conn: sqlite3.Connection, name: str, store: str,
+                               threshold: Optional[float] = None) -> Optional[sqlite3.Row]:
+        """
+        Find the stored product a listing from a previous run most likely is.
+        A name differing only in case, spacing or punctuation matches through
+        the name_key index. With a threshold, a near-identical name from the
+        same store with the same model numbers also matches (a trigram lookup,
+        noticeably slower on large catalogues).
+        Returns:
+            Row with the product's id and price, or None
+        """
+        row = self._name_key_match(conn, name, store)
+        if row is not None or threshold is None:
+            return row
+        return self._fuzzy_match(conn, name, store, threshold)
+
+    def _name_key_match(self, conn: sqlite3.Connection, name: str, store: str) -> Optional[sqlite3.Row]:
+        # Several stored spellings can share a key; the oldest product wins
+        return conn.execute(f"""
+            SELECT id, price FROM products
+            WHERE store = ? AND name_key = {NAME_KEY_SQL.format('?')}
+            ORDER BY id
+            LIMIT 1
+        """, (store, name)).fetchone()
+
+    def _fuzzy_match(self, conn: sqlite3.Connection, name: str, store: str,
+                     threshold: float) -> Optional[sqlite3.Row]:
+        for product, _ in self._similar_products(conn, name, store, 1, threshold):
+            if same_model_numbers(name, product.name):
+                return conn.execute("SELECT id, price FROM products WHERE id = ?", (product.id,)).fetchone()
+        return None
+
+    def get_lowest_priced(self, text: str, store: Optional[str] = None, limit: int = 5) -> List[Product]:
+        """Cheapest current products whose names match text (see search_products)"""
+        query = self.fts_query(text)
+        if query is None:
+            return []
+        with self.connection.get_connection() as conn:
+            cursor = conn.execute("""
+                SELECT p.id, p.name, p.price, p.link, p.image_url, p.store,
+                       p.price_change_percentage, p.created_at, p.updated_at
+                FROM products_fts
+                JOIN products p ON p.id = products_fts.rowid
+                WHERE products_fts MATCH ? AND (? IS NULL OR p.store = ?)
+                ORDER BY p.price
+                LIMIT ?
+            """, (query, store, store, limit))
+            cursor.row_factory = Product.row_factory
+            return cursor.fetchall()
+
+    def get_price_statistics_batch(self, product_ids: List[int]) -> Dict[int, Dict[str, float]]:
+        """Price statistics (lowest, highest, average, count) for several products in one query"""
+        if not product_ids:
+            return {}
+        placeholders = ",".join("?" * len(product_ids))
+        with self.connection.get_connection() as conn:
+            cursor = conn.execute(f"""
+                SELECT product_id,
+                       MIN(price) as lowest_price,
+                       MAX(price) as highest_price,
+                       AVG(price) as avg_price,
+                       COUNT(*) as points
+                FROM price_history
+                WHERE product_id IN ({placeholders})
+                GROUP BY product_id
+            """, product_ids)
+            return {
+                row['product_id']: {
+                    'lowest_price': row['lowest_price'],
+                    'highest_price': row['highest_price'],
+                    'avg_price': round(row['avg_price'], 2),
+                    'points': row['points'],
+                }
+                for row in cursor
+            }
+
+    def get_store_summary(self) -> List[Dict]:
+        """Get product counts and last update time per store"""
+        with self.connection.get_connection() as conn:
+            cursor = conn.execute("""
+                SELECT store, COUNT(*) as product_count, MAX(updated_at) as last_updated
+                FROM products
+                GROUP BY store
+                ORDER BY store
+            """)
+            return [dict(row) for row in cursor]
@@ -0,0 +1,132 @@
+import gzip
+import os
+import shutil
+import sqlite3
+import time
+from dataclasses import dataclass
+from datetime import datetime
+from pathlib import Path
+from typing import List, Optional, Union
+from config import (
+    SNAPSHOT_DIR, SNAPSHOT_KEEP, SNAPSHOT_KEEP_BACKUPS, SNAPSHOT_PAGES_PER_STEP, SNAPSHOT_STEP_PAUSE
+)
+
+SNAPSHOT_PREFIX = "products-"
+SNAPSHOT_SUFFIX = ".db"
+BACKUP_SUFFIX = ".db.gz"
+# Restarts (the source changed mid-copy) before copying in one step instead
+MAX_RESTARTS = 5
+
+@dataclass
+class SnapshotResult:
+    path: Path
+    pages: int
+    steps: int
+    restarts: int
+    seconds: float
+    # Compressed copy, when a backup was requested
+    backup_path: Optional[Path] = None
+
+    def __str__(self) -> str:
+        text = (f"Snapshot {self.path} ({self.pages} pages in {self.steps} steps, "
+                f"{self.restarts} restarts, {self.seconds:.2f}s)")
+        return f"{text}; backup {self.backup_path}" if self.backup_path else text
+
+class _TooManyRestarts(Exception):
+    pass
+
+def _copy(source: sqlite3.Connection, target: sqlite3.Connection, pages_per_step: int,
+          step_pause: float, max_restarts: int) -> tuple:
+    """Copy in page steps, pausing between them; returns (pages, steps, restarts)"""
+    progress_state = {"steps": 0, "restarts": 0, "remaining": None, "total": 0}
+
+    def progress(status, remaining, total):
+        progress_state["steps"] += 1
+        progress_state["total"] = total
+        previous = progress_state["remaining"]
+        progress_state["remaining"] = remaining
+        # A write from another connection makes the next step start over
+        if previous is not None and remaining >= previous:
+            progress_state["restarts"] += 1
+            if progress_state["restarts"] > max_restarts:
+                raise _TooManyRestarts()
+        if remaining and step_pause:
+            # The source is only locked during a step; the pause lets writers in
+            time.sleep(step_pause)
+
+    try:
+        source.backup(target, pages=pages_per_step, progress=progress)
+    except _TooManyRestarts:
+        # Writes keep landing between steps: copy the rest in one step, which
+        # holds the read lock until it is done
+        source.backup(target, pages=-1)
+    return progress_state["total"], progress_state["steps"], progress_state["restarts"]
+
+def _snapshot_files(snapshot_dir: Path, suffix: str) -> List[Path]:
+    """Snapshot files with a suffix, oldest first (names sort by timestamp)"""
+    if not snapshot_dir.is_dir():
+        return []
+    return sorted(path for path in snapshot_dir.iterdir()
+                  if path.name.startswith(SNAPSHOT_PREFIX) and path.name.endswith(suffix))
+
+def _rotate(snapshot_dir: Path, suffix: str, keep: int) -> None:
+    files = _snapshot_files(snapshot_dir, suffix)
+    for path in files[:max(len(files) - max(keep, 1), 0)]:
+        path.unlink(missing_ok=True)
+
+def latest_snapshot(snapshot_dir: Union[str, Path] = SNAPSHOT_DIR) -> Optional[Path]:
+    """Newest plain snapshot, or None when none has been taken"""
+    files = _snapshot_files(Path(snapshot_dir), SNAPSHOT_SUFFIX)
+    return files[-1] if files else None
+
+def compress_snapshot(path: Path) -> Path:
+    """Write a gzip copy of a snapshot next to it"""
+    backup_path = path.with_name(path.name[:-len(SNAPSHOT_SUFFIX)] + BACKUP_SUFFIX)
+    temp_path = backup_path.with_name(backup_path.name + ".tmp")
+    with open(path, "rb") as source, gzip.open(temp_path, "wb") as target:
+        shutil.copyfileobj(source, target, 1024 * 1024)
+    os.replace(temp_path, backup_path)
+    return backup_path
+
+def create_snapshot(db_path: str, snapshot_dir: Union[str, Path] = SNAPSHOT_DIR, backup: bool = False,
+                    keep: int = SNAPSHOT_KEEP, keep_backups: int = SNAPSHOT_KEEP_BACKUPS,
+                    pages_per_step: int = SNAPSHOT_PAGES_PER_STEP, step_pause: float = SNAPSHOT_STEP_PAUSE,
+                    max_restarts: int = MAX_RESTARTS) -> SnapshotResult:
+    """
+    Copy a live database into a timestamped snapshot without blocking its writers
+    Args:
+        db_path: Database to copy
+        snapshot_dir: Directory for snapshots and backups
+        backup: Also keep a gzip-compressed copy
+        keep: Plain snapshots kept (older ones are deleted); more than one lets
+            readers finish with the previous snapshot while a new one appears
+        keep_backups: Compressed backups kept
+        pages_per_step: Database pages copied per backup step
+        step_pause: Seconds between steps, during which writers can commit
+        max_restarts: Restarts caused by concurrent writes before the rest is copied in one step
+    Returns:
+        SnapshotResult describing the snapshot
+    """
+    snapshot_dir = Path(snapshot_dir)
+    snapshot_dir.mkdir(parents=True, exist_ok=True)
+    path = snapshot_dir / f"{SNAPSHOT_PREFIX}{datetime.now():%Y%m%d-%H%M%S-%f}{SNAPSHOT_SUFFIX}"
+    temp_path = path.with_name(path.name + ".tmp")
+
+    started = time.perf_counter()
+    source = sqlite3.connect(db_path)
+    target = sqlite3.connect(temp_path)
+    try:
+        pages, steps, restarts = _copy(source, target, pages_per_step, step_pause, max_restarts)
+        # The snapshot must stand alone, without a -wal file next to it
+        target.execute("PRAGMA journal_mode = DELETE")
+    finally:
+        target.close()
+        source.close()
+    os.replace(temp_path, path)
+
+    result = SnapshotResult(path, pages, steps, restarts, time.perf_counter() - started)
+    if backup:
+        result.backup_path = compress_snapshot(path)
+        _rotate(snapshot_dir, BACKUP_SUFFIX, keep_backups)
+    _rotate(snapshot_dir, SNAPSHOT_SUFFIX, keep)
+    return result
@@ -1,5 +1,52 @@
+import asyncio
+import queue
+import threading
+import time
 from .db import Database, Product, PriceHistory
-from typing import List, Dict
+from typing import Iterable, List, Dict, Optional, Tuple
+from config import (
+    DB_WRITE_BATCH_SIZE, DB_WRITE_LINGER, QUERY_CACHE_SIZE, QUERY_CACHE_TTL,
+    FUZZY_MATCH_ENABLED, FUZZY_MATCH_THRESHOLD
+)
+from metrics import metrics
+from .cache import QueryCache, store_tag, product_tag
+
+DEFAULT_DB_PATH = "src/data/products.db"
+
+# Read results shared by the sync helpers and AsyncProductStore; writes through
+# either invalidate the stores and products they touched
+query_cache = QueryCache(QUERY_CACHE_SIZE, QUERY_CACHE_TTL)
+
+def _read_tags(method: str, args: tuple) -> List[str]:
+    """Cache tags for a read query's result"""
+    if method == "get_price_history":
+        return [product_tag(args[0])]
+    if method == "get_latest_prices":
+        return [product_tag(product_id) for product_id in args[0]]
+    # Store-wide reads: the given store, or every store
+    return [store_tag(args[0] if args else None)]
+
+def _cached_read(db_path: str, method: str, *args):
+    """Run a ProductQueries read through the query cache"""
+    def load():
+        with Database(db_path) as db:
+            return getattr(db.products, method)(*args)
+    return query_cache.get_or_load((method, db_path, *_cache_args(args)), _read_tags(method, args), load)
+
+def _cache_args(args: tuple) -> tuple:
+    # Lists of ids are not hashable; order does not change the result
+    return tuple(tuple(sorted(arg)) if isinstance(arg, list) else arg for arg in args)
+
+def invalidate_products(store: str, product_ids: Iterable[int]) -> None:
+    """Drop cached reads that depend on a store's products"""
+    query_cache.invalidate([store_tag(store), store_tag(None), *map(product_tag, product_ids)])
+
+def _to_product_objects(products: List[Dict], store: str) -> List[Product]:
+    """Convert raw parsed products to Product objects with store info"""
+    return [
+        Product.from_dict({**product, 'store': store, 'price_change_percentage': 0})
+        for product in products
+    ]
 
 def store_products(products: List[Dict], store: str) -> List[int]:
     """
@@ -11,29 +58,27 @@ def store_products(products: List[Dict], store: str) -> List[int]:
         List of inserted/updated product IDs
     """
     # Convert raw products to Product objects with store info
-    product_objects = [
-        Product.from_dict({**product, 'store': store, 'price_change_percentage': 0})
-        for product in products
-    ]
-    
+    product_objects = _to_product_objects(products, store)
+
     # Store in database (will handle updates and price tracking)
     with Database() as db:
-        return db.products.insert_products(product_objects)
+        product_ids = db.products.insert_products(product_objects)
+    invalidate_products(store, product_ids)
+    return product_ids
+
+# Reads below are served from query_cache when possible
 
 def get_products(store: str = None) -> List[Product]:
     """Get all products for a store with their current price changes"""
-    with Database() as db:
-        return db.products.get_products(store)
+    return _cached_read(DEFAULT_DB_PATH, "get_products", store)
 
 def get_price_history(product_id: int) -> List[PriceHistory]:
     """Get complete price history for a product"""
-    with Database() as db:
-        return db.products.get_price_history(product_id)
+    return _cached_read(DEFAULT_DB_PATH, "get_price_history", product_id)
 
 def get_latest_prices(product_ids: List[int]) -> Dict[int, float]:
     """Get the most recent prices for multiple products"""
-    with Database() as db:
-        return db.products.get_latest_prices(product_ids)
+    return _cached_read(DEFAULT_DB_PATH, "get_latest_prices", product_ids)
 
 def get_products_with_stats(store: str = None) -> List[Dict]:
     """
@@ -43,5 +88,197 @@ def get_products_with_stats(store: str = None) -> List[Dict]:
     Returns:
         List of dictionaries containing product and price statistics
     """
-    with Database() as db:
-        return db.products.get_products_with_stats(store)
\ No newline at end of file
+    return _cached_read(DEFAULT_DB_PATH, "get_products_with_stats", store)
+
+def get_store_summary() -> List[Dict]:
+    """Get product counts and last update time per store"""
+    return _cached_read(DEFAULT_DB_PATH, "get_store_summary")
+
+# --------------------
+# Async facade
+# --------------------
+
+_STOP = object()
+
+class AsyncProductStore:
+    """
+    Non-blocking storage for the scraping event loop.
+
+    Writes are handed to a single background writer thread that owns one
+    SQLite connection. Product sets queued by concurrent searches are drained
+    together and committed in one transaction (group commit). Reads are served
+    from query_cache, and otherwise run in worker threads so in-flight pages
+    keep loading while SQLite works. Each commit invalidates the cached reads
+    of the stores and products it wrote.
+    """
+
+    def __init__(self, db_path: str = DEFAULT_DB_PATH,
+                 max_batch_size: int = DB_WRITE_BATCH_SIZE,
+                 linger: float = DB_WRITE_LINGER):
+        """
+        Args:
+            db_path: Path of the SQLite database
+            max_batch_size: Maximum number of products committed in one transaction
+            linger: Seconds the writer waits for more product sets before committing
+        """
+        self.db_path = db_path
+        self.max_batch_size = max_batch_size
+        self.linger = linger
+        # Similarity above which an unseen listing name updates a stored product
+        self.fuzzy_threshold = FUZZY_MATCH_THRESHOLD if FUZZY_MATCH_ENABLED else None
+        self._queue: queue.Queue = queue.Queue()
+        self._thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+
+    # Writes
+
+    async def store_products(self, products: List[Dict], store: str, job_id: Optional[int] = None) -> List[int]:
+        """
+        Queue products for the writer thread and wait until they are committed
+        Args:
+            products: List of product dictionaries
+            store: Store name (e.g., 'microcenter')
+            job_id: Ledger job the products belong to, making a retried write idempotent
+        Returns:
+            List of inserted/updated product IDs
+        """
+        if not products:
+            return []
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._ensure_writer()
+        self._queue.put((_to_product_objects(products, store), loop, future, job_id))
+        return await future
+
+    def _ensure_writer(self) -> None:
+        """Start the writer thread on first use"""
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(
+                    target=self._writer_loop, name="db-writer", daemon=True
+                )
+                self._thread.start()
+
+    def _writer_loop(self) -> None:
+        """Drain the write queue, committing each drained group in one transaction"""
+        db = Database(self.db_path)
+        with db.connection.get_connection() as conn:
+            stopping = False
+            while not stopping:
+                item = self._queue.get()
+                if item is _STOP:
+                    break
+
+                batch = [item]
+                batch_size = len(item[0])
+                deadline = time.monotonic() + self.linger
+                while batch_size < self.max_batch_size:
+                    try:
+                        next_item = self._queue.get(timeout=max(deadline - time.monotonic(), 0))
+                    except queue.Empty:
+                        break
+                    if next_item is _STOP:
+                        stopping = True
+                        break
+                    batch.append(next_item)
+                    batch_size += len(next_item[0])
+
+                self._commit_batch(db, conn, batch)
+
+    def _commit_batch(self, db: Database, conn, batch: List[Tuple]) -> None:
+        """Commit a group of product sets, falling back to one transaction per set on error"""
+        outcomes = [{} for _ in batch]
+        try:
+            with metrics.timer("db_commit"):
+                results = [db.products.upsert_products_in_transaction(products, conn, item_outcomes, job_id,
+                                                                      self.fuzzy_threshold)
+                           for (products, _, _, job_id), item_outcomes in zip(batch, outcomes)]
+                conn.commit()
+        except Exception as e:
+            conn.rollback()
+            if len(batch) == 1:
+                _, loop, future, _ = batch[0]
+                self._resolve(loop, future, error=e)
+                return
+            # Isolate the failing set so the rest of the group still lands
+            for item in batch:
+                self._commit_batch(db, conn, [item])
+            return
+
+        for (products, loop, future, _), product_ids, item_outcomes in zip(batch, results, outcomes):
+            for outcome, count in item_outcomes.items():
+                metrics.counter(f"products_{outcome}", store=products[0].store).inc(count)
+            invalidate_products(products[0].store, product_ids)
+            self._resolve(loop, future, result=product_ids)
+
+    @staticmethod
+    def _resolve(loop: asyncio.AbstractEventLoop, future: asyncio.Future,
+                 result=None, error: Optional[BaseException] = None) -> None:
+        """Complete a waiting coroutine's future from the writer thread"""
+        def _set():
+            if future.done():
+                return
+            if error is not None:
+                future.set_exception(error)
+            else:
+                future.set_result(result)
+        try:
+            loop.call_soon_threadsafe(_set)
+        except RuntimeError:
+            # The waiting loop is already closed; nobody is left to notify
+            pass
+
+    async def aclose(self) -> None:
+        """Flush pending writes and stop the writer thread"""
+        await asyncio.to_thread(self.close)
+
+    def close(self) -> None:
+        """Flush pending writes and stop the writer thread (blocking)"""
+        with self._lock:
+            thread = self._thread
+            self._thread = None
+        if thread is not None and thread.is_alive():
+            self._queue.put(_STOP)
+            thread.join()
+
+    # Reads
+
+    async def _read(self, method: str, *args):
+        """Serve a read from the cache, or run it in a worker thread and cache the result"""
+        key = (method, self.db_path, *_cache_args(args))
+        hit, value = query_cache.get(key)
+        if hit:
+            return value
+        generation = query_cache.generation
+        value = await asyncio.to_thread(self._load, method, *args)
+        query_cache.put(key, value, _read_tags(method, args), generation)
+        return value
+
+    def _load(self, method: str, *args):
+        with Database(self.db_path) as db:
+            return getattr(db.products, method)(*args)
+
+    async def get_products(self, store: str = None) -> List[Product]:
+        """Get all products for a store without blocking the event loop"""
+        return await self._read("get_products", store)
+
+    async def get_price_history(self, product_id: int) -> List[PriceHistory]:
+        """Get complete price history for a product without blocking the event loop"""
+        return await self._read("get_price_history", product_id)
+
+    async def get_latest_prices(self, product_ids: List[int]) -> Dict[int, float]:
+        """Get the most recent prices for multiple products without blocking the event loop"""
+        return await self._read("get_latest_prices", product_ids)
+
+    async def get_products_with_stats(self, store: str = None) -> List[Dict]:
+        """Get products with their price statistics without blocking the event loop"""
+        return await self._read("get_products_with_stats", store)
+
+_async_store: Optional[AsyncProductStore] = None
+
+def get_async_store() -> AsyncProductStore:
+    """Return the process-wide async store shared by all concurrent searches"""
+    global _async_store
+    if _async_store is None:
+        _async_store = AsyncProductStore()
+    return _async_store
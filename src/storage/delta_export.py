@@ -0,0 +1,238 @@
+import csv
+import hashlib
+import json
+import os
+import re
+from dataclasses import dataclass, field
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple, Union
+from config import EXPORT_DELTA_DIR, EXPORT_DELTA_KEEP, EXPORT_FORMAT, EXPORT_MODE
+from .csv_writer import CSV_HEADER, FOLDER_PATH, csv_row, write_to_csv
+from .db import Database, Product
+
+FORMATS = ("csv", "jsonl")
+DELTA_HEADER = ["Op", "Id"] + CSV_HEADER
+# Products whose rows and statistics are loaded per query
+CHUNK_SIZE = 500
+
+@dataclass
+class ExportResult:
+    store: str
+    path: Path
+    manifest_path: Path
+    from_seq: int
+    to_seq: int
+    full: bool
+    counts: Dict[str, int] = field(default_factory=dict)
+
+    @property
+    def rows(self) -> int:
+        return sum(self.counts.values())
+
+    @property
+    def file_name(self) -> str:
+        """Data file relative to the data folder, as alerts expect"""
+        return os.path.relpath(self.path, FOLDER_PATH)
+
+    def __str__(self) -> str:
+        kind = "Full export" if self.full else f"Delta {self.from_seq}..{self.to_seq}"
+        counts = ", ".join(f"{count} {op}s" for op, count in self.counts.items() if count)
+        return f"{kind} of {self.store}: {self.rows} rows ({counts or 'empty'}) in {self.path}"
+
+def _jsonl_row(op: str, product_id: int, product: Optional[Product], stats: Optional[Dict], store: str) -> Dict:
+    if product is None:
+        return {"op": op, "id": product_id, "store": store}
+    return {
+        "op": op,
+        "id": product.id,
+        "name": product.name,
+        "price": product.price,
+        "price_change_percentage": product.price_change_percentage or 0.0,
+        "lowest_price": stats["lowest_price"],
+        "highest_price": stats["highest_price"],
+        "avg_price": stats["avg_price"],
+        "link": product.link,
+        "image_url": product.image_url,
+        "store": product.store,
+    }
+
+# Statistics of a product without price history, as get_price_statistics reports them
+NO_STATS = {'lowest_price': 0.0, 'highest_price': 0.0, 'avg_price': 0.0}
+
+def _with_stats(db: Database, products: List[Product]) -> Iterator[Tuple[Product, Dict]]:
+    stats = db.products.get_price_statistics_batch([product.id for product in products])
+    for product in products:
+        yield product, stats.get(product.id, NO_STATS)
+
+def _full_rows(db: Database, store: str) -> Iterator[Tuple[str, int, Optional[Product], Optional[Dict]]]:
+    batch = db.products.get_products_batch(store)
+    for start in range(0, len(batch), CHUNK_SIZE):
+        chunk = [batch[index] for index in range(start, min(start + CHUNK_SIZE, len(batch)))]
+        for product, stats in _with_stats(db, chunk):
+            yield "insert", product.id, product, stats
+
+def _delta_rows(db: Database, changes) -> Iterator[Tuple[str, int, Optional[Product], Optional[Dict]]]:
+    for start in range(0, len(changes), CHUNK_SIZE):
+        chunk = changes[start:start + CHUNK_SIZE]
+        live = [change.product_id for change in chunk if change.op != "delete"]
+        rows = {product.id: (product, stats)
+                for product, stats in _with_stats(db, db.products.get_products_by_ids(live))}
+        for change in chunk:
+            if change.op == "delete":
+                yield "delete", change.product_id, None, None
+            elif change.product_id in rows:
+                # Otherwise it was deleted after to_seq; the next delta carries that
+                yield (change.op, change.product_id) + rows[change.product_id]
+
+def _write_rows(path: Path, fmt: str, store: str, rows) -> Tuple[Dict[str, int], str]:
+    """Write rows to a temporary file, rename it into place and return (counts, sha256)"""
+    counts = {"insert": 0, "update": 0, "delete": 0}
+    temp_path = path.with_name(path.name + ".tmp")
+    with open(temp_path, "w", newline="", encoding="utf-8") as file:
+        writer = csv.writer(file) if fmt == "csv" else None
+        if writer is not None:
+            writer.writerow(DELTA_HEADER)
+        for op, product_id, product, stats in rows:
+            counts[op] += 1
+            if writer is None:
+                file.write(json.dumps(_jsonl_row(op, product_id, product, stats, store)) + "\n")
+            elif product is None:
+                writer.writerow([op, product_id] + [""] * (len(CSV_HEADER) - 1) + [store])
+            else:
+                writer.writerow([op, product_id] + csv_row(product, stats))
+    digest = hashlib.sha256()
+    with open(temp_path, "rb") as file:
+        for block in iter(lambda: file.read(1024 * 1024), b""):
+            digest.update(block)
+    os.replace(temp_path, path)
+    return counts, digest.hexdigest()
+
+def rotate_exports(folder: Union[str, Path], store: str, fmt: str, keep: int = EXPORT_DELTA_KEEP) -> int:
+    """
+    Delete all but the newest `keep` exports of a store in a format (data file
+    and manifest) and return how many were deleted
+    """
+    pattern = re.compile(rf"{re.escape(store)}-(?:full|\d{{10}})-(\d{{10}})\.{re.escape(fmt)}")
+    exports = sorted((int(match.group(1)), path) for path in Path(folder).iterdir()
+                     if (match := pattern.fullmatch(path.name)))
+    stale = exports[:-keep] if keep > 0 else []
+    for _, path in stale:
+        path.unlink(missing_ok=True)
+        path.with_name(path.name[:-len(fmt)] + "manifest.json").unlink(missing_ok=True)
+    return len(stale)
+
+def export_changes(db: Database, store: str, fmt: str = EXPORT_FORMAT,
+                   folder: Union[str, Path] = EXPORT_DELTA_DIR, full: bool = False,
+                   consumer: Optional[str] = None, keep: int = EXPORT_DELTA_KEEP) -> Optional[ExportResult]:
+    """
+    Export a store's products inserted, changed or removed since the consumer's
+    last export, then move its watermark forward.
+
+    Writes {store}-{from_seq}-{to_seq}.{fmt} and a .manifest.json next to it
+    (range, per-op counts, sha256); the watermark only moves once both exist.
+    A consumer's first export, or full=True, is a baseline of every product
+    with op "insert". Rows can repeat in the following delta when products
+    change during an export, so consumers apply them as upserts keyed by Id.
+    Args:
+        db: Database to export from
+        store: Store key
+        fmt: "csv" (DELTA_HEADER columns) or "jsonl"
+        folder: Directory for data files and manifests
+        full: Export every product instead of the changes
+        consumer: Watermark key (default "{fmt}:{store}")
+        keep: Exports of this store and format kept in folder (see rotate_exports; 0 keeps all)
+    Returns:
+        ExportResult, or None when nothing changed since the last export
+    """
+    if fmt not in FORMATS:
+        raise ValueError(f"Unknown export format {fmt!r}; expected one of {', '.join(FORMATS)}")
+    consumer = consumer or f"{fmt}:{store}"
+    # Read first: changes logged while exporting fall into the next range
+    to_seq = db.changes.current_seq()
+    from_seq = None if full else db.changes.get_watermark(consumer)
+
+    if from_seq is None:
+        full, from_seq = True, 0
+        rows = _full_rows(db, store)
+        name = f"{store}-full-{to_seq:010d}"
+    else:
+        changes = db.changes.get_changes_since(from_seq, to_seq, store)
+        if not changes:
+            db.changes.set_watermark(consumer, to_seq)
+            return None
+        rows = _delta_rows(db, changes)
+        name = f"{store}-{from_seq:010d}-{to_seq:010d}"
+
+    folder = Path(folder)
+    folder.mkdir(parents=True, exist_ok=True)
+    result = ExportResult(store, folder / f"{name}.{fmt}", folder / f"{name}.manifest.json",
+                          from_seq, to_seq, full)
+    result.counts, sha256 = _write_rows(result.path, fmt, store, rows)
+
+    manifest = {
+        "consumer": consumer,
+        "store": store,
+        "format": fmt,
+        "full": full,
+        "from_seq": from_seq,
+        "to_seq": to_seq,
+        "counts": result.counts,
+        "rows": result.rows,
+        "file": result.path.name,
+        "bytes": result.path.stat().st_size,
+        "sha256": sha256,
+        "created_at": datetime.now().isoformat(timespec="seconds"),
+    }
+    temp_path = result.manifest_path.with_name(result.manifest_path.name + ".tmp")
+    temp_path.write_text(json.dumps(manifest, indent=2), encoding="utf-8")
+    os.replace(temp_path, result.manifest_path)
+
+    db.changes.set_watermark(consumer, to_seq)
+    db.changes.prune()
+    rotate_exports(folder, store, fmt, keep)
+    return result
+
+def export_store(db: Database, store: str, mode: str = EXPORT_MODE,
+                 folder_path: str = FOLDER_PATH, delta_folder: str = EXPORT_DELTA_DIR) -> Optional[str]:
+    """
+    Export a store after a run: its delta in "delta" mode, or all of {store}.csv in "full" mode
+    Args:
+        folder_path: Data folder the returned file name is relative to
+        delta_folder: Folder for delta files and manifests
+    Returns:
+        File name relative to the data folder, or None when there was nothing to export
+    """
+    if mode == "delta":
+        result = export_changes(db, store, folder=delta_folder)
+        return os.path.relpath(result.path, folder_path) if result is not None else None
+    file_name = f"{store}.csv"
+    write_to_csv(db.products.get_products_with_stats(store), file_name, folder_path)
+    return file_name
+
+def join_searches(search_params: Iterable[Optional[str]]) -> Optional[str]:
+    """Search parameters of one store's delta, as a single alert caption entry"""
+    return ", ".join(param for param in search_params if param) or None
+
+def export_completed(db: Database, jobs: Iterable[Tuple[str, Optional[str]]], mode: str = EXPORT_MODE,
+                     folder_path: str = FOLDER_PATH,
+                     delta_folder: str = EXPORT_DELTA_DIR) -> List[Tuple[str, Optional[str], str]]:
+    """
+    Export every store with completed (store, search_param) jobs once
+    Returns:
+        (file_name, search_param, store) to send alerts for: one per job in
+        "full" mode, one per store (its searches joined) in "delta" mode
+    """
+    searches: Dict[str, List[Optional[str]]] = {}
+    for store, search_param in jobs:
+        searches.setdefault(store, []).append(search_param)
+    files = []
+    for store, search_params in searches.items():
+        file_name = export_store(db, store, mode, folder_path, delta_folder)
+        if file_name is None:
+            continue
+        if mode == "delta":
+            files.append((file_name, join_searches(search_params), store))
+        else:
+            files.extend((file_name, search_param, store) for search_param in search_params)
+    return files
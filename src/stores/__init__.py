@@ -0,0 +1,50 @@
+# Registry of store adapters. Each adapter module is only imported when its
+# store is selected, so a run never loads code for stores it does not scrape.
+import importlib
+from dataclasses import dataclass, field
+from typing import Any, Awaitable, Callable, Dict, Iterable, List, Optional
+from fetchers.browser import ResourceBlockRules
+
+@dataclass(frozen=True)
+class StoreAdapter:
+    """Everything needed to scrape one store"""
+    name: str
+    # (search_param, page, block_rules) -> parsed page, or None past the last page
+    fetcher: Callable[..., Awaitable[Any]]
+    # parsed page -> product dictionaries
+    parser: Callable[[Any], Iterable[Dict]]
+    # (search_param, page) -> search results URL
+    search_url: Callable[[str, int], str]
+    has_search_params: bool = True
+    # Pagination
+    max_pages: int = 1
+    # Politeness limits
+    max_concurrency: int = 1
+    request_delay: float = 0.0  # seconds between requests to this store
+    block_rules: ResourceBlockRules = field(default_factory=ResourceBlockRules)
+
+    async def fetch(self, search_param: Optional[str], page: int = 1) -> Any:
+        return await self.fetcher(search_param, page, self.block_rules)
+
+# Store key -> module defining an ADAPTER attribute
+ADAPTER_MODULES: Dict[str, str] = {
+    "microcenter": "stores.microcenter",
+    "bh": "stores.bh",
+}
+
+_loaded: Dict[str, StoreAdapter] = {}
+
+def available_stores() -> List[str]:
+    """Store keys that have an adapter, without importing any of them"""
+    return list(ADAPTER_MODULES)
+
+def get_adapter(store: str) -> Optional[StoreAdapter]:
+    """Import and return the adapter for a store, or None if there is no handler"""
+    if store not in _loaded:
+        module_name = ADAPTER_MODULES.get(store)
+        if module_name is None:
+            return None
+        _loaded[store] = importlib.import_module(module_name).ADAPTER
+    return _loaded[store]
+
+__all__ = ['StoreAdapter', 'ResourceBlockRules', 'available_stores', 'get_adapter']
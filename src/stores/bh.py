@@ -0,0 +1,19 @@
+from fetchers.bh import fetch_bh_html, bh_search_url
+from fetchers.browser import ResourceBlockRules
+from parsers.bh import iter_bh_html
+from . import StoreAdapter
+
+ADAPTER = StoreAdapter(
+    name="bh",
+    fetcher=fetch_bh_html,
+    parser=iter_bh_html,
+    search_url=bh_search_url,
+    max_pages=2,
+    # B&H is quick to challenge bursts of traffic, so stay sequential and slow
+    max_concurrency=1,
+    request_delay=3.0,
+    block_rules=ResourceBlockRules(
+        resource_types=("image", "media", "font"),
+        url_patterns=("googletagmanager.com", "google-analytics.com", "doubleclick.net"),
+    ),
+)
@@ -0,0 +1,18 @@
+from fetchers.browser import ResourceBlockRules
+from fetchers.microcenter import fetch_microcenter_html, microcenter_search_url
+from parsers.microcenter import iter_microcenter_html
+from . import StoreAdapter
+
+ADAPTER = StoreAdapter(
+    name="microcenter",
+    fetcher=fetch_microcenter_html,
+    parser=iter_microcenter_html,
+    search_url=microcenter_search_url,
+    max_pages=1,
+    max_concurrency=2,
+    request_delay=1.0,
+    block_rules=ResourceBlockRules(
+        resource_types=("image", "media", "font"),
+        url_patterns=("googletagmanager.com", "google-analytics.com", "doubleclick.net"),
+    ),
+)
@@ -0,0 +1,12 @@
+import pytest
+
+from storage.db import Product
+
+
+@pytest.fixture
+def make_product():
+    """Factory for Product listings: make_product(name, price="$100.00", store="microcenter")"""
+    def make(name, price="$100.00", store="microcenter"):
+        return Product.from_dict({"name": name, "price": price, "link": f"https://example.com/{name}",
+                                  "image": "", "store": store})
+    return make
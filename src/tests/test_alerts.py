@@ -0,0 +1,33 @@
+import asyncio
+import sys
+import types
+
+from alerts import telegram_handler
+
+
+class FakeTelegramAlert:
+    sent = []
+
+    def __init__(self, bot_token, chat_id):
+        pass
+
+    async def send_file(self, path, caption):
+        self.sent.append((path, caption))
+        return True
+
+
+def test_captions_name_the_store_not_the_export_file(monkeypatch):
+    monkeypatch.setitem(sys.modules, "alerts.telegram", types.SimpleNamespace(TelegramAlert=FakeTelegramAlert))
+    monkeypatch.setattr(telegram_handler, "TELEGRAM_ALERT_ENABLED", True)
+    monkeypatch.setattr(telegram_handler, "TELEGRAM_BOT_TOKEN", "token")
+    monkeypatch.setattr(telegram_handler, "TELEGRAM_CHAT_ID", "chat")
+
+    asyncio.run(telegram_handler.send_alerts([
+        ("deltas/microcenter-0000000012-0000000034.jsonl", "gpu, cpu", "microcenter"),
+        ("bh.csv", None, "bh"),
+    ]))
+
+    assert FakeTelegramAlert.sent == [
+        ("src/data/deltas/microcenter-0000000012-0000000034.jsonl", "Product data for search: gpu, cpu from Microcenter"),
+        ("src/data/bh.csv", "Product data from Bh"),
+    ]
@@ -0,0 +1,18 @@
+from benchmarks.suite import compare, run_suite
+
+
+def test_suite_runs_and_flags_regressions(tmp_path):
+    results = run_suite("1k", tmp_path, repeat=1, name_filter="latest_prices")
+
+    assert list(results["benchmarks"]) == ["latest_prices"]
+    assert results["meta"]["product_count"] == 1_000
+
+    slower = {
+        "meta": results["meta"],
+        "benchmarks": {
+            name: {**timing, "median": timing["median"] * 2}
+            for name, timing in results["benchmarks"].items()
+        },
+    }
+    assert compare(results, results) == []
+    assert len(compare(slower, results, threshold=0.25)) == 1
@@ -0,0 +1,44 @@
+from modes.bot import ProductLookup
+from storage.db import Database
+
+
+def test_fts_index_follows_product_writes(tmp_path, make_product):
+    db = Database(str(tmp_path / "products.db"))
+    gpu_id, ssd_id = db.products.insert_products([make_product("ASUS GeForce RTX 4070 12GB", "$549.99"),
+                                                  make_product("Samsung 990 PRO 2TB SSD", "$169.99")])
+
+    assert [p.id for p in db.products.search_products("rtx 40")] == [gpu_id]
+    assert db.products.search_products("geforce", store="bh") == []
+
+    with db.connection.transaction() as conn:
+        conn.execute("UPDATE products SET name = 'Samsung 990 EVO 2TB SSD' WHERE id = ?", (ssd_id,))
+    assert db.products.search_products("990 pro") == []
+    assert [p.id for p in db.products.search_products("evo")] == [ssd_id]
+
+    db.products.delete_product(gpu_id)
+    assert db.products.search_products("rtx") == []
+
+
+def test_lookup_answers_commands_and_caches_them(tmp_path, make_product):
+    lookup = ProductLookup(str(tmp_path / "products.db"))
+    lookup.db.products.insert_products([
+        make_product("MSI GeForce RTX 4070 Ti SUPER", "$799.99"),
+        make_product("PNY GeForce RTX 4060 8GB", "$299.99", store="bh"),
+        make_product("AMD Ryzen 7 9700X", "$329.00"),
+    ])
+    # A second scrape records price history for the existing product
+    lookup.db.products.insert_products([make_product("PNY GeForce RTX 4060 8GB", "$279.99", store="bh")])
+
+    lowest = lookup.answer("lowest", "GeForce")
+    assert lowest.index("RTX 4060") < lowest.index("RTX 4070")
+    assert "Ryzen" not in lowest
+
+    history = lookup.answer("history", "rtx 4060")
+    assert "$279.99" in history and "over 2 prices" in history
+
+    assert "No products found" in lookup.answer("price", "radeon")
+    assert lookup.answer("price", "").startswith("Usage")
+
+    lookup.answer("price", "Ryzen  7")
+    assert lookup.answer("price", "ryzen 7") == lookup.answer("price", "ryzen 7")
+    assert lookup.cache.stats.hits == 2
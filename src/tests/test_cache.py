@@ -0,0 +1,63 @@
+import asyncio
+
+from storage.cache import QueryCache, product_tag, store_tag
+from storage.db_store import AsyncProductStore, query_cache
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_lru_ttl_and_tag_invalidation():
+    clock = FakeClock()
+    cache = QueryCache(max_entries=2, ttl=10, clock=clock)
+    cache.put(("get_products", "a"), [1], [store_tag("a")])
+    cache.put(("get_price_history", 1), [2], [product_tag(1)])
+    assert cache.get(("get_products", "a")) == (True, [1])
+
+    # ("get_price_history", 1) is now least recently used
+    cache.put(("get_price_history", 2), [3], [product_tag(2)])
+    assert cache.get(("get_price_history", 1)) == (False, None)
+    assert cache.stats.evictions == 1
+
+    assert cache.invalidate([product_tag(2)]) == 1
+    assert cache.get(("get_price_history", 2)) == (False, None)
+
+    clock.now = 11
+    assert cache.get(("get_products", "a")) == (False, None)
+    assert cache.stats.expirations == 1
+    assert cache.stats.hit_rate == 1 / 4
+
+
+def test_load_overlapping_an_invalidation_is_not_cached():
+    cache = QueryCache()
+
+    def load():
+        cache.invalidate([store_tag("a")])
+        return ["stale"]
+
+    assert cache.get_or_load(("get_products", "a"), [store_tag("a")], load) == ["stale"]
+    assert len(cache) == 0
+
+
+def test_async_store_reads_are_cached_until_a_write(tmp_path):
+    db = AsyncProductStore(str(tmp_path / "products.db"))
+    query_cache.clear()
+    product = {"name": "RTX 4070", "price": "$549.99", "link": "https://example.com/1", "image": ""}
+
+    async def scenario():
+        await db.store_products([product], "microcenter")
+        first = await db.get_products("microcenter")
+        hits = query_cache.stats.hits
+        assert await db.get_products("microcenter") == first
+        assert query_cache.stats.hits == hits + 1
+
+        await db.store_products([{**product, "name": "RTX 4080"}], "microcenter")
+        assert len(await db.get_products("microcenter")) == 2
+        await db.aclose()
+
+    asyncio.run(scenario())
@@ -0,0 +1,158 @@
+import asyncio
+import multiprocessing
+import os
+
+import pytest
+
+from cluster.coordinator import Coordinator
+from cluster.leases import DONE, FAILED, LEASED, PENDING, JobQueue, LeaseLost
+from cluster.worker import ClusterWorker, CoordinatorUnavailable
+from storage.db import Database
+from storage.db.ledger import EXHAUSTED as PAGE_EXHAUSTED, FAILED as PAGE_FAILED
+from storage.db_store import AsyncProductStore
+
+JOBS = [("microcenter", "gpu"), ("microcenter", "cpu")]
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_expired_leases_are_requeued_until_attempts_run_out():
+    clock = FakeClock()
+    queue = JobQueue(JOBS, lease_seconds=10, max_attempts=2, clock=clock)
+
+    gpu = queue.lease("a")
+    lost_lease = gpu.lease_id
+    cpu = queue.lease("b")
+    assert (gpu.search_param, cpu.search_param) == ("gpu", "cpu") and queue.lease("c") is None
+
+    clock.now = 8
+    assert queue.heartbeat("b", [cpu.lease_id]) == []
+    clock.now = 15
+    assert queue.expire() == 1 and gpu.state == PENDING and cpu.state == LEASED
+    assert queue.heartbeat("a", [lost_lease]) == [lost_lease]
+    with pytest.raises(LeaseLost):
+        queue.complete(lost_lease, 3)
+
+    queue.complete(cpu.lease_id, 5)
+    again = queue.lease("c")
+    assert again is gpu and gpu.attempts == 2
+    queue.fail(again.lease_id, "TimeoutError")
+    assert gpu.state == FAILED and queue.finished
+    assert queue.summary() == {PENDING: 0, LEASED: 0, DONE: 1, FAILED: 1}
+
+
+async def _pages(store, search_param, controllers, skip_pages=(), exhausted_page=None, die_after_first=False):
+    for page in (1, 2):
+        if page in skip_pages:
+            continue
+        yield page, [{"name": f"{search_param} item {page}-{i}", "price": f"${10 + i}.00",
+                      "link": f"https://example.com/{search_param}/{page}/{i}", "image": ""} for i in range(3)]
+        if die_after_first:
+            os._exit(1)
+
+
+def _worker_process(url, worker_id, die):
+    async def pages(*args, **kwargs):
+        async for item in _pages(*args, **kwargs, die_after_first=die):
+            yield item
+
+    asyncio.run(ClusterWorker(url, worker_id, heartbeat_interval=0.2, poll_interval=0.1, page_source=pages).run())
+
+
+def test_dead_workers_job_is_requeued_and_resumes_from_stored_pages(tmp_path):
+    db = Database(str(tmp_path / "products.db"))
+    ledger = db.open_ledger()
+    store = AsyncProductStore(db.connection.db_path, linger=0.01)
+    coordinator = Coordinator(JOBS, ledger, store, host="127.0.0.1", port=0, lease_seconds=1.0)
+    ctx = multiprocessing.get_context("spawn")
+
+    async def scenario():
+        serving = asyncio.create_task(coordinator.run(check_interval=0.1))
+        # Stores page 1 of its first job, then the process dies holding the lease
+        dying = ctx.Process(target=_worker_process, args=(coordinator.url, "dying", True))
+        dying.start()
+        await asyncio.to_thread(dying.join, 60)
+        healthy = ctx.Process(target=_worker_process, args=(coordinator.url, "healthy", False))
+        healthy.start()
+        jobs = await asyncio.wait_for(serving, 60)
+        await asyncio.to_thread(healthy.join, 60)
+        await store.aclose()
+        return dying.exitcode, healthy.exitcode, jobs
+
+    dying_exit, healthy_exit, jobs = asyncio.run(scenario())
+
+    assert dying_exit == 1 and healthy_exit == 0
+    assert [(job.search_param, job.state, job.attempts, job.worker) for job in jobs] == [
+        ("gpu", DONE, 2, "healthy"), ("cpu", DONE, 1, "healthy")
+    ]
+    assert jobs[0].product_count == 3, "the requeued job only fetched the page not stored yet"
+    assert all(job.state == "done" and job.attempts == 1 for job in ledger.jobs())
+    assert len(db.products.get_products("microcenter")) == 12
+
+
+def test_failed_and_exhausted_jobs_are_recorded_in_the_ledger(tmp_path):
+    db = Database(str(tmp_path / "products.db"))
+    ledger = db.open_ledger()
+    coordinator = Coordinator(JOBS, ledger, AsyncProductStore(db.connection.db_path),
+                              host="127.0.0.1", port=0, max_attempts=1)
+    coordinator.queue.clock = clock = FakeClock()
+    try:
+        gpu = coordinator.lease("a")["job"]
+        coordinator.exhaust(gpu["lease"], 2)
+        coordinator.fail(gpu["lease"], "TimeoutError")
+        coordinator.lease("b")
+        clock.now = 1000
+        assert coordinator.queue.expire() == 1 and coordinator.queue.finished
+    finally:
+        coordinator._server.server_close()
+
+    assert [(job.search_param, job.page, job.state, job.error) for job in ledger.jobs()] == [
+        ("gpu", 2, PAGE_EXHAUSTED, None),
+        ("gpu", 1, PAGE_FAILED, "TimeoutError"),
+        ("cpu", 1, PAGE_FAILED, "lease expired on b"),
+    ]
+    assert not ledger.finish(), "a run with failed jobs stays resumable"
+    resumed = Coordinator(JOBS, db.open_ledger(resume=True), host="127.0.0.1", port=0)
+    try:
+        assert resumed.lease("a")["job"]["exhausted_page"] == 2
+    finally:
+        resumed._server.server_close()
+
+
+def test_workers_without_the_shared_token_are_rejected(tmp_path, capsys):
+    db = Database(str(tmp_path / "products.db"))
+    store = AsyncProductStore(db.connection.db_path, linger=0.01)
+    coordinator = Coordinator(JOBS, db.open_ledger(), store, host="127.0.0.1", port=0, token="secret")
+
+    async def scenario():
+        serving = asyncio.create_task(coordinator.run(check_interval=0.1))
+        worker = ClusterWorker(coordinator.url, "intruder", poll_interval=0.1, page_source=_pages, token="guess")
+        report = await worker.run()
+        with pytest.raises(CoordinatorUnavailable, match="CLUSTER_TOKEN"):
+            await asyncio.to_thread(worker._post, "/lease", {"worker": "intruder"})
+        serving.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await serving
+        await store.aclose()
+
+        return report
+
+    report = asyncio.run(scenario())
+    assert report.jobs == 0 and "rejected this worker's CLUSTER_TOKEN" in capsys.readouterr().out
+    assert coordinator.queue.summary()[PENDING] == 2
+
+
+def test_coordinator_refuses_a_network_bind_without_a_token(tmp_path):
+    db = Database(str(tmp_path / "products.db"))
+    store = AsyncProductStore(db.connection.db_path)
+    with pytest.raises(ValueError, match="CLUSTER_TOKEN"):
+        Coordinator(JOBS, db.open_ledger(), store, host="0.0.0.0", port=0, token=None)
+
+    coordinator = Coordinator(JOBS, db.open_ledger(), store, host="0.0.0.0", port=0, token="secret")
+    coordinator._server.server_close()
@@ -0,0 +1,90 @@
+import asyncio
+
+import pytest
+
+from fetchers.controller import CircuitOpenError, FetchController
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_retries_then_succeeds_and_grows_concurrency():
+    controller = FetchController("teststore", max_concurrency=4, backoff=0)
+    attempts = []
+
+    async def flaky(page):
+        attempts.append(page)
+        if len(attempts) < 3:
+            raise TimeoutError("no results")
+        return page
+
+    assert asyncio.run(controller.call(flaky, 1)) == 1
+    assert len(attempts) == 3
+    assert controller.limit == 2.0  # halved down to min_concurrency, then +1/limit on success
+
+    async def ok(page):
+        return page
+
+    async def run_many():
+        for page in range(10):
+            await controller.call(ok, page)
+
+    asyncio.run(run_many())
+    assert controller.limit == 4.0
+
+
+def test_limit_caps_concurrent_fetches():
+    controller = FetchController("teststore", max_concurrency=2, backoff=0)
+    controller.limit = 2.0
+    in_flight, peak = 0, 0
+
+    async def fetch(page):
+        nonlocal in_flight, peak
+        in_flight += 1
+        peak = max(peak, in_flight)
+        await asyncio.sleep(0.01)
+        in_flight -= 1
+
+    async def scenario():
+        await asyncio.gather(*(controller.call(fetch, page) for page in range(6)))
+
+    asyncio.run(scenario())
+    assert peak == 2
+
+
+def test_circuit_opens_fails_fast_and_closes_after_probe():
+    clock = FakeClock()
+    controller = FetchController("teststore", max_retries=0, failure_threshold=2, cooldown=30, clock=clock)
+    calls = []
+
+    async def down(page):
+        calls.append(page)
+        raise ConnectionError("store down")
+
+    for page in range(2):
+        with pytest.raises(ConnectionError):
+            asyncio.run(controller.call(down, page))
+    assert controller.state == "open"
+
+    with pytest.raises(CircuitOpenError):
+        asyncio.run(controller.call(down, 2))
+    assert calls == [0, 1]
+
+    async def up(page):
+        return page
+
+    clock.now = 31
+    assert asyncio.run(controller.call(up, 3)) == 3
+    assert controller.state == "closed"
+
+
+def test_backoff_is_jittered_and_capped():
+    controller = FetchController("teststore", backoff=2, max_backoff=10)
+    delays = [controller.retry_delay(attempt) for attempt in range(8) for _ in range(20)]
+    assert all(0 <= delay <= 10 for delay in delays)
+    assert len(set(delays)) > 1
@@ -0,0 +1,42 @@
+import asyncio
+
+from metrics import metrics
+from storage.db_store import AsyncProductStore
+
+
+def _products(prefix: str, count: int, price: float = 10.0):
+    return [
+        {
+            "name": f"{prefix} {i}",
+            "price": f"${price + i:,.2f}",
+            "link": f"https://example.com/{prefix}/{i}",
+            "image": f"https://example.com/{prefix}/{i}.jpg",
+        }
+        for i in range(count)
+    ]
+
+
+def test_concurrent_writes_are_group_committed(tmp_path):
+    metrics.reset()
+    store = AsyncProductStore(str(tmp_path / "products.db"), linger=0.2)
+
+    async def scenario():
+        ids_a, ids_b = await asyncio.gather(
+            store.store_products(_products("gpu", 3), "microcenter"),
+            store.store_products(_products("cpu", 2), "microcenter"),
+        )
+        # Both product sets went into a single transaction
+        assert metrics.histogram("db_commit_seconds").count == 1
+        # Second pass updates existing rows instead of inserting new ones
+        ids_again = await store.store_products(_products("gpu", 3, price=5.0), "microcenter")
+        stats = await store.get_products_with_stats("microcenter")
+        await store.aclose()
+        return ids_a, ids_b, ids_again, stats
+
+    ids_a, ids_b, ids_again, stats = asyncio.run(scenario())
+
+    assert len(set(ids_a + ids_b)) == 5
+    assert ids_again == ids_a
+    assert len(stats) == 5
+    updated = {row["product"].name: row["product"] for row in stats}
+    assert updated["gpu 0"].price == 5.0
@@ -0,0 +1,78 @@
+import csv
+import hashlib
+import json
+
+from storage.db import Database
+from storage.delta_export import export_changes
+
+
+def _upsert(db, products):
+    with db.connection.transaction() as conn:
+        return db.products.upsert_products_in_transaction(products, conn)
+
+
+def _read(result):
+    with open(result.path, newline="", encoding="utf-8") as f:
+        return {int(row["Id"]): row for row in csv.DictReader(f)}
+
+
+def test_first_export_is_a_baseline_then_deltas_carry_only_changes(tmp_path, make_product):
+    db = Database(str(tmp_path / "products.db"))
+    gpu, cpu, ssd = _upsert(db, [make_product("RTX 4070", 549.99), make_product("Ryzen 7", 299.0),
+                                 make_product("990 Pro", 129.0)])
+
+    baseline = export_changes(db, "microcenter", folder=tmp_path / "deltas")
+    assert baseline.full and baseline.counts["insert"] == 3
+    assert set(_read(baseline)) == {gpu, cpu, ssd}
+
+    # A rescrape at unchanged prices is not a change
+    _upsert(db, [make_product("RTX 4070", 549.99), make_product("Ryzen 7", 299.0)])
+    assert export_changes(db, "microcenter", folder=tmp_path / "deltas") is None
+
+    _upsert(db, [make_product("RTX 4070", 499.99), make_product("Arc A770", 279.0)])
+    db.products.delete_product(ssd)
+    temp = _upsert(db, [make_product("Open box", 10.0)])[0]
+    db.products.delete_product(temp)
+
+    delta = export_changes(db, "microcenter", folder=tmp_path / "deltas")
+    rows = _read(delta)
+    assert not delta.full and delta.from_seq == baseline.to_seq
+    assert {product_id: row["Op"] for product_id, row in rows.items()} == {
+        gpu: "update", ssd: "delete", max(rows): "insert"
+    }
+    assert rows[gpu]["Current Price"] == "$499.99" and rows[gpu]["Lowest Price"] == "$499.99"
+    assert temp not in rows, "inserted and deleted between exports"
+
+    manifest = json.loads(delta.manifest_path.read_text())
+    assert manifest["counts"] == {"insert": 1, "update": 1, "delete": 1}
+    assert manifest["sha256"] == hashlib.sha256(delta.path.read_bytes()).hexdigest()
+    assert db.changes.get_watermark("csv:microcenter") == delta.to_seq
+
+
+def test_consumers_keep_separate_watermarks_and_log_is_pruned(tmp_path, make_product):
+    db = Database(str(tmp_path / "products.db"))
+    _upsert(db, [make_product("RTX 4070", 549.99)])
+    export_changes(db, "microcenter", folder=tmp_path / "deltas")
+    _upsert(db, [make_product("RTX 4070", 529.99)])
+
+    jsonl = export_changes(db, "microcenter", fmt="jsonl", folder=tmp_path / "deltas")
+    assert jsonl.full, "a new consumer starts from a baseline"
+    line = json.loads(jsonl.path.read_text().splitlines()[0])
+    assert line["op"] == "insert" and line["price"] == 529.99
+
+    # The CSV consumer still gets its update, after which the log is empty
+    assert export_changes(db, "microcenter", folder=tmp_path / "deltas").counts["update"] == 1
+    with db.connection.get_connection() as conn:
+        assert conn.execute("SELECT COUNT(*) FROM product_changes").fetchone()[0] == 0
+
+
+def test_old_exports_are_rotated_out(tmp_path, make_product):
+    db = Database(str(tmp_path / "products.db"))
+    results = []
+    for price in (549.99, 529.99, 519.99):
+        _upsert(db, [make_product("RTX 4070", price)])
+        results.append(export_changes(db, "microcenter", folder=tmp_path / "deltas", keep=2))
+
+    kept = sorted(path.name for path in (tmp_path / "deltas").iterdir())
+    assert kept == sorted(name for result in results[1:]
+                          for name in (result.path.name, result.manifest_path.name))
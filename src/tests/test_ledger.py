@@ -0,0 +1,112 @@
+import asyncio
+from datetime import timedelta
+
+from processing.pipeline import Pipeline
+from storage.db import Database, Product
+from storage.db_store import AsyncProductStore
+
+
+def _parse(page):
+    for name in page:
+        yield {"name": name, "price": "$1.00", "link": f"https://example.com/{name}", "image": ""}
+
+
+def _run(db_path, ledger, fetch, parse=_parse):
+    async def scenario():
+        store = AsyncProductStore(db_path)
+        pipeline = Pipeline("teststore", fetch, parse, db=store, ledger=ledger, max_pages=2)
+        try:
+            await pipeline.run(["gpu", "cpu"])
+        finally:
+            await store.aclose()
+        return pipeline
+    return asyncio.run(scenario())
+
+
+def test_resumed_run_only_fetches_unfinished_pages(tmp_path):
+    db_path = str(tmp_path / "products.db")
+    db = Database(db_path)
+    fetched = []
+
+    async def crashing_fetch(search_param, page):
+        if search_param == "cpu" and page == 2:
+            raise RuntimeError("browser crashed")
+        fetched.append((search_param, page))
+        return [f"{search_param}-{page}-{i}" for i in range(3)]
+
+    ledger = db.open_ledger()
+    pipeline = _run(db_path, ledger, crashing_fetch)
+    assert pipeline.failures == [("cpu", 2, "RuntimeError: browser crashed")]
+    assert not ledger.finish()
+    assert [(job.search_param, job.page) for job in ledger.incomplete_jobs()] == [("cpu", 2)]
+
+    async def fetch(search_param, page):
+        fetched.append((search_param, page))
+        return [f"{search_param}-{page}-{i}" for i in range(3)]
+
+    fetched.clear()
+    resumed = db.open_ledger(resume=True)
+    assert resumed.resumed and resumed.run_id == ledger.run_id
+    _run(db_path, resumed, fetch)
+
+    assert fetched == [("cpu", 2)]
+    assert resumed.finish()
+    assert not db.open_ledger(resume=True).resumed
+    done = {(job.search_param, job.page): job for job in resumed.jobs()}
+    assert done[("cpu", 2)].attempts == 2
+    assert done[("gpu", 1)].product_count == 3 and done[("gpu", 1)].fingerprint
+
+
+def test_retried_job_does_not_duplicate_price_history(tmp_path):
+    db = Database(str(tmp_path / "products.db"))
+    job = db.open_ledger().start_job("teststore", "gpu", 1)
+    stored, new = (Product.from_dict({"name": name, "price": "$549.99", "link": "", "image": "",
+                                      "store": "teststore"}) for name in ("RTX 4070", "RTX 4080"))
+    with db.connection.transaction() as conn:
+        db.products.upsert_products_in_transaction([stored], conn)
+
+    outcomes = {}
+    for _ in range(2):
+        with db.connection.transaction() as conn:
+            db.products.upsert_products_in_transaction([stored, new], conn, outcomes, job_id=job.id)
+
+    history = {name: len(db.products.get_price_history(db.products.get_product_by_name_and_store(name, "teststore").id))
+               for name in ("RTX 4070", "RTX 4080")}
+    # The stored product's first price plus this job's; the new product's first price only
+    assert history == {"RTX 4070": 2, "RTX 4080": 1}
+    assert outcomes == {"unchanged": 3, "inserted": 1}
+
+
+def test_resume_window_is_compared_in_utc(tmp_path):
+    db = Database(str(tmp_path / "products.db"))
+    run_id = db.open_ledger().run_id
+
+    assert db.open_ledger(resume=True, resume_window=timedelta(minutes=5)).run_id == run_id
+    with db.connection.transaction() as conn:
+        conn.execute("UPDATE scrape_runs SET started_at = datetime('now', '-1 hour')")
+    assert db.open_ledger(resume=True, resume_window=timedelta(hours=2)).run_id == run_id
+    assert not db.open_ledger(resume=True, resume_window=timedelta(minutes=5)).resumed
+
+
+def test_unparsable_page_is_failed_and_the_store_carries_on(tmp_path):
+    db_path = str(tmp_path / "products.db")
+    db = Database(db_path)
+
+    async def fetch(search_param, page):
+        return [f"{search_param}-{page}-{i}" for i in range(3)]
+
+    def parse(page):
+        for name in page:
+            if name == "gpu-1-1":
+                raise AttributeError("'NoneType' object has no attribute 'find_all'")
+            yield from _parse([name])
+
+    ledger = db.open_ledger()
+    pipeline = _run(db_path, ledger, fetch, parse)
+
+    assert pipeline.failures == [("gpu", 1, "AttributeError: 'NoneType' object has no attribute 'find_all'")]
+    states = {(job.search_param, job.page): job.state for job in ledger.jobs()}
+    assert states == {("gpu", 1): "failed", ("gpu", 2): "done", ("cpu", 1): "done", ("cpu", 2): "done"}
+    assert not ledger.finish()
+    # The product parsed before the error is kept, and every other page is stored
+    assert len(db.products.get_products("teststore")) == 10
@@ -0,0 +1,48 @@
+from urllib.error import HTTPError
+from urllib.request import urlopen
+
+import pytest
+from bs4 import BeautifulSoup
+
+from loadtest.harness import LoadTestReport
+from loadtest.mock_store import MockStoreConfig, MockStoreServer
+from parsers.bh import parse_bh_html
+from parsers.microcenter import parse_microcenter_html
+
+
+def _get(url):
+    with urlopen(url) as response:
+        return BeautifulSoup(response.read().decode(), "html.parser")
+
+
+def test_mock_store_serves_parseable_paginated_results():
+    config = MockStoreConfig(products_per_page=10, pages=2, latency=0, latency_jitter=0)
+    with MockStoreServer(config) as server:
+        targets = server.targets()
+        assert _get(targets["microcenter"]).find("input", id="search-query") is not None
+
+        first = parse_microcenter_html(_get(f"{targets['microcenter']}/search/search_results.aspx?Ntt=gpu"))
+        again = parse_microcenter_html(_get(f"{targets['microcenter']}/search/search_results.aspx?Ntt=gpu"))
+        assert len(first) == 10 and len({p["name"] for p in first}) == 10
+        assert [p["name"] for p in first] == [p["name"] for p in again]
+
+        second = parse_bh_html(_get(f"{targets['bh']}?q=gpu&pn=2"))
+        assert len(second) == 10 and all(p["price"].startswith("$") for p in second)
+        assert parse_bh_html(_get(f"{targets['bh']}?q=gpu&pn=3")) == []
+        assert server.stats.requests == 5
+
+
+def test_mock_store_injects_errors():
+    with MockStoreServer(MockStoreConfig(latency=0, latency_jitter=0, error_rate=1.0)) as server:
+        with pytest.raises(HTTPError) as error:
+            urlopen(server.url)
+    assert error.value.code == 503 and server.stats.errors == 1
+
+
+def test_report_percentiles():
+    report = LoadTestReport(runs=2, elapsed=1800.0, search_latencies=[float(i) for i in range(1, 101)])
+    assert report.runs_per_hour == 4.0
+    assert report.latency_percentile(50) == pytest.approx(50.5)
+    assert report.latency_percentile(95) == pytest.approx(95.05)
+    assert report.latency_percentile(0) == 1.0 and report.latency_percentile(100) == 100.0
+    assert report.latency_percentile(0.5) == pytest.approx(1.99)
@@ -0,0 +1,69 @@
+from processing.matching import ProductMatcher, match_score, normalise_title
+from storage.db import Database
+
+
+def test_signatures_separate_models_capacities_and_brands():
+    base = normalise_title("ASUS TUF GeForce RTX4070 Ti 12GB GDDR6X Graphics Card")
+    assert base.brand == "asus" and base.capacities == {"12gb"}
+    assert base.model_key == "4070 ti"
+
+    assert match_score(base, normalise_title("ASUS TUF Gaming GeForce RTX 4070 Ti 12 GB GDDR6X")) >= 0.4
+    assert match_score(base, normalise_title("ASUS TUF GeForce RTX 4070 12GB GDDR6X")) == 0
+    assert match_score(base, normalise_title("ASUS TUF GeForce RTX 4070 Ti 16GB GDDR6X")) == 0
+    assert match_score(base, normalise_title("MSI Ventus GeForce RTX 4070 Ti 12GB GDDR6X")) == 0
+    assert normalise_title("Gaming Mouse Wireless").model_key == ""
+
+
+def test_memory_and_interface_tokens_do_not_block_matches():
+    pairs = [
+        ("MSI GeForce RTX 4070 Ti SUPER OC 16GB GDDR6X", "MSI GeForce RTX 4070 Ti SUPER 16GB Graphics Card"),
+        ("Samsung 990 PRO 2TB PCIe Gen4 NVMe SSD", "Samsung 2TB 990 PRO PCIe 4.0 x4 M.2 Internal SSD"),
+    ]
+    for a, b in pairs:
+        a, b = normalise_title(a), normalise_title(b)
+        assert a.model_key == b.model_key and match_score(a, b) >= 0.4
+
+
+def test_matcher_groups_listings_and_ranks_cheapest_offers(tmp_path, make_product):
+    db = Database(str(tmp_path / "products.db"))
+    db.products.insert_products([
+        make_product("Samsung 990 PRO 2TB NVMe SSD", "$179.99", "microcenter"),
+        make_product("SAMSUNG 990 Pro 2 TB PCIe 4.0 NVMe M.2 SSD", "$169.99", "newegg"),
+        make_product("Samsung 990 PRO 2TB NVMe SSD with Heatsink", "$189.99", "bestbuy"),
+        make_product("Samsung 990 PRO 1TB NVMe SSD", "$109.99", "newegg"),
+        make_product("Corsair Vengeance 32GB DDR5 6000", "$99.99", "microcenter"),
+    ])
+
+    report = ProductMatcher(db).match_new_products()
+    assert (report.signed, report.groups_created) == (5, 1)
+
+    [offer] = db.groups.get_cheapest_offers()
+    assert offer["product"].store == "newegg"
+    assert offer["offers"] == 3 and offer["savings"] == 20.0
+    assert [p.store for p in db.groups.get_group_offers(offer["group_id"])] == ["newegg", "microcenter", "bestbuy"]
+
+    # A later listing from a fourth store joins the existing group; nothing is re-signed
+    db.products.insert_products([make_product("Samsung 990 PRO 2TB M.2 NVMe SSD", "$174.99", "amazon")])
+    report = ProductMatcher(db).match_new_products()
+    assert (report.signed, report.matched, report.groups_created) == (1, 1, 0)
+    assert db.groups.get_cheapest_offers()[0]["offers"] == 4
+
+    # Rebuilding reproduces the same grouping
+    ProductMatcher(db).match_new_products(rebuild=True)
+    [offer] = db.groups.get_cheapest_offers()
+    assert offer["offers"] == 4 and offer["product"].store == "newegg"
+
+
+def test_renamed_product_is_signed_and_matched_again(tmp_path, make_product):
+    db = Database(str(tmp_path / "products.db"))
+    gpu_id, _ = db.products.insert_products([
+        make_product("MSI GeForce RTX 4070 12GB", "$549.99", "microcenter"),
+        make_product("MSI GeForce RTX 4070 12GB Graphics Card", "$539.99", "newegg"),
+    ])
+    assert ProductMatcher(db).match_new_products().groups_created == 1
+
+    with db.connection.transaction() as conn:
+        conn.execute("UPDATE products SET name = 'MSI GeForce RTX 4080 16GB' WHERE id = ?", (gpu_id,))
+    report = ProductMatcher(db).match_new_products()
+    assert (report.signed, report.matched) == (1, 0)
+    assert db.groups.get_cheapest_offers() == []
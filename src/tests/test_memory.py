@@ -0,0 +1,80 @@
+import asyncio
+
+from fetchers.controller import FetchController
+from metrics import MemoryBudget
+from metrics.memory import process_tree_rss_mb
+from processing.pipeline import Pipeline
+from storage.db_store import AsyncProductStore
+
+
+async def _fetch(search_param, page):
+    await asyncio.sleep(0)
+    return [f"{search_param}-{i}" for i in range(8)]
+
+
+def _parse(page):
+    for name in page:
+        yield {"name": name, "price": "$1.00", "link": f"https://example.com/{name}", "image": ""}
+
+
+def test_rss_is_measured_for_the_process_tree():
+    assert process_tree_rss_mb() > 10
+
+
+def test_pipeline_backs_off_under_memory_pressure(tmp_path):
+    db = AsyncProductStore(str(tmp_path / "products.db"))
+    # 900 MB of a 1000 MB budget: past the 80% soft limit, below the ceiling
+    budget = MemoryBudget(limit_mb=1000, soft_limit=0.8, rss_reader=lambda: 900.0)
+    controller = FetchController("teststore", max_concurrency=4, min_concurrency=1)
+    controller.limit = 4.0
+    batches = []
+
+    async def scenario():
+        pipeline = Pipeline("teststore", _fetch, _parse, db=db, controller=controller, memory=budget,
+                            fetch_concurrency=4, batch_size=8)
+
+        async def collect(batch):
+            batches.append(len(batch.products))
+
+        pipeline.subscribe(collect)
+        await pipeline.run(["gpu", "cpu"])
+        await db.aclose()
+
+    asyncio.run(scenario())
+
+    assert budget.backoffs == 2 and budget.waits == 0
+    assert controller.limit < 4.0
+    assert max(batches) == 2  # a quarter of batch_size
+    assert set(budget.stages) == {"fetch", "parse", "store"}
+    assert budget.peak_rss_mb == 900.0
+    assert "peak RSS 900.0 MB of 1000 MB budget" in budget.report()
+
+
+def test_fetches_wait_for_headroom_at_the_ceiling():
+    readings = iter([1200.0, 1100.0, 700.0])
+    budget = MemoryBudget(limit_mb=1000, interval=0.01, rss_reader=lambda: next(readings))
+
+    budget.sample("fetch")
+    asyncio.run(budget.wait_for_headroom())
+    assert budget.waits == 1 and budget.current_rss_mb == 700.0
+    assert budget.stages["fetch"].samples == 3
+
+
+def test_stage_samples_reuse_a_recent_reading():
+    class Clock:
+        now = 0.0
+
+        def __call__(self):
+            return self.now
+
+    clock = Clock()
+    readings = []
+    budget = MemoryBudget(limit_mb=1000, interval=1.0, clock=clock,
+                          rss_reader=lambda: readings.append(clock.now) or 100.0 + len(readings))
+
+    budget.sample("fetch")
+    clock.now = 0.5
+    assert budget.sample("parse") == 101.0 and budget.sample("store", fresh=True) == 102.0
+    clock.now = 1.6
+    budget.sample("fetch")
+    assert readings == [0.0, 0.5, 1.6] and budget.stages["parse"].samples == 1
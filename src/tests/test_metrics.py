@@ -0,0 +1,51 @@
+import asyncio
+import json
+
+import pytest
+
+from metrics import MetricsRegistry, export_metrics, metrics
+from storage.db_store import AsyncProductStore
+
+
+def test_timers_record_histograms_and_nested_spans(tmp_path):
+    registry = MetricsRegistry()
+
+    with registry.span("run"):
+        with registry.timer("fetch", store="microcenter"):
+            pass
+        with pytest.raises(ValueError):
+            with registry.timer("fetch", store="microcenter"):
+                raise ValueError("boom")
+    registry.counter("products_parsed", store="microcenter").inc(3)
+
+    histogram = registry.histogram("fetch_seconds", store="microcenter")
+    assert histogram.count == 2
+    run, ok, failed = registry.spans
+    assert ok.parent_id == run.id and failed.parent_id == run.id
+    assert failed.error == "ValueError"
+
+    data = json.loads(export_metrics(registry, tmp_path / "run.json").read_text())
+    assert data["counters"] == [{"name": "products_parsed", "labels": {"store": "microcenter"}, "value": 3}]
+
+    prom = export_metrics(registry, tmp_path / "run.prom").read_text()
+    assert 'tpt_products_parsed_total{store="microcenter"} 3' in prom
+    assert 'tpt_fetch_seconds_count{store="microcenter"} 2' in prom
+    assert 'tpt_fetch_seconds_bucket{store="microcenter",le="+Inf"} 2' in prom
+
+
+def test_store_counts_inserted_updated_unchanged(tmp_path):
+    db = AsyncProductStore(str(tmp_path / "products.db"))
+    product = {"name": "RTX 4070", "price": "$549.99", "link": "https://example.com/1", "image": ""}
+
+    async def scenario():
+        await db.store_products([product], "microcenter")
+        await db.store_products([product], "microcenter")
+        await db.store_products([{**product, "price": "$499.99"}], "microcenter")
+        await db.aclose()
+
+    metrics.reset()
+    asyncio.run(scenario())
+
+    assert metrics.counter_total("products_inserted") == 1
+    assert metrics.counter_total("products_unchanged") == 1
+    assert metrics.counter_total("products_updated") == 1
@@ -0,0 +1,45 @@
+from datetime import datetime
+
+import pytest
+
+from storage.db import Database, Product, ProductBatch
+from storage.db_store import _to_product_objects
+
+
+@pytest.fixture
+def db(tmp_path):
+    db = Database(str(tmp_path / "products.db"))
+    products = [
+        {"name": f"SSD {i}", "price": f"${50 + i}.00", "link": f"https://example.com/{i}", "image": ""}
+        for i in range(3)
+    ]
+    with db.connection.transaction() as conn:
+        db.products.upsert_products_in_transaction(_to_product_objects(products, "microcenter"), conn)
+    return db
+
+
+def test_products_are_slotted_frozen_with_lazy_timestamps(db):
+    product = db.products.get_products("microcenter")[0]
+
+    assert not hasattr(product, "__dict__")
+    with pytest.raises(AttributeError):
+        product.price = 1.0
+    before = hash(product)
+    assert isinstance(product._created_at, str)
+    assert isinstance(product.created_at, datetime)
+    assert isinstance(product._created_at, str), "the raw timestamp is kept"
+    assert hash(product) == before and product == db.products.get_products("microcenter")[0]
+
+
+def test_product_batch_matches_row_records(db):
+    batch = db.products.get_products_batch("microcenter")
+    products = db.products.get_products("microcenter")
+
+    assert isinstance(batch, ProductBatch)
+    assert len(batch) == 3
+    assert list(batch.prices) == [50.0, 51.0, 52.0]
+    assert list(batch) == products
+    assert batch[1] == Product(*(
+        products[1].id, "SSD 1", 51.0, "https://example.com/1", "", "microcenter",
+        0.0, products[1]._created_at, products[1]._updated_at,
+    ))
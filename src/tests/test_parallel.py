@@ -0,0 +1,86 @@
+import csv
+import queue
+
+import pytest
+
+from modes.parallel import _writer_main, run_jobs, shard_jobs
+from storage.db import Database
+
+JOBS = [("microcenter", "gpu"), ("microcenter", "cpu"), ("bh", "gpu"), ("microcenter", "ssd")]
+
+
+def test_shard_jobs_strategies():
+    assert shard_jobs(JOBS, 2, "round_robin") == [
+        [("microcenter", "gpu"), ("bh", "gpu")],
+        [("microcenter", "cpu"), ("microcenter", "ssd")],
+    ]
+    assert shard_jobs(JOBS, 2, "by_store") == [
+        [("microcenter", "gpu"), ("microcenter", "cpu"), ("microcenter", "ssd")],
+        [("bh", "gpu")],
+    ]
+    hashed = shard_jobs(JOBS, 3, "hash")
+    assert sorted(job for shard in hashed for job in shard) == sorted(JOBS)
+    assert hashed == shard_jobs(JOBS, 3, "hash")
+
+
+def _page(*names, price="$549.99"):
+    return [{"name": name, "price": price, "link": f"https://example.com/{name}", "image": ""} for name in names]
+
+
+def _write(tmp_path, export_mode, *names, messages=()):
+    results, summary = queue.Queue(), queue.Queue()
+    for page, name in enumerate(names, 1):
+        results.put(("products", "microcenter", "gpu", (page, _page(name))))
+    for message in messages:
+        results.put(message)
+    results.put(("done", "microcenter", "gpu", len(names)))
+    results.put(("done", "microcenter", "cpu", 0))
+    results.put(None)
+
+    _writer_main(results, summary, str(tmp_path / "products.db"), batch_size=1, linger=0.01,
+                 export_mode=export_mode, folder_path=str(tmp_path), delta_folder=str(tmp_path / "deltas"))
+    return summary.get_nowait()
+
+
+def test_writer_batches_products_and_reports_completed_jobs(tmp_path):
+    outcome, files, written = _write(tmp_path, "full", "RTX 4070", "RTX 4080")
+
+    assert outcome == "ok"
+    assert files == [("microcenter.csv", "gpu", "microcenter"), ("microcenter.csv", "cpu", "microcenter")]
+    assert written == 2
+    assert (tmp_path / "microcenter.csv").exists()
+    assert len(Database(str(tmp_path / "products.db")).products.get_products("microcenter")) == 2
+
+
+def test_writer_exports_one_delta_per_store(tmp_path):
+    _, [(baseline, _, _)], _ = _write(tmp_path, "delta", "RTX 4070", "RTX 4080")
+    outcome, [(delta, searches, store)], written = _write(tmp_path, "delta", "RTX 4080", "RTX 4090")
+
+    assert outcome == "ok" and written == 2 and searches == "gpu, cpu" and store == "microcenter"
+    assert baseline.startswith("deltas/microcenter-full-") and delta.startswith("deltas/microcenter-")
+    with open(tmp_path / delta, newline="", encoding="utf-8") as f:
+        assert [row["Name"] for row in csv.DictReader(f)] == ["RTX 4090"]
+
+
+def test_writer_skips_pages_resent_by_a_rerun_job_and_records_failures(tmp_path):
+    # The job re-run after its worker crashed sends page 1 again, at a newer price
+    outcome, _, written = _write(tmp_path, "full", "RTX 4070", messages=[
+        ("products", "microcenter", "gpu", (1, _page("RTX 4070", price="$499.99"))),
+        ("failed", "microcenter", "ssd", "worker process crashed"),
+    ])
+
+    assert outcome == "ok" and written == 1
+    db = Database(str(tmp_path / "products.db"))
+    [product] = db.products.get_products("microcenter")
+    assert product.price == 549.99 and len(db.products.get_price_history(product.id)) == 1
+    ledger = db.open_ledger(resume=True)
+    assert ledger.resumed, "the failed job leaves the run incomplete"
+    assert [(job.search_param, job.page, job.state) for job in ledger.jobs()] == [
+        ("gpu", 1, "done"), ("ssd", 1, "failed")
+    ]
+
+
+def test_run_jobs_raises_when_the_writer_cannot_start(tmp_path):
+    # A directory is no SQLite database: the writer reports its setup error and exits
+    with pytest.raises(RuntimeError, match="Writer process failed"):
+        run_jobs([], workers=1, db_path=str(tmp_path))
@@ -0,0 +1,40 @@
+import asyncio
+
+from processing.pipeline import Pipeline
+from storage.db_store import AsyncProductStore
+
+
+async def _fetch(search_param, page):
+    await asyncio.sleep(0)
+    return [f"{search_param}-{i}" for i in range(5)]
+
+
+def _parse(page):
+    for name in page:
+        yield {"name": name, "price": "$1.00", "link": f"https://example.com/{name}", "image": ""}
+
+
+def test_pipeline_streams_batches_to_subscribers(tmp_path):
+    db = AsyncProductStore(str(tmp_path / "products.db"))
+    batches = []
+
+    async def scenario():
+        pipeline = Pipeline("teststore", _fetch, _parse, db=db, batch_size=2, product_queue_size=1)
+
+        async def collect(batch):
+            batches.append(batch)
+
+        pipeline.subscribe(collect)
+        await pipeline.run(["gpu", "cpu"])
+        await db.aclose()
+        return pipeline
+
+    pipeline = asyncio.run(scenario())
+
+    finals = [batch.search_param for batch in batches if batch.final]
+    assert finals == ["gpu", "cpu"]
+    assert sum(len(batch.product_ids) for batch in batches) == 10
+    assert all(len(batch.products) <= 2 for batch in batches)
+    assert pipeline.stats["parse"].items_out == 10
+    assert pipeline.stats["store"].items_out == 10
+    assert pipeline.stats["parse"].max_queue_depth == 1
@@ -0,0 +1,26 @@
+from storage.db import Database, QueryProfiler, disable_profiling, enable_profiling
+from storage.db_store import _to_product_objects
+
+
+def test_profiler_exposes_n_plus_one_in_stats_query(tmp_path):
+    db = Database(str(tmp_path / "products.db"))
+    products = [
+        {"name": f"GPU {i}", "price": "$100.00", "link": f"https://example.com/{i}", "image": ""}
+        for i in range(5)
+    ]
+    with db.connection.transaction() as conn:
+        db.products.upsert_products_in_transaction(_to_product_objects(products, "microcenter"), conn)
+
+    profiler = enable_profiling(QueryProfiler(slow_ms=0))
+    try:
+        db.products.get_products_with_stats("microcenter")
+    finally:
+        assert disable_profiling() is profiler
+
+    callers = {stats.caller: stats for stats in profiler.ranked()}
+    # One connection and statement per product on top of the product listing
+    assert callers["ProductQueries.get_price_statistics"].connections == 5
+    assert callers["ProductQueries.get_price_statistics"].statements == 5
+    assert callers["ProductQueries.get_products"].connections == 1
+    assert all(statement.plan for statement in profiler.slow_statements)
+    assert "ProductQueries.get_price_statistics" in profiler.report()
@@ -0,0 +1,62 @@
+from storage.db import Database
+from storage.db.queries import NAME_KEY_SQL
+
+
+def test_search_ranks_keyword_prefix_and_falls_back_to_fuzzy(tmp_path, make_product):
+    db = Database(str(tmp_path / "products.db"))
+    db.products.insert_products([
+        make_product("ASUS GeForce RTX 4070 12GB Graphics Card"),
+        make_product("ASUS TUF Gaming Monitor"),
+        make_product("Corsair Vengeance 32GB DDR5"),
+    ])
+
+    assert [p.name for p in db.products.search_products("asus rtx")] == ["ASUS GeForce RTX 4070 12GB Graphics Card"]
+    assert len(db.products.search_products("asu")) == 2
+    # Misspelt: no name has the word, so trigram matching takes over
+    assert db.products.search_products("vengance ddr5", fuzzy=True)[0].name == "Corsair Vengeance 32GB DDR5"
+
+    similar = db.products.find_similar_products("Asus GeForce RTX4070 12 GB Graphics Card", min_score=0.9)
+    assert [p.name for p, _ in similar] == ["ASUS GeForce RTX 4070 12GB Graphics Card"]
+
+
+def test_upsert_matches_near_identical_names_across_runs(tmp_path, make_product):
+    db = Database(str(tmp_path / "products.db"))
+    with db.connection.transaction() as conn:
+        [original_id] = db.products.upsert_products_in_transaction(
+            [make_product("MSI GeForce RTX 4070 Ti SUPER 16GB", "$799.99")], conn)
+
+    # Re-spacing matches through the name key; a reworded title needs fuzzy matching
+    outcomes = {}
+    with db.connection.transaction() as conn:
+        respaced_id, reworded_id = db.products.upsert_products_in_transaction([
+            make_product("MSI GeForce RTX 4070 Ti SUPER 16 GB", "$779.99"),
+            make_product("MSI GeForce RTX 4070 Ti SUPER 16GB Graphics", "$769.99"),
+        ], conn, outcomes)
+    assert respaced_id == original_id and reworded_id != original_id
+    assert outcomes == {"matched": 1, "updated": 1, "inserted": 1}
+    assert db.products.get_product_by_id(original_id).name == "MSI GeForce RTX 4070 Ti SUPER 16GB"
+
+    outcomes = {}
+    with db.connection.transaction() as conn:
+        fuzzy_id, other_id = db.products.upsert_products_in_transaction([
+            make_product("MSI GeForce RTX 4070 Ti SUPER 16GB Gaming", "$759.99"),
+            make_product("MSI GeForce RTX 4080 SUPER 16GB", "$999.99"),
+        ], conn, outcomes, fuzzy_threshold=0.9)
+
+    assert fuzzy_id == original_id
+    assert other_id not in (original_id, reworded_id)
+    assert outcomes == {"matched": 1, "updated": 1, "inserted": 1}
+    assert db.products.get_product_by_id(original_id).name == "MSI GeForce RTX 4070 Ti SUPER 16GB Gaming"
+    assert sorted(h.price for h in db.products.get_price_history(original_id)) == [759.99, 779.99, 799.99]
+
+
+def test_lookup_name_key_matches_the_stored_column(tmp_path, make_product):
+    db = Database(str(tmp_path / "products.db"))
+    names = ["MSI GeForce RTX 4070 Ti SUPER 16 GB", "WD_Black SN850X (2TB), PCIe-4.0"]
+    db.products.insert_products([make_product(name) for name in names])
+
+    with db.connection.get_connection() as conn:
+        for name in names:
+            stored, computed = conn.execute(f"SELECT name_key, {NAME_KEY_SQL.format('?')} FROM products WHERE name = ?",
+                                            (name, name)).fetchone()
+            assert stored == computed
@@ -0,0 +1,59 @@
+import gzip
+import sqlite3
+import threading
+
+import pytest
+
+from storage.db import Database, Product, create_snapshot, latest_snapshot
+
+
+def _products(prefix, count):
+    return [Product.from_dict({"name": f"{prefix} {i}", "price": "$10.00", "link": "", "image": "",
+                               "store": "microcenter"}) for i in range(count)]
+
+
+def test_snapshot_copies_in_steps_while_writes_continue(tmp_path):
+    db = Database(str(tmp_path / "products.db"))
+    with db.connection.transaction() as conn:
+        db.products.upsert_products_in_transaction(_products("GPU", 2000), conn)
+
+    stop = threading.Event()
+    written = []
+
+    def writer():
+        while not stop.is_set():
+            db.products.insert_products(_products(f"Live {len(written)}", 1))
+            written.append(1)
+
+    thread = threading.Thread(target=writer)
+    thread.start()
+    try:
+        result = create_snapshot(db.connection.db_path, tmp_path / "snapshots", pages_per_step=8,
+                                 step_pause=0.001)
+    finally:
+        stop.set()
+        thread.join()
+
+    assert written, "writes must not be blocked for the whole copy"
+    assert result.steps > 1 and result.path == latest_snapshot(tmp_path / "snapshots")
+
+    snapshot = Database.open_latest_snapshot(str(tmp_path / "snapshots"))
+    assert len(snapshot.products.get_products(limit=10_000)) >= 2000
+    with pytest.raises(sqlite3.OperationalError):
+        snapshot.products.insert_products(_products("Nope", 1))
+
+
+def test_snapshots_rotate_and_backups_decompress(tmp_path):
+    db = Database(str(tmp_path / "products.db"))
+    db.products.insert_products(_products("SSD", 10))
+    snapshot_dir = tmp_path / "snapshots"
+
+    results = [create_snapshot(db.connection.db_path, snapshot_dir, backup=True, keep=2, keep_backups=2)
+               for _ in range(3)]
+
+    assert sorted(p.name for p in snapshot_dir.glob("*.db")) == [r.path.name for r in results[1:]]
+    assert sorted(p.name for p in snapshot_dir.glob("*.db.gz")) == [r.backup_path.name for r in results[1:]]
+
+    restored = tmp_path / "restored.db"
+    restored.write_bytes(gzip.decompress(results[-1].backup_path.read_bytes()))
+    assert len(Database(str(restored), read_only=True).products.get_products(limit=100)) == 10
@@ -0,0 +1,55 @@
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+SRC = Path(__file__).parent.parent
+
+# Cumulative import time allowed for `import main`, in milliseconds. About 50ms
+# on a laptop; the default leaves room for slow CI machines, and
+# STARTUP_BUDGET_MS tightens it where timings are stable
+STARTUP_BUDGET_MS = float(os.getenv("STARTUP_BUDGET_MS", "500"))
+# Modules only scraping and alerting runs may import
+HEAVY_MODULES = ("playwright", "bs4", "telegram", "pandas")
+
+
+def _import_times(args, cwd=SRC):
+    """Run python -X importtime and return {module: cumulative_ms}"""
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", *args],
+        cwd=cwd, capture_output=True, text=True, check=True,
+    )
+    times = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        _, cumulative, name = line.split("|")
+        try:
+            times[name.strip()] = int(cumulative) / 1000
+        except ValueError:
+            continue  # header line
+    return times
+
+
+def _heavy(times):
+    return sorted(name for name in times if name.split(".")[0] in HEAVY_MODULES)
+
+
+def test_main_import_skips_heavy_dependencies():
+    times = _import_times(["-c", "import main"])
+
+    assert _heavy(times) == []
+    assert "modes" not in times and "storage.db" not in times
+
+
+def test_main_import_time_within_budget():
+    times = _import_times(["-c", "import main"])
+
+    assert times["main"] < STARTUP_BUDGET_MS, f"import main took {times['main']:.1f}ms"
+
+
+def test_stats_command_does_not_import_playwright(tmp_path):
+    times = _import_times([str(SRC / "main.py"), "stats"], cwd=tmp_path)
+
+    assert _heavy(times) == []
+    assert "modes" not in times
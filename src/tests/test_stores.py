@@ -0,0 +1,69 @@
+import subprocess
+import sys
+from pathlib import Path
+
+from bs4 import BeautifulSoup
+
+from parsers.bh import parse_bh_html
+from parsers.microcenter import parse_microcenter_html
+
+FIXTURES = Path(__file__).parent / "fixtures"
+SRC = Path(__file__).parent.parent
+
+
+def _soup(name: str) -> BeautifulSoup:
+    return BeautifulSoup((FIXTURES / name).read_text(encoding="utf-8"), "html.parser")
+
+
+def test_parse_microcenter_fixture():
+    products = parse_microcenter_html(_soup("microcenter_search.html"))
+
+    assert len(products) == 3
+    assert products[0] == {
+        "name": "AMD Ryzen 5 5500 Cezanne 3.6GHz 6-Core AM4 Boxed Processor - Wraith Stealth Cooler Included",
+        "price": "$64.99",
+        "link": "https://www.microcenter.com/product/674520/amd-ryzen-5-5500-cezanne-36ghz-6-core-am4-boxed-processor-wraith-stealth-cooler-included",
+        "image": "https://90a1c75758623581b3f8-5c119c3de181c9857fcb2784776b17ef.ssl.cf2.rackcdn.com/0674520_643882.jpg",
+    }
+    assert products[2]["price"] == "$1,249.99"
+
+
+def test_parse_bh_fixture_skips_cards_without_price():
+    products = parse_bh_html(_soup("bh_search.html"))
+
+    assert [product["price"] for product in products] == ["$849.99", "$1,299.00"]
+    assert products[0]["name"] == "ASUS TUF Gaming GeForce RTX 4070 Ti SUPER OC Graphics Card"
+    assert products[0]["link"].startswith("https://www.bhphotovideo.com/c/product/1810251-REG/")
+    assert products[1]["image"].endswith("_1769498.jpg")
+
+
+def test_registry_only_imports_selected_adapters():
+    code = (
+        "import sys\n"
+        "from stores import get_adapter, available_stores\n"
+        "assert available_stores() == ['microcenter', 'bh']\n"
+        "adapter = get_adapter('bh')\n"
+        "assert adapter.name == 'bh' and adapter.max_concurrency == 1\n"
+        "assert get_adapter('unknown') is None\n"
+        "assert 'stores.bh' in sys.modules\n"
+        "assert 'stores.microcenter' not in sys.modules\n"
+        "assert 'fetchers.microcenter' not in sys.modules\n"
+    )
+    subprocess.run([sys.executable, "-c", code], cwd=SRC, check=True)
+
+
+def test_browser_storage_state_round_trip_and_expiry(tmp_path, monkeypatch):
+    import os
+    from fetchers import browser
+
+    monkeypatch.setattr(browser, "BROWSER_STATE_DIR", str(tmp_path / "state"))
+    assert browser.load_storage_state("microcenter") is None
+
+    state = {"cookies": [{"name": "storeSelected", "value": "131", "domain": ".microcenter.com"}], "origins": []}
+    browser.save_storage_state("microcenter", state)
+    assert browser.load_storage_state("microcenter") == state
+    assert os.listdir(tmp_path / "state") == ["microcenter.json"]
+
+    stale = os.path.getmtime(browser.storage_state_path("microcenter")) - 2 * 3600
+    os.utime(browser.storage_state_path("microcenter"), (stale, stale))
+    assert browser.load_storage_state("microcenter", max_age_hours=1) is None